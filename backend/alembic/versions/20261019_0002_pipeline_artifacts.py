@@ -0,0 +1,56 @@
+"""Persist pipeline artifacts needed to regenerate SOAP notes.
+
+Revision ID: 20261019_0002
+Revises: 20260504_0001
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_0002"
+down_revision: Union[str, Sequence[str], None] = "20260504_0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return sa.inspect(bind).has_table(table_name)
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    columns = sa.inspect(bind).get_columns(table_name)
+    return any(column["name"] == column_name for column in columns)
+
+
+def _add_column_if_missing(table_name: str, column: sa.Column) -> None:
+    if _table_exists(table_name) and not _column_exists(table_name, column.name):
+        op.add_column(table_name, column)
+
+
+def _drop_column_if_exists(table_name: str, column_name: str) -> None:
+    if _table_exists(table_name) and _column_exists(table_name, column_name):
+        op.drop_column(table_name, column_name)
+
+
+def upgrade() -> None:
+    _add_column_if_missing("transcriptions", sa.Column("encounter_type", sa.String(), nullable=True))
+    _add_column_if_missing("transcriptions", sa.Column("clinical_representation", sa.JSON(), nullable=True))
+    _add_column_if_missing("medical_entities", sa.Column("category", sa.String(), nullable=True))
+    _add_column_if_missing("soap_notes", sa.Column("quality_report", sa.JSON(), nullable=True))
+    _add_column_if_missing("soap_notes", sa.Column("quality_score", sa.Float(), nullable=True))
+    _add_column_if_missing("soap_notes", sa.Column("style_profile", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    _drop_column_if_exists("soap_notes", "style_profile")
+    _drop_column_if_exists("soap_notes", "quality_score")
+    _drop_column_if_exists("soap_notes", "quality_report")
+    _drop_column_if_exists("medical_entities", "category")
+    _drop_column_if_exists("transcriptions", "clinical_representation")
+    _drop_column_if_exists("transcriptions", "encounter_type")
@@ -0,0 +1,74 @@
+"""Index the history and entity access paths.
+
+Revision ID: 20261019_0003
+Revises: 20261019_0002
+Create Date: 2026-10-19
+
+The initial schema only indexed primary keys and users.email, so every
+history listing, entity load and cascade delete was a sequential scan.
+
+- transcriptions (user_id, created_at DESC, id DESC): the history listing
+  order and its keyset cursor; the leading user_id also covers the
+  users -> transcriptions foreign key.
+- medical_entities (transcription_id): entity loads, counts and deletes.
+
+soap_notes.transcription_id is already indexed by its unique constraint.
+On PostgreSQL the indexes are built CONCURRENTLY so a large table is not
+locked against writes while they build.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_0003"
+down_revision: Union[str, Sequence[str], None] = "20261019_0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_INDEXES = (
+    (
+        "ix_transcriptions_user_id_created_at",
+        "transcriptions",
+        [sa.text("user_id"), sa.text("created_at DESC"), sa.text("id DESC")],
+    ),
+    ("ix_medical_entities_transcription_id", "medical_entities", ["transcription_id"]),
+)
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return sa.inspect(bind).has_table(table_name)
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    indexes = sa.inspect(bind).get_indexes(table_name)
+    return any(index["name"] == index_name for index in indexes)
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if _is_postgresql():
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+        with op.get_context().autocommit_block():
+            for index_name, table_name, columns in _INDEXES:
+                if _table_exists(table_name) and not _index_exists(table_name, index_name):
+                    op.create_index(index_name, table_name, columns, postgresql_concurrently=True)
+        return
+
+    for index_name, table_name, columns in _INDEXES:
+        if _table_exists(table_name) and not _index_exists(table_name, index_name):
+            op.create_index(index_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for index_name, table_name, _ in reversed(_INDEXES):
+        if _table_exists(table_name) and _index_exists(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
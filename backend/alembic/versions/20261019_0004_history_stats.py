@@ -0,0 +1,59 @@
+"""Per-user history statistics tables.
+
+Revision ID: 20261019_0004
+Revises: 20261019_0003
+Create Date: 2026-10-19
+
+Backs GET /api/history/stats. The rows are maintained by the app
+(history_stats.py) and built lazily per user from their existing history on
+first use, so no data migration is needed here.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_0004"
+down_revision: Union[str, Sequence[str], None] = "20261019_0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return sa.inspect(bind).has_table(table_name)
+
+
+def upgrade() -> None:
+    if not _table_exists("user_history_stats"):
+        op.create_table(
+            "user_history_stats",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("transcription_count", sa.Integer(), nullable=False),
+            sa.Column("confidence_sum", sa.Float(), nullable=False),
+            sa.Column("duration_seconds", sa.Integer(), nullable=False),
+            sa.Column("entity_count", sa.Integer(), nullable=False),
+            sa.Column("category_counts", sa.JSON(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+    if not _table_exists("user_daily_activity"):
+        op.create_table(
+            "user_daily_activity",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("transcription_count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id", "day"),
+        )
+
+
+def downgrade() -> None:
+    if _table_exists("user_daily_activity"):
+        op.drop_table("user_daily_activity")
+    if _table_exists("user_history_stats"):
+        op.drop_table("user_history_stats")
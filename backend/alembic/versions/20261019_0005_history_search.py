@@ -0,0 +1,105 @@
+"""Full-text search columns and GIN indexes for history search.
+
+Revision ID: 20261019_0005
+Revises: 20261019_0004
+Create Date: 2026-10-19
+
+Backs GET /api/history/search (history_search.py). PostgreSQL only; other
+dialects are left unchanged and search falls back to LIKE.
+
+- transcriptions.search_vector: tsvector of the transcript.
+- soap_notes.search_vector: weighted tsvector of the four SOAP sections.
+
+Both are STORED generated columns, so Postgres keeps them current on every
+insert and update without triggers or app code. Adding a stored generated
+column rewrites the table under an ACCESS EXCLUSIVE lock, so run this in a
+maintenance window on a large database. The GIN indexes are then built
+CONCURRENTLY.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_0005"
+down_revision: Union[str, Sequence[str], None] = "20261019_0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same expressions as history_search.py, frozen at this revision.
+_VECTORS = (
+    (
+        "transcriptions",
+        "to_tsvector('english', coalesce(transcription, ''))",
+        "ix_transcriptions_search_vector",
+    ),
+    (
+        "soap_notes",
+        "setweight(to_tsvector('english', coalesce(assessment, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(subjective, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(plan, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(objective, '')), 'C')",
+        "ix_soap_notes_search_vector",
+    ),
+)
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return sa.inspect(bind).has_table(table_name)
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    columns = sa.inspect(bind).get_columns(table_name)
+    return any(column["name"] == column_name for column in columns)
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    indexes = sa.inspect(bind).get_indexes(table_name)
+    return any(index["name"] == index_name for index in indexes)
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    for table_name, expression, _ in _VECTORS:
+        if _table_exists(table_name) and not _column_exists(table_name, "search_vector"):
+            op.execute(
+                f"ALTER TABLE {table_name} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({expression}) STORED"
+            )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        for table_name, _, index_name in _VECTORS:
+            if _table_exists(table_name) and not _index_exists(table_name, index_name):
+                op.create_index(
+                    index_name,
+                    table_name,
+                    ["search_vector"],
+                    postgresql_using="gin",
+                    postgresql_concurrently=True,
+                )
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        return
+
+    for table_name, _, index_name in reversed(_VECTORS):
+        if not _table_exists(table_name):
+            continue
+        if _index_exists(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
+        if _column_exists(table_name, "search_vector"):
+            op.drop_column(table_name, "search_vector")
@@ -0,0 +1,118 @@
+"""Per-user normalized entity lookup for GET /api/history/by-entity.
+
+Revision ID: 20261019_0006
+Revises: 20261019_0005
+Create Date: 2026-10-19
+
+Adds to medical_entities:
+- user_id: denormalized from transcriptions, so the lookup needs no join.
+- normalized_text: the lower-cased, whitespace-collapsed term
+  (persistence.normalize_entity_text).
+- ix_medical_entities_user_id_normalized_text on
+  (user_id, normalized_text, transcription_id).
+
+Existing rows are backfilled in one UPDATE. On a very large table, expect
+that to take a while and to write every entity row once. On PostgreSQL the
+index is then built CONCURRENTLY.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_0006"
+down_revision: Union[str, Sequence[str], None] = "20261019_0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_INDEX_NAME = "ix_medical_entities_user_id_normalized_text"
+# The name PostgreSQL gives the same constraint when create_all() or the
+# startup fallback in main.py creates it.
+_FOREIGN_KEY_NAME = "medical_entities_user_id_fkey"
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return sa.inspect(bind).has_table(table_name)
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    columns = sa.inspect(bind).get_columns(table_name)
+    return any(column["name"] == column_name for column in columns)
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    indexes = sa.inspect(bind).get_indexes(table_name)
+    return any(index["name"] == index_name for index in indexes)
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _backfill_normalized_text_in_python() -> None:
+    # SQLite has no regexp_replace, and lower(trim(text)) would leave inner
+    # whitespace runs ("chest  pain") that never match a lookup. Frozen copy of
+    # persistence.normalize_entity_text().
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, text FROM medical_entities WHERE id > :last_id ORDER BY id LIMIT 5000"),
+            {"last_id": last_id},
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            sa.text("UPDATE medical_entities SET normalized_text = :normalized_text WHERE id = :id"),
+            [{"id": row.id, "normalized_text": " ".join((row.text or "").split()).lower()} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    if not _table_exists("medical_entities"):
+        return
+
+    if not _column_exists("medical_entities", "user_id"):
+        op.add_column("medical_entities", sa.Column("user_id", sa.Integer(), nullable=True))
+        if _is_postgresql():
+            op.create_foreign_key(_FOREIGN_KEY_NAME, "medical_entities", "users", ["user_id"], ["id"])
+        op.execute(
+            "UPDATE medical_entities SET user_id = "
+            "(SELECT user_id FROM transcriptions WHERE transcriptions.id = medical_entities.transcription_id)"
+        )
+
+    if not _column_exists("medical_entities", "normalized_text"):
+        op.add_column("medical_entities", sa.Column("normalized_text", sa.String(), nullable=True))
+        if _is_postgresql():
+            op.execute(r"UPDATE medical_entities SET normalized_text = lower(btrim(regexp_replace(text, '\s+', ' ', 'g')))")
+        else:
+            _backfill_normalized_text_in_python()
+
+    columns = ["user_id", "normalized_text", "transcription_id"]
+    if _is_postgresql():
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+        with op.get_context().autocommit_block():
+            if not _index_exists("medical_entities", _INDEX_NAME):
+                op.create_index(_INDEX_NAME, "medical_entities", columns, postgresql_concurrently=True)
+    elif not _index_exists("medical_entities", _INDEX_NAME):
+        op.create_index(_INDEX_NAME, "medical_entities", columns)
+
+
+def downgrade() -> None:
+    if not _table_exists("medical_entities"):
+        return
+    if _index_exists("medical_entities", _INDEX_NAME):
+        op.drop_index(_INDEX_NAME, table_name="medical_entities")
+    if _column_exists("medical_entities", "normalized_text"):
+        op.drop_column("medical_entities", "normalized_text")
+    if _column_exists("medical_entities", "user_id"):
+        if _is_postgresql():
+            op.drop_constraint(_FOREIGN_KEY_NAME, "medical_entities", type_="foreignkey")
+        op.drop_column("medical_entities", "user_id")
@@ -0,0 +1,93 @@
+"""ON DELETE CASCADE on every foreign key.
+
+Revision ID: 20261019_0007
+Revises: 20261019_0006
+Create Date: 2026-10-19
+
+Deleting a user or transcription row now removes everything under it in the
+database, instead of the ORM loading and deleting each child row. The
+set-based deletes are in history_purge.py.
+
+PostgreSQL only. Each constraint is re-created NOT VALID (no table scan while
+holding the lock) and then validated separately, which only takes a SHARE
+UPDATE EXCLUSIVE lock. SQLite cannot alter foreign keys in place and does not
+enforce them by default. history_purge.py deletes child rows explicitly, so
+it does not depend on this.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_0007"
+down_revision: Union[str, Sequence[str], None] = "20261019_0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, referred table)
+_FOREIGN_KEYS = (
+    ("transcriptions", "user_id", "users"),
+    ("medical_entities", "transcription_id", "transcriptions"),
+    ("medical_entities", "user_id", "users"),
+    ("soap_notes", "transcription_id", "transcriptions"),
+    ("user_history_stats", "user_id", "users"),
+    ("user_daily_activity", "user_id", "users"),
+)
+
+
+def _table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return sa.inspect(bind).has_table(table_name)
+
+
+def _foreign_key_names(table_name: str, column_name: str) -> list[str]:
+    bind = op.get_bind()
+    return [
+        foreign_key["name"]
+        for foreign_key in sa.inspect(bind).get_foreign_keys(table_name)
+        if foreign_key["constrained_columns"] == [column_name] and foreign_key["name"]
+    ]
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _recreate_foreign_keys(ondelete: str | None) -> None:
+    created = []
+    for table_name, column_name, referred_table in _FOREIGN_KEYS:
+        if not _table_exists(table_name):
+            continue
+        for name in _foreign_key_names(table_name, column_name):
+            op.drop_constraint(name, table_name, type_="foreignkey")
+        # PostgreSQL's default name, as create_all() would give it.
+        name = f"{table_name}_{column_name}_fkey"
+        op.create_foreign_key(
+            name,
+            table_name,
+            referred_table,
+            [column_name],
+            ["id"],
+            ondelete=ondelete,
+            postgresql_not_valid=True,
+        )
+        created.append((table_name, name))
+
+    # Commit the swap first so validation does not run under its
+    # ACCESS EXCLUSIVE locks.
+    with op.get_context().autocommit_block():
+        for table_name, name in created:
+            op.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {name}")
+
+
+def upgrade() -> None:
+    if _is_postgresql():
+        _recreate_foreign_keys("CASCADE")
+
+
+def downgrade() -> None:
+    if _is_postgresql():
+        _recreate_foreign_keys(None)
@@ -0,0 +1,184 @@
+# audio_ingestion.py
+# Decode an uploaded recording once into a 16 kHz mono float32 NumPy buffer.
+#
+# Why?
+# WhisperModel.transcribe() was handed a file path, so PyAV/ffmpeg decoded the
+# file on every call: once for the transcript, again for each two-pass
+# re-decode, and again for anything else that needed samples. Now the
+# transcription stage calls load_audio() once, and every consumer — both
+# decoding passes, segment slicing, duration — shares the same read-only
+# buffer.
+#
+# - PCM / float WAV at 16 kHz: the sample data is memory-mapped straight from
+#   the file (no ffmpeg) and converted to float32 in blocks.
+# - Anything else goes through faster-whisper's PyAV decoder, which also
+#   resamples and downmixes.
+# - Recordings longer than AUDIO_MEMMAP_MIN_SECONDS are written to a float32
+#   memory-mapped temp file instead of the heap, so a long consultation does
+#   not pin hundreds of MB per worker. close() removes it.
+#
+# probe_duration() reads just the WAV header, so the API process can size a
+# job (e.g. for whisper_tiers) without decoding anything.
+
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+AUDIO_MEMMAP_MIN_SECONDS = float(os.getenv("AUDIO_MEMMAP_MIN_SECONDS", "600"))
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# Samples converted per block when copying from the WAV memmap.
+_CONVERT_BLOCK = SAMPLE_RATE * 60
+
+
+class DecodedAudio:
+    """A read-only 16 kHz mono float32 buffer plus where it came from."""
+
+    def __init__(self, samples: np.ndarray, source: str, memmap_path: str | None = None):
+        samples.flags.writeable = False
+        self.samples = samples
+        self.source = source
+        self._memmap_path = memmap_path
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+    def slice(self, start_seconds: float, end_seconds: float) -> np.ndarray:
+        """A view (not a copy) of the samples between two timestamps."""
+        start = max(0, int(start_seconds * SAMPLE_RATE))
+        end = min(len(self.samples), int(end_seconds * SAMPLE_RATE))
+        return self.samples[start:max(start, end)]
+
+    def close(self) -> None:
+        if self._memmap_path is not None:
+            # Unlinking is safe while views are still mapped; the pages go
+            # away with the last reference.
+            self.samples = np.empty(0, dtype=np.float32)
+            try:
+                os.remove(self._memmap_path)
+            except OSError:
+                pass
+            self._memmap_path = None
+
+    def __enter__(self) -> "DecodedAudio":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_audio(path: str) -> DecodedAudio:
+    """Decode `path` once. Use as a context manager to release memmaps."""
+    wav = _read_wav_layout(path)
+    if wav is not None and wav["sample_rate"] == SAMPLE_RATE and wav["dtype"] is not None:
+        return _load_wav_memmap(path, wav)
+    try:
+        # Imported here so the API process, which only probes WAV headers,
+        # never loads PyAV / CTranslate2.
+        from faster_whisper import decode_audio  # type: ignore
+    except ImportError:
+        raise RuntimeError(
+            "Only 16 kHz PCM WAV can be decoded without the 'faster-whisper' package (PyAV)."
+        ) from None
+    samples = decode_audio(path, sampling_rate=SAMPLE_RATE)
+    if len(samples) / SAMPLE_RATE >= AUDIO_MEMMAP_MIN_SECONDS:
+        buffer, memmap_path = _allocate(len(samples))
+        buffer[:] = samples
+        buffer.flush()
+        return DecodedAudio(buffer, "pyav-memmap", memmap_path)
+    return DecodedAudio(samples.astype(np.float32, copy=False), "pyav")
+
+
+def probe_duration(path: str) -> float | None:
+    """Duration from the WAV header, or None for other containers."""
+    wav = _read_wav_layout(path)
+    if wav is None or not wav["frame_bytes"]:
+        return None
+    return wav["data_size"] / wav["frame_bytes"] / wav["sample_rate"]
+
+
+def _read_wav_layout(path: str) -> dict | None:
+    """Parse RIFF chunks up to `data`. Returns None if this is not a WAV."""
+    try:
+        with open(path, "rb") as handle:
+            header = handle.read(12)
+            if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+                return None
+            fmt = None
+            while True:
+                chunk_header = handle.read(8)
+                if len(chunk_header) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+                if chunk_id == b"fmt ":
+                    fmt = handle.read(chunk_size)
+                    if chunk_size % 2:
+                        handle.seek(1, os.SEEK_CUR)
+                elif chunk_id == b"data":
+                    if fmt is None or len(fmt) < 16:
+                        return None
+                    data_offset = handle.tell()
+                    file_size = os.fstat(handle.fileno()).st_size
+                    break
+                else:
+                    handle.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+    except OSError:
+        return None
+
+    format_tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+    dtype = {
+        (_WAVE_FORMAT_PCM, 16): np.dtype("<i2"),
+        (_WAVE_FORMAT_PCM, 32): np.dtype("<i4"),
+        (_WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype("<f4"),
+    }.get((format_tag, bits))
+    # Streaming recorders sometimes leave the data size unset or too large.
+    data_size = min(chunk_size, file_size - data_offset)
+    return {
+        "dtype": dtype,
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "frame_bytes": block_align,
+        "data_offset": data_offset,
+        "data_size": data_size - data_size % block_align if block_align else 0,
+    }
+
+
+def _load_wav_memmap(path: str, wav: dict) -> DecodedAudio:
+    channels = wav["channels"]
+    frames = wav["data_size"] // wav["frame_bytes"]
+    if frames == 0:
+        return DecodedAudio(np.empty(0, dtype=np.float32), "wav-memmap")
+    raw = np.memmap(path, dtype=wav["dtype"], mode="r", offset=wav["data_offset"], shape=(frames, channels))
+
+    if wav["dtype"] == np.dtype("<f4") and channels == 1:
+        # Already what Whisper wants: hand out the file mapping itself.
+        return DecodedAudio(raw.reshape(-1), "wav-memmap")
+
+    scale = 1.0 if wav["dtype"].kind == "f" else float(np.iinfo(wav["dtype"]).max + 1)
+    if frames / SAMPLE_RATE >= AUDIO_MEMMAP_MIN_SECONDS:
+        samples, memmap_path = _allocate(frames)
+    else:
+        samples, memmap_path = np.empty(frames, dtype=np.float32), None
+    for start in range(0, frames, _CONVERT_BLOCK):
+        block = raw[start:start + _CONVERT_BLOCK].astype(np.float32)
+        samples[start:start + len(block)] = (block.mean(axis=1) if channels > 1 else block[:, 0]) / scale
+    del raw
+    if memmap_path is not None:
+        samples.flush()
+    return DecodedAudio(samples, "wav-memmap", memmap_path)
+
+
+def _allocate(frames: int) -> tuple[np.memmap, str]:
+    handle, path = tempfile.mkstemp(prefix="audio-", suffix=".f32")
+    os.close(handle)
+    return np.memmap(path, dtype=np.float32, mode="w+", shape=(frames,)), path
@@ -8,6 +8,10 @@
 # the user ID from the token. This is the correct approach for a REST API that
 # will be consumed by a separate frontend (Vercel) talking to a separate backend
 # (Railway).
+#
+# The token also carries the account's active flag, and looked-up users are
+# kept briefly in user_cache.py, so most protected requests authenticate
+# without touching the users table.
 
 from datetime import datetime, timedelta, timezone
 from typing import Optional
@@ -15,11 +19,12 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 import os
 
-from database import get_db
+from database import SessionLocal, get_db
 import models
+from user_cache import cache as user_cache
 
 # Secret key used to sign JWT tokens. In production this must be a long random
 # string stored in the environment — never hardcoded. Generate one with:
@@ -50,15 +55,19 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
-def create_access_token(user_id: int) -> str:
+def create_access_token(user_id: int, is_active: bool = True) -> str:
     """
-    Create a signed JWT token containing the user's ID.
+    Create a signed JWT token containing the user's ID and active flag.
     The token expires after ACCESS_TOKEN_EXPIRE_MINUTES.
     """
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {
         "sub": str(user_id),   # "sub" (subject) is the standard JWT claim for user identity
         "exp": expire,
+        # Lets a token for an inactive account be rejected without a lookup.
+        # Not authoritative the other way: an account deactivated after the
+        # token was issued is caught by the user lookup (or cache TTL).
+        "active": is_active,
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -78,23 +87,68 @@ def get_current_user(
         @app.get("/api/protected")
         def protected(current_user: models.User = Depends(get_current_user)):
             return {"user_id": current_user.id}
+
+    A recently seen user comes from user_cache instead of the database: the
+    snapshot is rebuilt into a User and merged into `db` with load=False,
+    which attaches it as a persistent, unmodified row without a SELECT.
+    Routes can still change and commit it as usual.
+    """
+    user_id = _decode_user_id(credentials.credentials)
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = models.User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None or not user.is_active:
+        raise _credentials_exception()
+    user_cache.put(user)
+    return user
+
+
+def get_streaming_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> int:
+    """
+    Variant of get_current_user for long-lived streaming responses (SSE).
+
+    A Depends(get_db) session stays checked out until the response finishes,
+    which for an event stream can be minutes. This dependency opens its own
+    session only for the lookup and returns just the user id.
     """
-    credentials_exception = HTTPException(
+    user_id = _decode_user_id(credentials.credentials)
+    if user_cache.get(user_id) is not None:
+        return user_id
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if user is None or not user.is_active:
+            raise _credentials_exception()
+        user_cache.put(user)
+        return user.id
+    finally:
+        db.close()
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired token",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_user_id(token: str) -> int:
+    """
+    Verify the token signature and expiry and return the user id it carries.
+    Tokens issued before the "active" claim existed count as active.
+    """
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: Optional[str] = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        if user_id is None or payload.get("active", True) is not True:
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
-    if user is None or not user.is_active:
-        raise credentials_exception
-
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    return int(user_id)
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Authenticated-user cache benchmark: SQL statements and latency per request
+for read-only endpoints, with user_cache.py disabled and enabled.
+
+Creates a throwaway user with --rows saved transcriptions in DATABASE_URL,
+then replays --requests requests cycling through GET /api/auth/me,
+GET /api/history/summary and GET /api/history/{id}. It calls the route
+functions with the same dependencies FastAPI would resolve: a fresh session
+and get_current_user per request. SQL statements are counted with an engine
+event listener. The user is deleted at the end.
+
+Usage (from backend/):
+
+    python benchmarks/auth_cache_benchmark.py --requests 300
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import auth  # noqa: E402
+import history_purge  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+import persistence  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from user_cache import UserCache  # noqa: E402
+
+
+def _seed(rows: int) -> tuple[int, list[int]]:
+    with SessionLocal() as db:
+        user = models.User(
+            email=f"bench-{uuid.uuid4().hex[:10]}@example.com",
+            hashed_password="-",
+            first_name="Bench",
+            last_name="Runner",
+        )
+        db.add(user)
+        db.commit()
+        ids = [
+            persistence.insert_transcription_bundle(
+                db,
+                {"user_id": user.id, "patient_id": f"PT-{index:05d}", "filename": "auth-benchmark.wav",
+                 "transcription": "benchmark " * 50, "confidence_score": 85.0, "status": "complete"},
+                {"subjective": "benchmark", "source": "benchmark"},
+                persistence.entity_rows([{"text": "cough", "label": "SYMPTOM", "category": "symptom"}]),
+            )
+            for index in range(rows)
+        ]
+        db.commit()
+        return user.id, ids
+
+
+def _replay(credentials, transcription_ids: list[int], requests: int, counter: list[int]) -> tuple[list[int], list[float]]:
+    routes = (
+        lambda user, db, _: main.get_me(current_user=user),
+        lambda user, db, _: main.get_history_summary(limit=50, cursor=None, current_user=user, db=db),
+        lambda user, db, index: main.get_transcription(
+            transcription_id=transcription_ids[index % len(transcription_ids)], current_user=user, db=db,
+        ),
+    )
+    statements, timings = [], []
+    for index in range(requests):
+        counter[0] = 0
+        started_at = time.perf_counter()
+        with SessionLocal() as db:
+            user = auth.get_current_user(credentials, db)
+            routes[index % len(routes)](user, db, index)
+        timings.append((time.perf_counter() - started_at) * 1000)
+        statements.append(counter[0])
+    return statements, timings
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=20, help="transcriptions for the test user")
+    args = parser.parse_args()
+
+    user_id, transcription_ids = _seed(args.rows)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=auth.create_access_token(user_id))
+    counter = [0]
+
+    def count(*_):
+        counter[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    print(f"dialect={engine.dialect.name} requests={args.requests}")
+    print(f"{'user cache':<12}{'SQL/request':>12}{'p50 ms':>9}{'hit rate':>10}")
+    try:
+        for label, cache in (("disabled", UserCache(ttl_seconds=0)), ("enabled", UserCache())):
+            auth.user_cache = cache
+            statements, timings = _replay(credentials, transcription_ids, args.requests, counter)
+            hit_rate = f"{cache.stats()['hit_rate']:.1%}" if cache.enabled else "-"
+            print(f"{label:<12}{sum(statements) / len(statements):>12.2f}{statistics.median(timings):>9.2f}{hit_rate:>10}")
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        history_purge.purge_account(user_id)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,113 @@
+"""
+Whisper backend startup benchmark: import time and RSS per backend.
+
+Each row runs in a fresh interpreter and reports:
+- how long `import transcription` takes, and the process RSS after it
+  (what the API process pays just to read settings)
+- the selected backend's import time and RSS, as recorded by whisper_backends
+- with --model, the model load time and the RSS added by the model
+
+The "eager" row reproduces the old module-level imports (torch,
+openai-whisper and faster-whisper together) for comparison. Backends whose
+packages are not installed are reported as unavailable.
+
+Usage (from backend/):
+
+    python benchmarks/backend_startup_benchmark.py
+    python benchmarks/backend_startup_benchmark.py --model base.en --runs 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, os, sys, time
+sys.path.insert(0, {backend_dir!r})
+from whisper_backends import rss_bytes
+
+baseline = rss_bytes()
+started_at = time.perf_counter()
+import transcription
+result = {{
+    "module_import_seconds": time.perf_counter() - started_at,
+    "module_rss_mb": (rss_bytes() - baseline) / 2**20,
+}}
+try:
+    if {eager!r}:
+        started_at = time.perf_counter()
+        import torch, whisper, faster_whisper
+        result["backend_import_seconds"] = time.perf_counter() - started_at
+    else:
+        stats = transcription.get_backend(transcription.WHISPER_BACKEND).stats()
+        result["backend"] = stats["backend"]
+        result["backend_import_seconds"] = stats["import_seconds"]
+        if {model!r}:
+            transcription.load_transcription_model({model!r})
+            stats = transcription.backend_stats()
+            result["model_load_seconds"] = stats["models"][{model!r}]["load_seconds"]
+            result["model_rss_mb"] = stats["models"][{model!r}]["rss_mb"]
+except (ImportError, RuntimeError) as exc:
+    result["error"] = str(exc)
+result["total_rss_mb"] = rss_bytes() / 2**20
+print(json.dumps(result))
+"""
+
+
+def _probe(backend: str, model: str | None) -> dict:
+    eager = backend == "eager"
+    env = {**os.environ, "WHISPER_BACKEND": "faster-whisper" if eager else backend}
+    code = _PROBE.format(backend_dir=str(BACKEND_DIR), eager=eager, model=model)
+    completed = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _format(values: list[float | None], unit: str) -> str:
+    values = [value for value in values if value is not None]
+    return f"{statistics.median(values):.2f}{unit}" if values else "-"
+
+
+def main() -> None:
+    sys.path.insert(0, str(BACKEND_DIR))
+    from whisper_backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="also load this model and report its load time and RSS")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per backend (median reported)")
+    parser.add_argument("--backends", nargs="+", default=[*BACKENDS, "eager"])
+    args = parser.parse_args()
+
+    print(
+        f"{'backend':<16}{'import transcription':>21}{'module RSS':>12}{'backend import':>16}"
+        f"{'model load':>12}{'model RSS':>11}{'total RSS':>11}"
+    )
+    for backend in args.backends:
+        runs = [_probe(backend, args.model) for _ in range(args.runs)]
+        errors = [run["error"] for run in runs if "error" in run]
+        if errors:
+            print(f"{backend:<16}  unavailable: {errors[0]}")
+            continue
+        fallback = runs[0].get("backend")
+        label = backend if fallback in (None, backend) else f"{backend}->{fallback}"
+        print(
+            f"{label:<16}"
+            f"{_format([run['module_import_seconds'] for run in runs], 's'):>21}"
+            f"{_format([run['module_rss_mb'] for run in runs], ' MB'):>12}"
+            f"{_format([run.get('backend_import_seconds') for run in runs], 's'):>16}"
+            f"{_format([run.get('model_load_seconds') for run in runs], 's'):>12}"
+            f"{_format([run.get('model_rss_mb') for run in runs], ' MB'):>11}"
+            f"{_format([run['total_rss_mb'] for run in runs], ' MB'):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
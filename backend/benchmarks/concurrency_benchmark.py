@@ -0,0 +1,118 @@
+"""
+Concurrency benchmark: latency of light endpoints while transcriptions run.
+
+Probes GET /health, GET /api/auth/me and GET /api/history in a tight loop,
+first with the server idle, then while N transcriptions are in flight, and
+prints p50 / p95 / max latency for each phase. With the pipeline stages on the
+stage executor the "under load" numbers should stay in single-digit
+milliseconds; with CPU stages on the event loop they climb to seconds.
+
+Usage (server already running, e.g. ./scripts/dev-backend.sh):
+
+    python benchmarks/concurrency_benchmark.py path/to/consultation.wav \\
+        --base-url http://localhost:8000 --transcriptions 3
+
+A throwaway account is registered for the run unless --email/--password are
+given. Compare CPU_STAGE_WORKERS=0 against the default to see the difference
+the process pool makes.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+PROBE_PATHS = ("/health", "/api/auth/me", "/api/history")
+
+
+async def _authenticate(client: httpx.AsyncClient, email: str | None, password: str | None) -> str:
+    if email and password:
+        response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    else:
+        response = await client.post("/api/auth/register", json={
+            "email": f"bench-{uuid.uuid4().hex[:10]}@example.com",
+            "password": uuid.uuid4().hex,
+            "first_name": "Bench",
+            "last_name": "Runner",
+        })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> dict[str, list[float]]:
+    samples: dict[str, list[float]] = {path: [] for path in PROBE_PATHS}
+    while not stop.is_set():
+        for path in PROBE_PATHS:
+            started_at = time.perf_counter()
+            response = await client.get(path)
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            if response.status_code == 200:
+                samples[path].append(elapsed_ms)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def _transcribe(client: httpx.AsyncClient, audio: Path, encounter_type: str) -> float:
+    started_at = time.perf_counter()
+    with audio.open("rb") as handle:
+        response = await client.post(
+            "/api/transcribe",
+            files={"file": (audio.name, handle)},
+            data={"encounter_type": encounter_type},
+            timeout=None,
+        )
+    response.raise_for_status()
+    return time.perf_counter() - started_at
+
+
+def _report(phase: str, samples: dict[str, list[float]]) -> None:
+    print(f"\n{phase}")
+    print(f"  {'endpoint':<16}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for path, values in samples.items():
+        if not values:
+            print(f"  {path:<16}{0:>6}")
+            continue
+        ordered = sorted(values)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"  {path:<16}{len(ordered):>6}{statistics.median(ordered):>10.1f}{p95:>10.1f}{ordered[-1]:>10.1f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", type=Path, help="Audio file to upload (45s or longer)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--transcriptions", type=int, default=2, help="Concurrent transcriptions to run")
+    parser.add_argument("--encounter-type", default="acute_visit")
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        token = await _authenticate(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        stop = asyncio.Event()
+        idle_probe = asyncio.create_task(_probe(client, stop, args.probe_interval))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        _report("Idle", await idle_probe)
+
+        stop = asyncio.Event()
+        load_probe = asyncio.create_task(_probe(client, stop, args.probe_interval))
+        durations = await asyncio.gather(*(
+            _transcribe(client, args.audio, args.encounter_type) for _ in range(args.transcriptions)
+        ))
+        stop.set()
+        _report(f"Under load ({args.transcriptions} concurrent transcriptions)", await load_probe)
+        print(f"\nTranscription wall time: {', '.join(f'{d:.1f}s' for d in durations)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
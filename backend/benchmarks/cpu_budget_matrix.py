@@ -0,0 +1,148 @@
+"""
+CPU budget matrix: throughput and latency of concurrent inference jobs for
+each (host cores, concurrent jobs, threads per job) combination.
+
+Each host size is emulated by pinning the job processes to the first N CPUs
+(sched_setaffinity), so a 16-core machine can produce the 4- and 8-core rows
+too. Host sizes larger than the machine are skipped. For every combination the
+same number of jobs is run and the script reports jobs per minute, mean job
+latency and the CPU_INFERENCE_SLOTS / CPU_THREADS_WHISPER values to use for
+the best row per host.
+
+"threads per job" covers the budgeted split (cores // jobs) and the old
+behaviour (every job takes every core) so the cost of oversubscription is
+visible.
+
+The workload is a real Whisper decode when --audio is given (thread count set
+through CPU_THREADS_WHISPER, i.e. the same path the CPU stage workers use),
+otherwise a BLAS-bound NumPy matmul of similar shape, which is enough to show
+oversubscription on a host without the models.
+
+Usage (from backend/):
+
+    python benchmarks/cpu_budget_matrix.py --audio recordings/consult.wav --jobs 8
+    python benchmarks/cpu_budget_matrix.py --cores 4 8 16 --jobs 16
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def _initialize(cpus: list[int], threads: int, audio: str | None, model: str | None) -> None:
+    # Runs before NumPy / torch / CTranslate2 are imported in this process.
+    os.sched_setaffinity(0, cpus)
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ["CPU_THREADS_WHISPER"] = str(threads)
+    if audio:
+        sys.path.insert(0, str(BACKEND_DIR))
+        import transcription
+
+        transcription.load_transcription_model(model or transcription.WHISPER_MODEL)
+    else:
+        import numpy  # noqa: F401
+
+
+def _job(audio: str | None, model: str | None, beam_size: int, size: int) -> float:
+    started_at = time.perf_counter()
+    if audio:
+        import transcription
+
+        result = transcription.transcribe_audio(
+            audio, model_name=model or transcription.WHISPER_MODEL, beam_size=beam_size,
+        )
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+    else:
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        a = rng.standard_normal((size, size), dtype=np.float32)
+        for _ in range(8):
+            a = np.tanh(a @ a.T / size)
+    return time.perf_counter() - started_at
+
+
+def _run(cpus: list[int], concurrent: int, threads: int, args) -> dict:
+    with ProcessPoolExecutor(
+        max_workers=concurrent,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_initialize,
+        initargs=(cpus, threads, args.audio, args.model),
+    ) as pool:
+        # Warm-up: one job per worker so model loading is not timed.
+        list(pool.map(_job, *zip(*[(args.audio, args.model, args.beam_size, args.size)] * concurrent)))
+        started_at = time.perf_counter()
+        latencies = list(pool.map(_job, *zip(*[(args.audio, args.model, args.beam_size, args.size)] * args.jobs)))
+        elapsed = time.perf_counter() - started_at
+    return {
+        "cores": len(cpus),
+        "concurrent": concurrent,
+        "threads": threads,
+        "jobs_per_minute": args.jobs / elapsed * 60,
+        "mean_latency": statistics.mean(latencies),
+    }
+
+
+def _settings(cores: int) -> list[tuple[int, int]]:
+    settings = []
+    concurrent = 1
+    while concurrent <= cores:
+        for threads in dict.fromkeys((max(1, cores // concurrent), cores)):
+            settings.append((concurrent, threads))
+        concurrent *= 2
+    return settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cores", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--jobs", type=int, default=8, help="jobs timed per combination")
+    parser.add_argument("--audio", help="recording to transcribe; omit for the synthetic workload")
+    parser.add_argument("--model", help="Whisper model (default: WHISPER_MODEL)")
+    parser.add_argument("--beam-size", type=int, default=1)
+    parser.add_argument("--size", type=int, default=768, help="matrix size for the synthetic workload")
+    args = parser.parse_args()
+
+    available = sorted(os.sched_getaffinity(0))
+    workload = f"whisper {args.audio}" if args.audio else f"synthetic matmul {args.size}x{args.size}"
+    print(f"{len(available)} CPUs available; workload: {workload}; {args.jobs} jobs per row")
+    print(f"{'cores':>6}{'jobs':>6}{'threads':>9}{'jobs/min':>10}{'mean s':>9}")
+
+    best: dict[int, dict] = {}
+    for cores in args.cores:
+        if cores > len(available):
+            print(f"{cores:>6}  skipped (only {len(available)} CPUs)")
+            continue
+        for concurrent, threads in _settings(cores):
+            row = _run(available[:cores], concurrent, threads, args)
+            oversubscribed = " oversubscribed" if concurrent * threads > cores else ""
+            print(
+                f"{cores:>6}{concurrent:>6}{threads:>9}{row['jobs_per_minute']:>10.1f}"
+                f"{row['mean_latency']:>9.2f}{oversubscribed}"
+            )
+            if cores not in best or row["jobs_per_minute"] > best[cores]["jobs_per_minute"]:
+                best[cores] = row
+
+    print("\nBest setting per host:")
+    for cores, row in best.items():
+        print(
+            f"  {cores:>2} cores: CPU_BUDGET_CORES={cores} CPU_INFERENCE_SLOTS={row['concurrent']} "
+            f"CPU_THREADS_WHISPER={row['threads']}  ({row['jobs_per_minute']:.1f} jobs/min, "
+            f"{row['mean_latency']:.2f}s mean latency)"
+        )
+
+
+if __name__ == "__main__":
+    main()
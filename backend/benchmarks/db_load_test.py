@@ -0,0 +1,231 @@
+"""
+Database load test at 10-200 concurrent clients.
+
+Two parts, both against a local Postgres (./scripts/dev-db.sh):
+
+1. History endpoints over HTTP. Against a running API (--base-url), each
+   client loops over GET /api/history/summary and GET /api/history/{id} for
+   --duration seconds. The server must use the same DATABASE_URL, so the
+   seeded rows are visible to it. Reports requests/s, p50 / p95 and errors
+   (e.g. 5xx from pool checkout timeouts).
+
+2. Persistence in-process. The same concurrency saves transcriptions with
+   persistence.insert_transcription_bundle:
+   - "sync": a thread per client on the sync engine, as run_io does
+   - "async": a task per client on the asyncpg engine, via
+     AsyncSession.run_sync as the transcribe endpoint now does
+   Reports saves/s, p50 / p95 and errors.
+
+Pool settings come from the DB_POOL_* and DB_ASYNC_* variables (database.py). The server's
+own settings apply to part 1. Everything seeded is deleted at the end.
+
+Usage (from backend/):
+
+    ./scripts/dev-backend.sh      # for part 1
+    python benchmarks/db_load_test.py --base-url http://localhost:8000
+    DB_POOL_SIZE=20 DB_MAX_OVERFLOW=40 python benchmarks/db_load_test.py --skip-http
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+import history_purge  # noqa: E402
+import models  # noqa: E402
+import persistence  # noqa: E402
+from database import (  # noqa: E402
+    DB_ASYNC_MAX_OVERFLOW, DB_ASYNC_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_SIZE, SessionLocal, async_engine_available,
+    dispose_async_engine, engine, new_async_session,
+)
+
+_ENTITIES = persistence.entity_rows([
+    {"text": f"term {index}", "label": "SYMPTOM", "confidence": 0.9, "start": index, "end": index + 4,
+     "category": "symptom"}
+    for index in range(20)
+])
+
+
+def _transcription(user_id: int) -> dict:
+    return {
+        "user_id": user_id,
+        "patient_id": "PT-00000",
+        "filename": "load-test.wav",
+        "transcription": "load test " * 200,
+        "confidence_score": 85.0,
+        "duration": "2:00",
+        "status": "complete",
+    }
+
+
+_SOAP_NOTE = {"subjective": "load test", "objective": "", "assessment": "", "plan": "", "source": "load-test"}
+
+
+def _save(db, user_id: int) -> int:
+    transcription_id = persistence.insert_transcription_bundle(db, _transcription(user_id), _SOAP_NOTE, _ENTITIES)
+    db.commit()
+    return transcription_id
+
+
+def _summarize(label: str, clients: int, timings: list[float], errors: int, elapsed: float) -> None:
+    if timings:
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        cells = f"{len(timings) / elapsed:>10.1f}{statistics.median(timings):>9.1f}{p95:>9.1f}"
+    else:
+        cells = f"{'-':>10}{'-':>9}{'-':>9}"
+    print(f"{label:<22}{clients:>8}{cells}{errors:>8}")
+
+
+async def _http_clients(base_url: str, token: str, ids: list[int], clients: int, duration: float) -> None:
+    timings: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=60, limits=limits,
+    ) as client:
+        async def worker(offset: int) -> None:
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < deadline:
+                path = "/api/history/summary" if index % 2 else f"/api/history/{ids[index % len(ids)]}"
+                started_at = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                    else:
+                        timings.append((time.perf_counter() - started_at) * 1000)
+                except httpx.HTTPError:
+                    errors += 1
+                index += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(clients)))
+        _summarize("history (HTTP)", clients, timings, errors, time.perf_counter() - started_at)
+
+
+def _sync_saves(user_id: int, clients: int, saves_per_client: int) -> None:
+    timings: list[float] = []
+    errors = 0
+
+    def client() -> None:
+        nonlocal errors
+        for _ in range(saves_per_client):
+            started_at = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    _save(db, user_id)
+                timings.append((time.perf_counter() - started_at) * 1000)
+            except Exception:
+                errors += 1
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for future in [pool.submit(client) for _ in range(clients)]:
+            future.result()
+    _summarize("persistence (sync)", clients, timings, errors, time.perf_counter() - started_at)
+
+
+async def _async_saves(user_id: int, clients: int, saves_per_client: int) -> None:
+    timings: list[float] = []
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        for _ in range(saves_per_client):
+            started_at = time.perf_counter()
+            try:
+                async with new_async_session() as db:
+                    await db.run_sync(_save, user_id)
+                timings.append((time.perf_counter() - started_at) * 1000)
+            except Exception:
+                errors += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    _summarize("persistence (async)", clients, timings, errors, time.perf_counter() - started_at)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per HTTP run")
+    parser.add_argument("--rows", type=int, default=500, help="transcriptions seeded for the HTTP runs")
+    parser.add_argument("--saves", type=int, default=5, help="saves per client in the persistence runs")
+    parser.add_argument("--skip-http", action="store_true")
+    args = parser.parse_args()
+
+    print(
+        f"dialect={engine.dialect.name} pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} "
+        f"async_pool_size={DB_ASYNC_POOL_SIZE} async_max_overflow={DB_ASYNC_MAX_OVERFLOW}"
+    )
+    user_ids = []
+    try:
+        print(f"\n{'workload':<22}{'clients':>8}{'per s':>10}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+        if not args.skip_http:
+            with httpx.Client(base_url=args.base_url, timeout=60) as client:
+                response = client.post("/api/auth/register", json={
+                    "email": f"load-{uuid.uuid4().hex[:10]}@example.com",
+                    "password": uuid.uuid4().hex,
+                    "first_name": "Load",
+                    "last_name": "Test",
+                })
+                response.raise_for_status()
+                token, user_id = response.json()["access_token"], response.json()["user"]["id"]
+            user_ids.append(user_id)
+            with SessionLocal() as db:
+                ids = [
+                    persistence.insert_transcription_bundle(db, _transcription(user_id), _SOAP_NOTE, _ENTITIES)
+                    for _ in range(args.rows)
+                ]
+                db.commit()
+            for clients in args.clients:
+                asyncio.run(_http_clients(args.base_url, token, ids, clients, args.duration))
+
+        with SessionLocal() as db:
+            user = models.User(
+                email=f"load-{uuid.uuid4().hex[:10]}@example.com",
+                hashed_password="-",
+                first_name="Load",
+                last_name="Test",
+            )
+            db.add(user)
+            db.commit()
+            user_ids.append(user.id)
+        for clients in args.clients:
+            _sync_saves(user.id, clients, args.saves)
+        if async_engine_available():
+            async def async_runs() -> None:
+                # One event loop for all runs: pooled asyncpg connections are
+                # bound to the loop that opened them.
+                for clients in args.clients:
+                    await _async_saves(user.id, clients, args.saves)
+                await dispose_async_engine()
+
+            asyncio.run(async_runs())
+        else:
+            print("persistence (async)    skipped: async engine unavailable (pip install asyncpg)")
+    finally:
+        for user_id in user_ids:
+            history_purge.purge_account(user_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Offline stand-in for the Groq chat completions API, for load-testing the LLM
+gateway without spending quota.
+
+Serves POST /openai/v1/chat/completions (the path the Groq SDK calls) with
+canned JSON for each pipeline call, a configurable latency, and the same kind
+of per-minute request and token limits Groq enforces: over the limit it
+answers 429 with a Retry-After header. Streaming requests get SSE chunks
+ending in `data: [DONE]`.
+
+Usage:
+
+    python benchmarks/fake_groq_server.py --port 9100 --rpm 30 --tpm 12000
+    GROQ_BASE_URL=http://localhost:9100 GROQ_API_KEY=fake uvicorn main:app
+
+Or drive the gateway directly with benchmarks/llm_gateway_load.py.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SOAP_RESPONSE = {
+    "subjective": "Patient reports three days of productive cough and low-grade fever.",
+    "objective": "Vital signs not documented in transcript. Chest auscultation not documented.",
+    "assessment": "Presentation is consistent with an acute lower respiratory tract infection.",
+    "plan": "Supportive care with fluids and rest. Return if symptoms worsen or persist beyond a week.",
+}
+
+EXTRACTION_RESPONSE = {
+    "encounter": {"type": "acute_visit"},
+    "patient": {},
+    "clinician": {},
+    "chief_complaint": "Productive cough and fever",
+    "symptoms": ["cough", "fever"],
+    "conditions": [],
+    "medications": [],
+    "procedures": [],
+    "concerns": [],
+    "plan_items": ["Supportive care"],
+}
+
+
+class _WindowLimiter:
+    """Sliding one-minute window over (timestamp, amount) pairs."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._events: deque[tuple[float, int]] = deque()
+        self._used = 0
+
+    def try_take(self, amount: int) -> float:
+        """Record `amount` and return 0, or return seconds until it would fit."""
+        now = time.monotonic()
+        while self._events and now - self._events[0][0] >= 60:
+            self._used -= self._events.popleft()[1]
+        if self._used + amount <= self.per_minute or not self._events:
+            self._events.append((now, amount))
+            self._used += amount
+            return 0.0
+        return max(0.1, 60 - (now - self._events[0][0]))
+
+
+def create_app(rpm: int, tpm: int, latency: float, jitter: float, error_rate: float) -> FastAPI:
+    app = FastAPI(title="Fake Groq")
+    requests_limiter = _WindowLimiter(rpm)
+    tokens_limiter = _WindowLimiter(tpm)
+    counters = {"ok": 0, "rate_limited": 0, "errors": 0}
+
+    def _canned(messages: list[dict]) -> str:
+        system = messages[0]["content"] if messages else ""
+        if "extraction assistant" in system.lower():
+            return json.dumps(EXTRACTION_RESPONSE)
+        # Full notes and single-section repairs both accept the four-key object.
+        return json.dumps(SOAP_RESPONSE)
+
+    @app.get("/stats")
+    def stats():
+        return counters
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt_tokens = sum(math.ceil(len(m.get("content", "")) / 4) for m in messages)
+        cost = prompt_tokens + int(body.get("max_tokens") or 0)
+
+        retry_after = requests_limiter.try_take(1) or tokens_limiter.try_take(cost)
+        if retry_after:
+            counters["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": f"{retry_after:.2f}"},
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            )
+
+        await asyncio.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+        if random.random() < error_rate:
+            counters["errors"] += 1
+            return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable"}})
+
+        counters["ok"] += 1
+        content = _canned(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": prompt_tokens + len(content) // 4,
+                },
+            }
+
+        async def events():
+            for start in range(0, len(content), 24):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + 24]}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.01)
+            done = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--rpm", type=int, default=30, help="Requests per minute before 429s")
+    parser.add_argument("--tpm", type=int, default=12000, help="Tokens per minute before 429s")
+    parser.add_argument("--latency", type=float, default=0.8, help="Mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    app = create_app(args.rpm, args.tpm, args.latency, args.jitter, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
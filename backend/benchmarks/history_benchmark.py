@@ -0,0 +1,141 @@
+"""
+History listing benchmark: GET /api/history (everything, eager-loaded)
+against the keyset-paginated GET /api/history/summary.
+
+Registers a throwaway account through the API, then seeds --rows
+transcriptions for it straight into DATABASE_URL. Each row gets a realistic
+transcript, --entities entities and a SOAP note. The script then reports
+latency (p50 / p95) and payload size for:
+- the full listing
+- the first summary page
+- a summary page deep in the history (reached via cursors)
+
+The seeded history is deleted at the end through DELETE /api/history.
+
+Usage (server already running against the same database):
+
+    ./scripts/dev-backend.sh
+    python benchmarks/history_benchmark.py --base-url http://localhost:8000 --rows 10000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+import persistence  # noqa: E402
+from database import SessionLocal  # noqa: E402
+
+_TRANSCRIPT = (
+    "Patient reports central chest pain for two days, worse on exertion and relieved by rest. "
+    "No shortness of breath at rest. History of type 2 diabetes on metformin. "
+) * 20
+
+
+def _seed(user_id: int, rows: int, entities: int) -> None:
+    entity_rows = persistence.entity_rows([
+        {"text": f"term {index}", "label": "SYMPTOM", "confidence": 0.9, "start": index, "end": index + 4}
+        for index in range(entities)
+    ])
+    started = datetime.now(timezone.utc) - timedelta(minutes=rows)
+    with SessionLocal() as db:
+        for index in range(rows):
+            persistence.insert_transcription_bundle(
+                db,
+                {
+                    "user_id": user_id,
+                    "patient_id": f"PT-{index:05d}",
+                    "filename": f"consult-{index}.wav",
+                    "transcription": _TRANSCRIPT,
+                    "confidence_score": 85.0,
+                    "duration": "2:00",
+                    "status": "complete",
+                    "encounter_type": "acute_visit",
+                    "clinical_representation": {"symptoms": ["chest pain"]},
+                    "created_at": started + timedelta(minutes=index),
+                },
+                {"subjective": _TRANSCRIPT[:400], "objective": "", "assessment": "", "plan": "", "source": "benchmark"},
+                entity_rows,
+            )
+            if index % 500 == 499:
+                db.commit()
+        db.commit()
+
+
+def _time(client: httpx.Client, path: str, runs: int, params: dict | None = None) -> tuple[list[float], int]:
+    timings, size = [], 0
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        response = client.get(path, params=params)
+        timings.append((time.perf_counter() - started_at) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    return timings, size
+
+
+def _report(label: str, timings: list[float], size: int) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"{label:<34}{statistics.median(timings):>10.1f}{p95:>10.1f}{size / 1024:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--entities", type=int, default=20, help="entities per seeded transcription")
+    parser.add_argument("--limit", type=int, default=50, help="summary page size")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.base_url, timeout=300) as client:
+        response = client.post("/api/auth/register", json={
+            "email": f"bench-{uuid.uuid4().hex[:10]}@example.com",
+            "password": uuid.uuid4().hex,
+            "first_name": "Bench",
+            "last_name": "Runner",
+        })
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        user_id = response.json()["user"]["id"]
+
+        print(f"Seeding {args.rows} transcriptions x {args.entities} entities...")
+        _seed(user_id, args.rows, args.entities)
+        try:
+            print(f"{'endpoint':<34}{'p50 ms':>10}{'p95 ms':>10}{'payload KB':>12}")
+            _report("GET /api/history (all rows)", *_time(client, "/api/history", args.runs))
+            _report(
+                f"GET /api/history/summary first {args.limit}",
+                *_time(client, "/api/history/summary", args.runs, {"limit": args.limit}),
+            )
+
+            # Walk to the middle of the history, then time that page.
+            cursor, pages = None, 0
+            while pages < args.rows // args.limit // 2:
+                page = client.get("/api/history/summary", params={"limit": args.limit, "cursor": cursor}).json()
+                cursor, pages = page["next_cursor"], pages + 1
+                if cursor is None:
+                    break
+            if cursor is not None:
+                _report(
+                    f"GET /api/history/summary page {pages + 1}",
+                    *_time(client, "/api/history/summary", args.runs, {"limit": args.limit, "cursor": cursor}),
+                )
+        finally:
+            client.delete("/api/history").raise_for_status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+History delete benchmark: the previous ORM path (load every Transcription,
+db.delete() each, ORM cascade to entities and SOAP notes) against the
+set-based deletes in history_purge.py.
+
+Runs directly against DATABASE_URL. For each --rows value it seeds that
+many transcriptions (--entities entities and a SOAP note each) under a
+throwaway user, then deletes them once with each path and reports the
+wall time. The seeding itself uses the bulk insert and is not timed.
+
+Usage (from backend/):
+
+    python benchmarks/history_delete_benchmark.py --rows 1000 10000
+    python benchmarks/history_delete_benchmark.py --rows 10000 --skip-orm
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+import history_purge  # noqa: E402
+import models  # noqa: E402
+import persistence  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+
+def _seed(user_id: int, rows: int, entities: int) -> None:
+    entity_rows = persistence.entity_rows([
+        {"text": f"term {index}", "label": "SYMPTOM", "confidence": 0.9, "start": index, "end": index + 4,
+         "category": "symptom"}
+        for index in range(entities)
+    ])
+    with SessionLocal() as db:
+        for index in range(rows):
+            persistence.insert_transcription_bundle(
+                db,
+                {
+                    "user_id": user_id,
+                    "patient_id": f"PT-{index:05d}",
+                    "filename": "delete-benchmark.wav",
+                    "transcription": "benchmark " * 100,
+                    "confidence_score": 85.0,
+                    "duration": "2:00",
+                    "status": "complete",
+                },
+                {"subjective": "benchmark", "source": "benchmark"},
+                entity_rows,
+            )
+            if index % 1000 == 999:
+                db.commit()
+        db.commit()
+
+
+def _delete_orm(db, user_id: int) -> None:
+    """The previous implementation of DELETE /api/history."""
+    for record in db.query(models.Transcription).filter(models.Transcription.user_id == user_id).all():
+        db.delete(record)
+    db.commit()
+
+
+def _delete_set_based(db, user_id: int) -> None:
+    history_purge.delete_history(db, user_id)
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--entities", type=int, default=20, help="entities per transcription")
+    parser.add_argument("--skip-orm", action="store_true", help="only time the set-based path")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = models.User(
+            email=f"bench-{uuid.uuid4().hex[:10]}@example.com",
+            hashed_password="-",
+            first_name="Bench",
+            last_name="Runner",
+        )
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    paths = [("set-based", _delete_set_based)]
+    if not args.skip_orm:
+        paths.insert(0, ("orm", _delete_orm))
+
+    print(f"dialect={engine.dialect.name} entities/transcription={args.entities}")
+    print(f"{'rows':>8}{'path':>11}{'seconds':>10}{'speed-up':>10}")
+    try:
+        for rows in args.rows:
+            seconds = {}
+            for name, delete in paths:
+                _seed(user_id, rows, args.entities)
+                with SessionLocal() as db:
+                    started_at = time.perf_counter()
+                    delete(db, user_id)
+                    seconds[name] = time.perf_counter() - started_at
+                speed_up = f"{seconds['orm'] / seconds[name]:.0f}x" if name != "orm" and "orm" in seconds else ""
+                print(f"{rows:>8}{name:>11}{seconds[name]:>10.3f}{speed_up:>10}")
+    finally:
+        history_purge.purge_account(user_id)
+
+
+if __name__ == "__main__":
+    main()
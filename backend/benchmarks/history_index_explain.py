@@ -0,0 +1,271 @@
+"""
+EXPLAIN check and benchmark for the history / entity indexes
+(Alembic 20261019_0003 and 20261019_0006).
+
+For each access path the app uses, runs EXPLAIN (ANALYZE, BUFFERS) twice:
+- "before": inside a transaction that drops the indexes, then rolled back
+- "after": with the indexes in place
+It prints each plan's top node, any sequential scans and the execution time.
+The paths are the history summary (first and deep page), the full history
+listing, entity loading, per-transcription entity counts, an entity
+delete and the entity cohort lookup (GET /api/history/by-entity).
+
+--check runs only the "after" plans and exits non-zero if any of them still
+seq-scans transcriptions or medical_entities, so it can run in CI after
+`alembic upgrade head`.
+
+--seed first fills the database with synthetic data using generate_series
+(default: 50k transcriptions across 100 users, 20 entities each = 1M
+entities) and ANALYZEs it. --cleanup removes that data again. PostgreSQL
+only: EXPLAIN output and the seeding SQL are Postgres-specific.
+
+Usage (from backend/, DATABASE_URL pointing at a scratch Postgres):
+
+    python benchmarks/history_index_explain.py --seed --cleanup
+    python benchmarks/history_index_explain.py --seed --transcriptions 50000 --entities 20
+    python benchmarks/history_index_explain.py --check
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from sqlalchemy import text  # noqa: E402
+
+from database import engine  # noqa: E402
+
+SEED_FILENAME = "explain-seed.wav"
+INDEXES = (
+    "ix_transcriptions_user_id_created_at",
+    "ix_medical_entities_transcription_id",
+    "ix_medical_entities_user_id_normalized_text",
+)
+INDEXED_TABLES = ("transcriptions", "medical_entities")
+
+# (name, SQL). :user_id, :transcription_id, :entity_term and :cursor_* are
+# filled from the seeded (or existing) data. The SQL mirrors what the ORM emits.
+QUERIES = (
+    (
+        "history summary, first page",
+        """
+        SELECT t.id, t.created_at,
+               (SELECT count(*) FROM medical_entities e WHERE e.transcription_id = t.id) AS entity_count,
+               s.source, s.quality_score
+        FROM transcriptions t LEFT OUTER JOIN soap_notes s ON s.transcription_id = t.id
+        WHERE t.user_id = :user_id
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT 51
+        """,
+    ),
+    (
+        "history summary, deep page (keyset)",
+        """
+        SELECT t.id, t.created_at,
+               (SELECT count(*) FROM medical_entities e WHERE e.transcription_id = t.id) AS entity_count,
+               s.source, s.quality_score
+        FROM transcriptions t LEFT OUTER JOIN soap_notes s ON s.transcription_id = t.id
+        WHERE t.user_id = :user_id AND (t.created_at, t.id) < (:cursor_created_at, :cursor_id)
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT 51
+        """,
+    ),
+    (
+        "full history listing (GET /api/history)",
+        "SELECT t.* FROM transcriptions t WHERE t.user_id = :user_id ORDER BY t.created_at DESC",
+    ),
+    (
+        "entity load for one transcription (selectinload)",
+        "SELECT e.* FROM medical_entities e WHERE e.transcription_id IN (:transcription_id)",
+    ),
+    (
+        "entity delete for one transcription",
+        "DELETE FROM medical_entities WHERE transcription_id = :transcription_id",
+    ),
+    (
+        "transcriptions mentioning an entity (by-entity)",
+        """
+        SELECT t.id, t.created_at,
+               (SELECT count(*) FROM medical_entities e WHERE e.transcription_id = t.id) AS entity_count,
+               s.source, s.quality_score
+        FROM transcriptions t LEFT OUTER JOIN soap_notes s ON s.transcription_id = t.id
+        WHERE t.user_id = :user_id
+          AND EXISTS (SELECT m.id FROM medical_entities m
+                      WHERE m.user_id = :user_id AND m.normalized_text = :entity_term
+                        AND m.transcription_id = t.id)
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT 51
+        """,
+    ),
+)
+
+
+def _seed(connection, users: int, transcriptions: int, entities: int) -> None:
+    tag = uuid.uuid4().hex[:8]
+    print(f"Seeding {users} users, {transcriptions} transcriptions, {transcriptions * entities} entities...")
+    connection.execute(text("""
+        INSERT INTO users (email, hashed_password, first_name, last_name, is_active)
+        SELECT 'explain-seed-' || :tag || '-' || g || '@example.com', '-', 'Seed', 'User', true
+        FROM generate_series(1, :users) g
+    """), {"tag": tag, "users": users})
+    connection.execute(text("""
+        WITH seed_users AS (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM users WHERE email LIKE 'explain-seed-' || :tag || '-%'
+        )
+        INSERT INTO transcriptions (user_id, patient_id, filename, transcription, confidence_score, status, created_at)
+        SELECT u.id, 'PT-' || lpad((g % 100000)::text, 5, '0'), :filename, repeat('seeded transcript ', 40),
+               80, 'complete', now() - g * interval '1 minute'
+        FROM generate_series(1, :transcriptions) g
+        JOIN seed_users u ON u.n = g % :users
+    """), {"tag": tag, "users": users, "transcriptions": transcriptions, "filename": SEED_FILENAME})
+    # 2,000 distinct terms, so a given term appears in about 1% of a user's
+    # transcriptions.
+    connection.execute(text("""
+        INSERT INTO medical_entities (transcription_id, user_id, text, normalized_text, label, confidence, start, "end")
+        SELECT t.id, t.user_id, 'Term ' || term, 'term ' || term, 'SYMPTOM', 0.9, e * 10, e * 10 + 8
+        FROM transcriptions t
+        CROSS JOIN generate_series(1, :entities) e
+        CROSS JOIN LATERAL (SELECT (t.id + e * 37) % 2000 AS term) terms
+        WHERE t.filename = :filename
+    """), {"entities": entities, "filename": SEED_FILENAME})
+    connection.execute(text("""
+        INSERT INTO soap_notes (transcription_id, subjective, source)
+        SELECT id, 'seeded', 'seed' FROM transcriptions WHERE filename = :filename
+    """), {"filename": SEED_FILENAME})
+
+
+def _cleanup(connection) -> None:
+    seeded = "SELECT id FROM transcriptions WHERE filename = :filename"
+    connection.execute(text(f"DELETE FROM medical_entities WHERE transcription_id IN ({seeded})"), {"filename": SEED_FILENAME})
+    connection.execute(text(f"DELETE FROM soap_notes WHERE transcription_id IN ({seeded})"), {"filename": SEED_FILENAME})
+    connection.execute(text("DELETE FROM transcriptions WHERE filename = :filename"), {"filename": SEED_FILENAME})
+    connection.execute(text("DELETE FROM users WHERE email LIKE 'explain-seed-%'"))
+    print("Seeded data removed.")
+
+
+def _parameters(connection) -> dict:
+    # The user with the most transcriptions, and a cursor halfway through them.
+    user_id = connection.execute(text(
+        "SELECT user_id FROM transcriptions GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    if user_id is None:
+        raise SystemExit("No transcriptions in the database; run with --seed.")
+    cursor = connection.execute(text("""
+        SELECT created_at, id FROM transcriptions WHERE user_id = :user_id
+        ORDER BY created_at DESC, id DESC
+        OFFSET (SELECT count(*) / 2 FROM transcriptions WHERE user_id = :user_id) LIMIT 1
+    """), {"user_id": user_id}).one()
+    transcription_id = connection.execute(text(
+        "SELECT transcription_id FROM medical_entities ORDER BY transcription_id DESC LIMIT 1"
+    )).scalar() or 0
+    entity_term = connection.execute(text(
+        "SELECT normalized_text FROM medical_entities WHERE user_id = :user_id AND normalized_text IS NOT NULL LIMIT 1"
+    ), {"user_id": user_id}).scalar() or ""
+    return {
+        "entity_term": entity_term,
+        "user_id": user_id,
+        "cursor_created_at": cursor.created_at,
+        "cursor_id": cursor.id,
+        "transcription_id": transcription_id,
+    }
+
+
+def _explain(connection, sql: str, parameters: dict) -> dict:
+    plan = connection.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), parameters,
+    ).scalar()[0]
+    seq_scans = []
+
+    def walk(node: dict) -> None:
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan["Plan"])
+    return {
+        "node": plan["Plan"]["Node Type"],
+        "seq_scans": seq_scans,
+        "ms": plan["Execution Time"],
+    }
+
+
+def _run_plans(connection, parameters: dict) -> dict[str, dict]:
+    results = {}
+    for name, sql in QUERIES:
+        # The DELETE is really executed by EXPLAIN ANALYZE; keep it undoable.
+        savepoint = connection.begin_nested()
+        results[name] = _explain(connection, sql, parameters)
+        savepoint.rollback()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true", help="delete seeded data at the end")
+    parser.add_argument("--check", action="store_true", help="fail if an indexed path still seq-scans")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transcriptions", type=int, default=50_000)
+    parser.add_argument("--entities", type=int, default=20, help="entities per transcription")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit(f"PostgreSQL only (DATABASE_URL uses {engine.dialect.name}).")
+
+    if args.seed:
+        with engine.begin() as connection:
+            _seed(connection, args.users, args.transcriptions, args.entities)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE users, transcriptions, medical_entities, soap_notes"))
+
+    try:
+        with engine.connect() as connection:
+            with connection.begin():
+                parameters = _parameters(connection)
+                after = _run_plans(connection, parameters)
+            before = None
+            if not args.check:
+                # DDL is transactional in Postgres: drop, measure, roll back.
+                with connection.begin() as transaction:
+                    for index_name in INDEXES:
+                        connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+                    before = _run_plans(connection, parameters)
+                    transaction.rollback()
+    finally:
+        if args.cleanup:
+            with engine.begin() as connection:
+                _cleanup(connection)
+
+    failures = []
+    print(f"\n{'access path':<50}{'before':>28}{'after':>28}")
+    for name, _ in QUERIES:
+        cells = []
+        for result in (before and before[name], after[name]):
+            if result is None:
+                cells.append(f"{'-':>28}")
+                continue
+            scans = f" seq:{','.join(result['seq_scans'])}" if result["seq_scans"] else ""
+            cells.append(f"{result['ms']:>9.2f} ms {result['node'][:10]:<10}{scans}".rjust(28))
+        print(f"{name:<50}{''.join(cells)}")
+        if any(table in INDEXED_TABLES for table in after[name]["seq_scans"]):
+            failures.append(name)
+
+    if failures:
+        print("\nStill sequential-scanning with indexes in place: " + "; ".join(failures))
+        if args.check:
+            sys.exit(1)
+    elif args.check:
+        print("\nOK: no sequential scans on transcriptions or medical_entities.")
+
+
+if __name__ == "__main__":
+    main()
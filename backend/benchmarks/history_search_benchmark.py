@@ -0,0 +1,204 @@
+"""
+History search benchmark for GET /api/history/search (history_search.py,
+Alembic 20261019_0005).
+
+Seeds a synthetic corpus with generate_series: by default 100k
+transcriptions across 20 users (5k each). Each one gets a 150-word
+transcript and a SOAP note, drawn from a clinical vocabulary. A few rare
+terms appear in about 1 in 500 documents, so both selective and broad
+queries are measured. For each query it reports:
+- p50 / p95 of history_search.search() for the first page and the next
+  page (via its cursor)
+- the number of matches
+- whether the plan used the GIN indexes
+
+The target is under 100 ms at p95.
+
+PostgreSQL only (the search columns and seeding SQL are Postgres-specific).
+Run `alembic upgrade head` (or start the API once) first so the columns and
+indexes exist.
+
+Usage (from backend/, DATABASE_URL pointing at a scratch Postgres):
+
+    python benchmarks/history_search_benchmark.py --seed --cleanup
+    python benchmarks/history_search_benchmark.py --seed --transcriptions 200000 --users 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from sqlalchemy import text  # noqa: E402
+
+import history_search  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+SEED_FILENAME = "search-seed.wav"
+SEARCH_INDEXES = ("ix_transcriptions_search_vector", "ix_soap_notes_search_vector")
+
+VOCABULARY = (
+    "patient reports pain chest abdominal headache nausea vomiting fever cough shortness breath "
+    "dizziness fatigue weakness swelling rash itching blood pressure heart rate temperature "
+    "oxygen saturation examination tenderness auscultation clear bilateral normal abnormal "
+    "history diabetes hypertension asthma smoking alcohol medication metformin lisinopril "
+    "aspirin ibuprofen paracetamol amoxicillin allergy penicillin days weeks worse better "
+    "exertion rest night morning eating walking review follow up referral imaging xray "
+    "ultrasound bloods ecg troponin glucose cholesterol advised return symptoms persist "
+    "assessment likely possible viral infection strain gastritis migraine angina anxiety"
+).split()
+# Rare terms for selective queries; each appears in roughly 1 in 500 documents.
+RARE_TERMS = ("sarcoidosis", "pheochromocytoma", "amyloidosis", "porphyria")
+
+QUERIES = (
+    "sarcoidosis",
+    "pheochromocytoma OR amyloidosis",
+    "chest pain",
+    '"shortness breath"',
+    "migraine -nausea",
+    "angina troponin ecg",
+)
+
+
+def _seed(connection, users: int, transcriptions: int) -> None:
+    tag = uuid.uuid4().hex[:8]
+    print(f"Seeding {users} users, {transcriptions} transcriptions with SOAP notes...")
+    connection.execute(text("""
+        INSERT INTO users (email, hashed_password, first_name, last_name, is_active)
+        SELECT 'search-seed-' || :tag || '-' || g || '@example.com', '-', 'Seed', 'User', true
+        FROM generate_series(1, :users) g
+    """), {"tag": tag, "users": users})
+    # `WHERE g > 0` correlates the word subquery with each row so Postgres
+    # draws new random words per document instead of reusing one result.
+    words = "CAST(:vocabulary AS text[])"
+    random_words = (
+        "(SELECT string_agg(({words})[1 + floor(random() * {size})::int], ' ') "
+        "FROM generate_series(1, {count}) WHERE {correlation} > 0)"
+    )
+    rare = f"CASE WHEN random() < 0.002 THEN ' ' || (CAST(:rare AS text[]))[1 + floor(random() * {len(RARE_TERMS)})::int] ELSE '' END"
+    connection.execute(text(f"""
+        WITH seed_users AS (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM users WHERE email LIKE 'search-seed-' || :tag || '-%'
+        )
+        INSERT INTO transcriptions (user_id, patient_id, filename, transcription, confidence_score, status, created_at)
+        SELECT u.id, 'PT-' || lpad((g % 100000)::text, 5, '0'), :filename,
+               {random_words.format(words=words, size=len(VOCABULARY), count=150, correlation="g")} || {rare},
+               80, 'complete', now() - g * interval '1 minute'
+        FROM generate_series(1, :transcriptions) g
+        JOIN seed_users u ON u.n = g % :users
+    """), {
+        "tag": tag, "users": users, "transcriptions": transcriptions, "filename": SEED_FILENAME,
+        "vocabulary": list(VOCABULARY), "rare": list(RARE_TERMS),
+    })
+    section = lambda count: random_words.format(words=words, size=len(VOCABULARY), count=count, correlation="t.id")  # noqa: E731
+    connection.execute(text(f"""
+        INSERT INTO soap_notes (transcription_id, subjective, objective, assessment, plan, source)
+        SELECT t.id, {section(40)}, {section(25)}, {section(12)} || {rare}, {section(20)}, 'seed'
+        FROM transcriptions t WHERE t.filename = :filename
+    """), {"filename": SEED_FILENAME, "vocabulary": list(VOCABULARY), "rare": list(RARE_TERMS)})
+
+
+def _cleanup(connection) -> None:
+    seeded = "SELECT id FROM transcriptions WHERE filename = :filename"
+    connection.execute(text(f"DELETE FROM soap_notes WHERE transcription_id IN ({seeded})"), {"filename": SEED_FILENAME})
+    connection.execute(text("DELETE FROM transcriptions WHERE filename = :filename"), {"filename": SEED_FILENAME})
+    connection.execute(text("DELETE FROM users WHERE email LIKE 'search-seed-%'"))
+    print("Seeded data removed.")
+
+
+def _uses_search_index(connection, parameters: dict) -> bool:
+    plan = connection.execute(
+        text(f"EXPLAIN (FORMAT JSON) {history_search._SEARCH_SQL.text}"), parameters,
+    ).scalar()
+    return any(name in json.dumps(plan) for name in SEARCH_INDEXES)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _time_search(user_id: int, query: str, limit: int, runs: int, cursor=None) -> tuple[list[float], dict]:
+    timings, page = [], {}
+    with SessionLocal() as db:
+        for _ in range(runs):
+            started_at = time.perf_counter()
+            page = history_search.search(db, user_id, query, limit, cursor)
+            timings.append((time.perf_counter() - started_at) * 1000)
+    return timings, page
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true", help="delete seeded data at the end")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transcriptions", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20, help="search page size")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit(f"PostgreSQL only (DATABASE_URL uses {engine.dialect.name}).")
+
+    history_search.ensure_search_columns(engine)
+
+    if args.seed:
+        with engine.begin() as connection:
+            _seed(connection, args.users, args.transcriptions)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE users, transcriptions, soap_notes"))
+
+    try:
+        with engine.connect() as connection:
+            user_id = connection.execute(text(
+                "SELECT user_id FROM transcriptions GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+            )).scalar()
+            if user_id is None:
+                raise SystemExit("No transcriptions in the database; run with --seed.")
+            documents = connection.execute(
+                text("SELECT count(*) FROM transcriptions WHERE user_id = :user_id"), {"user_id": user_id},
+            ).scalar()
+
+            print(f"user {user_id}: {documents} transcriptions, page size {args.limit}, {args.runs} runs")
+            print(f"{'query':<34}{'matches':>9}{'p50 ms':>9}{'p95 ms':>9}{'next p50':>10}{'next p95':>10}{'GIN':>6}")
+            for query in QUERIES:
+                matches = connection.execute(text("""
+                    SELECT count(*) FROM transcriptions t LEFT JOIN soap_notes s ON s.transcription_id = t.id
+                    WHERE t.user_id = :user_id
+                      AND (t.search_vector @@ websearch_to_tsquery('english', :q)
+                           OR s.search_vector @@ websearch_to_tsquery('english', :q))
+                """), {"user_id": user_id, "q": query}).scalar()
+                uses_index = _uses_search_index(connection, {
+                    "q": query, "pattern": history_search._like_pattern(query), "user_id": user_id,
+                    "limit": args.limit + 1, "cursor_rank": None, "cursor_id": None,
+                })
+
+                first, page = _time_search(user_id, query, args.limit, args.runs)
+                cells = f"{statistics.median(first):>9.1f}{_percentile(first, 0.95):>9.1f}"
+                if page["next_cursor"]:
+                    cursor = history_search.decode_cursor(page["next_cursor"])
+                    following, _ = _time_search(user_id, query, args.limit, args.runs, cursor)
+                    cells += f"{statistics.median(following):>10.1f}{_percentile(following, 0.95):>10.1f}"
+                else:
+                    cells += f"{'-':>10}{'-':>10}"
+                print(f"{query:<34}{matches:>9}{cells}{'yes' if uses_index else 'no':>6}")
+    finally:
+        if args.cleanup:
+            with engine.begin() as connection:
+                _cleanup(connection)
+
+
+if __name__ == "__main__":
+    main()
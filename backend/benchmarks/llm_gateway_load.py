@@ -0,0 +1,83 @@
+"""
+Load test for llm_gateway: fire N concurrent completions and report how the
+gateway paces them.
+
+Prints throughput, retries (by reason), time spent waiting on the local rate
+limiters, and p50 / p95 / max latency per call. Against the fake server the
+expected shape is: no 429 retries once GROQ_REQUESTS_PER_MINUTE and
+GROQ_TOKENS_PER_MINUTE match the server's limits, and latency growing with
+queueing instead of errors.
+
+Usage:
+
+    python benchmarks/fake_groq_server.py --rpm 30 --tpm 12000 &
+    GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_KEY=fake \\
+        python benchmarks/llm_gateway_load.py --calls 40 --stream-ratio 0.5
+
+Run from backend/ so the gateway module is importable. Set
+GROQ_REQUESTS_PER_MINUTE above the server's limit to watch 429s and backoff.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import metrics  # noqa: E402
+from llm_gateway import gateway  # noqa: E402
+
+PROMPT = [
+    {"role": "system", "content": "You are a clinical documentation assistant. Return ONLY valid JSON."},
+    {"role": "user", "content": "Transcript:\n" + "Patient reports cough and fever for three days. " * 20},
+]
+
+
+async def _call(index: int, stream: bool) -> tuple[float, bool]:
+    started_at = time.perf_counter()
+    try:
+        await gateway.complete(
+            "load_test",
+            PROMPT,
+            temperature=0.1,
+            max_tokens=300,
+            on_delta=(lambda delta: None) if stream else None,
+        )
+        return time.perf_counter() - started_at, True
+    except Exception as exc:
+        print(f"  call {index} failed: {exc}")
+        return time.perf_counter() - started_at, False
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--stream-ratio", type=float, default=0.0, help="Fraction of calls that stream")
+    args = parser.parse_args()
+
+    streamed = int(args.calls * args.stream_ratio)
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(_call(i, i < streamed) for i in range(args.calls)))
+    wall = time.perf_counter() - started_at
+
+    latencies = sorted(duration for duration, _ in results)
+    succeeded = sum(1 for _, ok in results if ok)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"\n{succeeded}/{args.calls} calls succeeded in {wall:.1f}s ({succeeded / wall * 60:.1f} calls/min)")
+    print(f"latency p50 {statistics.median(latencies):.2f}s  p95 {p95:.2f}s  max {latencies[-1]:.2f}s")
+
+    snapshot = metrics.snapshot()
+    for key, value in sorted(snapshot["counters"].items()):
+        if key.startswith(("llm_requests_total", "llm_retries_total")):
+            print(f"{key} = {value:g}")
+    for key, summary in sorted(snapshot["summaries"].items()):
+        if key.startswith("llm_rate_limit_wait_seconds"):
+            print(f"{key}: count {summary['count']:g}, avg {summary['avg']:.2f}s, max {summary['max']:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+"""
+Persistence benchmark: time to save one transcription with 10, 100 and 1,000
+entities, using the previous per-entity ORM path and the bulk path
+(persistence.py).
+
+Runs directly against DATABASE_URL (e.g. the local Postgres from
+./scripts/dev-db.sh). The rows are written under a throwaway user, and the
+user and its rows are deleted at the end. Reports p50 / p95 of the
+insert + commit time per entity count.
+
+Usage (from backend/):
+
+    python benchmarks/persistence_benchmark.py --runs 20
+    python benchmarks/persistence_benchmark.py --entities 10 100 1000 5000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+import models  # noqa: E402
+import persistence  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+_SOAP_NOTE = {
+    "subjective": "Chest pain for two days, worse on exertion.",
+    "objective": "BP 138/86, HR 92.",
+    "assessment": "Possible stable angina.",
+    "plan": "ECG, troponin, review in one week.",
+    "source": "benchmark",
+    "quality_report": {"score": 0.9},
+    "quality_score": 0.9,
+    "style_profile": {"preset": "balanced"},
+}
+
+
+def _entities(count: int) -> list[dict]:
+    labels = ("SYMPTOM", "DISEASE", "CHEMICAL", "TEST", "PROCEDURE")
+    return [
+        {
+            "text": f"entity {index}",
+            "label": labels[index % len(labels)],
+            "confidence": 0.9,
+            "start": index * 10,
+            "end": index * 10 + 8,
+            "category": "symptom",
+        }
+        for index in range(count)
+    ]
+
+
+def _transcription(user_id: int) -> dict:
+    return {
+        "user_id": user_id,
+        "patient_id": "PT-00000",
+        "filename": "benchmark.wav",
+        "transcription": "benchmark " * 200,
+        "confidence_score": 90.0,
+        "duration": "2:00",
+        "status": "complete",
+        "encounter_type": "general",
+        "clinical_representation": {"symptoms": ["chest pain"]},
+    }
+
+
+def _save_orm(db, user_id: int, entities: list[dict]) -> None:
+    """The previous implementation: one db.add() per entity."""
+    record = models.Transcription(**_transcription(user_id))
+    db.add(record)
+    db.flush()
+    for ent in entities:
+        db.add(models.MedicalEntity(transcription_id=record.id, **ent))
+    db.add(models.SoapNote(transcription_id=record.id, **_SOAP_NOTE))
+    db.commit()
+
+
+def _save_bulk(db, user_id: int, entities: list[dict]) -> None:
+    persistence.insert_transcription_bundle(db, _transcription(user_id), _SOAP_NOTE, persistence.entity_rows(entities))
+    db.commit()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = models.User(
+            email=f"bench-{uuid.uuid4().hex[:10]}@example.com",
+            hashed_password="-",
+            first_name="Bench",
+            last_name="Runner",
+        )
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    print(f"dialect={engine.dialect.name} runs={args.runs}")
+    print(f"{'entities':>9}{'path':>6}{'p50 ms':>10}{'p95 ms':>10}{'speed-up':>10}")
+    try:
+        for count in args.entities:
+            entities = _entities(count)
+            medians = {}
+            for name, save in (("orm", _save_orm), ("bulk", _save_bulk)):
+                timings = []
+                for _ in range(args.runs):
+                    with SessionLocal() as db:
+                        started_at = time.perf_counter()
+                        save(db, user_id, entities)
+                        timings.append((time.perf_counter() - started_at) * 1000)
+                medians[name] = statistics.median(timings)
+                speed_up = f"{medians['orm'] / medians[name]:.1f}x" if name == "bulk" else ""
+                print(f"{count:>9}{name:>6}{medians[name]:>10.1f}{_percentile(timings, 0.95):>10.1f}{speed_up:>10}")
+    finally:
+        with SessionLocal() as db:
+            db.delete(db.get(models.User, user_id))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
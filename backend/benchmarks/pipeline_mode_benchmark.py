@@ -0,0 +1,108 @@
+"""
+Pipeline mode benchmark: end-to-end latency of /api/transcribe per mode.
+
+Uploads the same reference recording --runs times for each pipeline mode and
+prints p50 / p95 / max of the total processing time, plus the median of each
+stage from the response's `stage_timings`. The "fast" mode should land in
+low single-digit seconds on a 1-2 minute consultation; "thorough" is bounded
+by Groq round trips.
+
+Usage (server already running with the stage cache disabled, otherwise every
+run after the first is a cache hit):
+
+    STAGE_CACHE_MAX_ENTRIES=0 ./scripts/dev-backend.sh
+    python benchmarks/pipeline_mode_benchmark.py path/to/consultation.wav \\
+        --base-url http://localhost:8000 --runs 5 --modes fast balanced thorough
+
+A throwaway account is registered for the run unless --email/--password are
+given.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+STAGES = ("transcription", "normalization", "validation", "entities", "clinical_representation", "soap", "persistence")
+
+
+async def _authenticate(client: httpx.AsyncClient, email: str | None, password: str | None) -> str:
+    if email and password:
+        response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    else:
+        response = await client.post("/api/auth/register", json={
+            "email": f"bench-{uuid.uuid4().hex[:10]}@example.com",
+            "password": uuid.uuid4().hex,
+            "first_name": "Bench",
+            "last_name": "Runner",
+        })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _transcribe(client: httpx.AsyncClient, audio: Path, encounter_type: str, mode: str) -> dict:
+    started_at = time.perf_counter()
+    with audio.open("rb") as handle:
+        response = await client.post(
+            "/api/transcribe",
+            files={"file": (audio.name, handle)},
+            data={"encounter_type": encounter_type, "pipeline_mode": mode},
+            timeout=None,
+        )
+    response.raise_for_status()
+    body = response.json()
+    body["wall_seconds"] = time.perf_counter() - started_at
+    return body
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _report(mode: str, results: list[dict]) -> None:
+    totals = [result["processing_time"] for result in results]
+    walls = [result["wall_seconds"] for result in results]
+    print(f"\n{mode} ({len(results)} runs)")
+    print(f"  processing  p50 {statistics.median(totals):6.2f}s  p95 {_percentile(totals, 0.95):6.2f}s  max {max(totals):6.2f}s")
+    print(f"  wall        p50 {statistics.median(walls):6.2f}s  p95 {_percentile(walls, 0.95):6.2f}s  max {max(walls):6.2f}s")
+    for stage in STAGES:
+        values = [result.get("stage_timings", {}).get(stage) for result in results]
+        values = [value for value in values if value is not None]
+        if values:
+            print(f"  {stage:<24}p50 {statistics.median(values):6.2f}s  p95 {_percentile(values, 0.95):6.2f}s")
+    sources = {result.get("soap_note", {}).get("source") for result in results}
+    print(f"  SOAP source: {', '.join(sorted(str(source) for source in sources))}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", type=Path, help="Reference recording (45s or longer)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--runs", type=int, default=5, help="Sequential runs per mode")
+    parser.add_argument("--modes", nargs="+", default=["fast", "balanced", "thorough"])
+    parser.add_argument("--encounter-type", default="acute_visit")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0) as client:
+        token = await _authenticate(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        for mode in args.modes:
+            # One warm-up run so model loading is not counted.
+            await _transcribe(client, args.audio, args.encounter_type, mode)
+            results = []
+            for _ in range(args.runs):
+                results.append(await _transcribe(client, args.audio, args.encounter_type, mode))
+            _report(mode, results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
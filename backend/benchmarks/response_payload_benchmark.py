@@ -0,0 +1,176 @@
+"""
+Response payload benchmark: serialization time and bytes on the wire for a
+/api/transcribe response and a GET /api/history/{id} response.
+
+Builds a synthetic long encounter: a --words word transcript, --entities
+entities spread over the categories, a clinical representation and a SOAP
+note. Then it measures:
+
+- serialization: what FastAPI did before for each endpoint against
+  ORJSONResponse.
+  - transcribe: jsonable_encoder() plus JSONResponse, against returning
+    ORJSONResponse directly.
+  - history detail: the response_model is validated and dumped either way;
+    only the final encoder changes.
+- bytes: full and ?compact=true transcribe bodies, uncompressed and as
+  http_compression.py sends them (gzip, and Brotli if installed).
+
+No database or models needed.
+
+Usage (from backend/):
+
+    python benchmarks/response_payload_benchmark.py --words 3000 --entities 150
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+
+import http_compression  # noqa: E402
+import schemas  # noqa: E402
+
+_CATEGORIES = ("symptoms", "medications", "conditions", "procedures", "anatomical", "clinical_terms")
+_WORDS = (
+    "patient reports chest pain shortness of breath since yesterday denies fever takes metformin "
+    "lisinopril blood pressure elevated heart rate regular lungs clear plan follow up in two weeks"
+).split()
+
+
+def _payloads(words: int, entities: int) -> tuple[dict, dict]:
+    rng = random.Random(7)
+    transcript = " ".join(rng.choice(_WORDS) for _ in range(words))
+    entity_list = [
+        {
+            "text": rng.choice(_WORDS),
+            "label": "ENTITY",
+            "confidence": round(rng.random(), 4),
+            "start": index * 20,
+            "end": index * 20 + 8,
+            "category": _CATEGORIES[index % len(_CATEGORIES)].rstrip("s"),
+        }
+        for index in range(entities)
+    ]
+    categorized = {category: [] for category in _CATEGORIES}
+    for index, entity in enumerate(entity_list):
+        categorized[_CATEGORIES[index % len(_CATEGORIES)]].append(entity)
+    section = " ".join(rng.choice(_WORDS) for _ in range(words // 20))
+    soap_note = {
+        "subjective": section, "objective": section, "assessment": section, "plan": section,
+        "source": "llm",
+        "quality_report": {"overall_score": 8.4, "checks": [{"name": f"check {n}", "passed": True} for n in range(12)]},
+        "quality_score": 8.4,
+    }
+    clinical_representation = {
+        "encounter": {"type": "acute"},
+        "findings": [{"text": entity["text"], "category": entity["category"]} for entity in entity_list[:entities // 2]],
+    }
+    transcribe = {
+        "success": True,
+        "job_id": "0" * 32,
+        "filename": "encounter.wav",
+        "transcription": transcript,
+        "validation": {"is_valid": True, "confidence_score": 0.87, "reason": ""},
+        "entities": {
+            "total": entities,
+            "breakdown": {category: len(items) for category, items in categorized.items()},
+            "categorized": categorized,
+            "all_entities": entity_list,
+        },
+        "soap_note": soap_note,
+        "soap_note_text": "\n\n".join(soap_note[key] for key in ("subjective", "objective", "assessment", "plan")),
+        "clinical_representation": clinical_representation,
+        "quality_report": soap_note["quality_report"],
+        "quality_score": soap_note["quality_score"],
+        "transcription_segments": [
+            {"start": float(n), "end": float(n + 1), "text": section[:80], "avg_logprob": -0.2}
+            for n in range(words // 25)
+        ],
+        "stage_timings": {"transcription": 12.1, "entities": 0.8, "soap": 6.3},
+        "processing_time": 21.4,
+        "db_id": 1,
+    }
+    history_entry = {
+        "id": 1,
+        "patient_id": "PT-00001",
+        "filename": "encounter.wav",
+        "transcription": transcript,
+        "confidence_score": 87.0,
+        "duration": "20:00",
+        "status": "complete",
+        "created_at": datetime.now(timezone.utc),
+        "encounter_type": "acute",
+        "clinical_representation": clinical_representation,
+        "entities": entity_list,
+        "soap_note": soap_note,
+    }
+    return transcribe, history_entry
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=3000, help="transcript length")
+    parser.add_argument("--entities", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    transcribe, history_entry = _payloads(args.words, args.entities)
+    compact = {**transcribe, "entities": {k: v for k, v in transcribe["entities"].items() if k != "all_entities"}}
+
+    def history_content():
+        # What FastAPI does with response_model before handing off to the response class.
+        return schemas.HistoryEntryOut.model_validate(history_entry).model_dump(mode="json")
+
+    dumped_entry = history_content()
+    print(f"words={args.words} entities={args.entities} repeat={args.repeat}")
+    print(f"\n{'serialization':<32}{'before ms':>10}{'orjson ms':>10}{'speed-up':>10}")
+    for label, before, after in (
+        ("transcribe", lambda: JSONResponse(jsonable_encoder(transcribe)),
+         lambda: ORJSONResponse(transcribe)),
+        ("history detail", lambda: JSONResponse(history_content()),
+         lambda: ORJSONResponse(history_content())),
+        ("history detail (encoder only)", lambda: JSONResponse(dumped_entry),
+         lambda: ORJSONResponse(dumped_entry)),
+    ):
+        before_ms, after_ms = _median_ms(before, args.repeat), _median_ms(after, args.repeat)
+        print(f"{label:<32}{before_ms:>10.2f}{after_ms:>10.2f}{before_ms / after_ms:>9.1f}x")
+
+    encodings = ["gzip"] + (["br"] if http_compression.brotli is not None else [])
+    print(f"\n{'bytes':<32}{'raw':>10}" + "".join(f"{encoding:>10}" for encoding in encodings)
+          + "".join(f"{encoding + ' ms':>10}" for encoding in encodings))
+    for label, content in (
+        ("transcribe", transcribe),
+        ("transcribe ?compact=true", compact),
+        ("history detail", dumped_entry),
+    ):
+        body = ORJSONResponse(content).body
+        sizes, timings = [], []
+        for encoding in encodings:
+            sizes.append(len(http_compression.compress(body, encoding)))
+            timings.append(_median_ms(lambda: http_compression.compress(body, encoding), args.repeat))
+        print(f"{label:<32}{len(body):>10}" + "".join(f"{size:>10}" for size in sizes)
+              + "".join(f"{ms:>10.2f}" for ms in timings))
+    if http_compression.brotli is None:
+        print("(brotli not installed: gzip only)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Startup schema benchmark: the time and SQL statements the API spends on
+the schema before it can serve, for each SCHEMA_STARTUP mode
+(schema_startup.py).
+
+"create" is what main.py used to do at import time: create_all() plus the
+added-column, added-index and search-column fallbacks. "check" reads
+alembic_version once. Each run uses a fresh engine without a pool, as a new
+worker or a --reload would, so connecting is included.
+
+To mimic a remote database, connections go through a local TCP proxy that
+delays every server-to-client chunk by --latency-ms. That adds roughly one
+delay to each round-trip. The proxy needs a networked database (PostgreSQL).
+With SQLite only the statement counts mean anything.
+
+The database must already be at the Alembic head, or "check" fails.
+"create" is idempotent there.
+
+Usage (from backend/):
+
+    alembic -c alembic.ini upgrade head
+    python benchmarks/startup_schema_benchmark.py --latency-ms 0 20 50
+"""
+from __future__ import annotations
+
+import argparse
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+import schema_startup  # noqa: E402
+from database import DATABASE_URL  # noqa: E402
+
+
+class LatencyProxy:
+    """Forwards 127.0.0.1:<port> to the database, delaying its replies."""
+
+    def __init__(self, host: str, port: int, latency_ms: float):
+        self._target = (host, port)
+        self._delay = latency_ms / 1000
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            server = socket.create_connection(self._target)
+            for sock in (client, server):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(client, server, 0), daemon=True).start()
+            threading.Thread(target=self._pump, args=(server, client, self._delay), daemon=True).start()
+
+    @staticmethod
+    def _pump(source: socket.socket, destination: socket.socket, delay: float) -> None:
+        try:
+            while chunk := source.recv(65536):
+                if delay:
+                    time.sleep(delay)
+                destination.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, destination):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        self._listener.close()
+
+
+def _startup(url, mode: str) -> tuple[float, int]:
+    engine = create_engine(url, poolclass=NullPool)
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        started_at = time.perf_counter()
+        schema_startup.prepare(engine, mode)
+        return (time.perf_counter() - started_at) * 1000, statements[0]
+    finally:
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0, 20, 50])
+    parser.add_argument("--runs", type=int, default=5, help="startups per mode and latency")
+    parser.add_argument("--modes", nargs="+", default=["create", "check"], choices=["create", "check"])
+    args = parser.parse_args()
+
+    url = make_url(DATABASE_URL)
+    networked = url.host is not None
+    if not networked:
+        print(f"{url.get_backend_name()} has no network round-trips: only the statement counts are meaningful")
+        args.latency_ms = [0]
+
+    # head_revision() parses the migration scripts once; later calls are cached.
+    print(f"dialect={url.get_backend_name()} runs={args.runs} head={schema_startup.head_revision()}")
+    print(f"{'latency ms':>10}{'mode':>8}{'statements':>12}{'p50 ms':>10}{'max ms':>10}")
+    for latency_ms in args.latency_ms:
+        proxy = None
+        run_url = url
+        if networked and latency_ms:
+            proxy = LatencyProxy(url.host, url.port or 5432, latency_ms)
+            run_url = url.set(host="127.0.0.1", port=proxy.port)
+        try:
+            for mode in args.modes:
+                results = [_startup(run_url, mode) for _ in range(args.runs)]
+                timings = [elapsed for elapsed, _ in results]
+                print(
+                    f"{latency_ms:>10.0f}{mode:>8}{results[-1][1]:>12}"
+                    f"{statistics.median(timings):>10.1f}{max(timings):>10.1f}"
+                )
+        finally:
+            if proxy is not None:
+                proxy.close()
+
+
+if __name__ == "__main__":
+    main()
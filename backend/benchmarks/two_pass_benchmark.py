@@ -0,0 +1,123 @@
+"""
+Two-pass decoding benchmark: decode time and word error rate with the
+confidence-guided cascade on and off.
+
+For each audio file, decodes once with plain beam search and once with the
+two-pass cascade (greedy pass, beam search only on low-confidence segments)
+and prints decode time, real-time factor, how many segments were re-decoded
+and, when a reference transcript is available, WER for both.
+
+Reference transcripts are optional plain-text files next to the audio with
+the same stem and a .txt extension.
+
+By default pass one runs a model one size below --model (base.en -> tiny.en;
+see WHISPER_FIRST_PASS_MODEL in transcription.py). That is where most of the
+speed-up comes from. It is also the WER risk: a segment the small model gets
+wrong with high confidence is never re-decoded. So run this against
+reference transcripts of hard audio and compare the two WER columns. Pass
+--first-pass-model "" to measure the cascade with the same model in both
+passes (the opt-out).
+
+Usage (from backend/):
+
+    python benchmarks/two_pass_benchmark.py recordings/*.wav --beam-size 3
+    python benchmarks/two_pass_benchmark.py recordings/*.wav --model small.en --first-pass-model tiny.en
+    python benchmarks/two_pass_benchmark.py recordings/*.wav --first-pass-model ""
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import transcription  # noqa: E402
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _decode(audio: Path, model: str, beam_size: int, two_pass: bool) -> dict:
+    transcription.WHISPER_TWO_PASS = two_pass
+    result = transcription.transcribe_audio(str(audio), model_name=model, beam_size=beam_size)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", type=Path, nargs="+")
+    parser.add_argument("--model", default=transcription.WHISPER_MODEL)
+    parser.add_argument("--beam-size", type=int, default=max(2, transcription.WHISPER_BEAM_SIZE))
+    parser.add_argument(
+        "--first-pass-model",
+        default=transcription.WHISPER_FIRST_PASS_MODEL,
+        help='"auto", a model name, or "" for the same model as --model',
+    )
+    args = parser.parse_args()
+
+    transcription.WHISPER_FIRST_PASS_MODEL = args.first_pass_model
+    first_pass = transcription.first_pass_model(args.model)
+    transcription.load_transcription_model(args.model)
+    transcription.load_transcription_model(first_pass)
+
+    totals = {"single": [0.0, 0.0], "two_pass": [0.0, 0.0]}
+    rows = []
+    for audio in args.audio:
+        reference_path = audio.with_suffix(".txt")
+        reference = reference_path.read_text() if reference_path.exists() else None
+        single = _decode(audio, args.model, args.beam_size, two_pass=False)
+        cascade = _decode(audio, args.model, args.beam_size, two_pass=True)
+        duration = single["duration"] or 0.0
+        for name, result in (("single", single), ("two_pass", cascade)):
+            totals[name][0] += result["decode_seconds"]
+            totals[name][1] += duration
+        rows.append((
+            audio.name,
+            duration,
+            single["decode_seconds"],
+            cascade["decode_seconds"],
+            cascade["two_pass"]["refined_segments"],
+            cascade["two_pass"]["segments"],
+            word_error_rate(reference, single["text"]) if reference else None,
+            word_error_rate(reference, cascade["text"]) if reference else None,
+        ))
+
+    print(f"\nmodel={args.model} beam_size={args.beam_size} first_pass={first_pass}")
+    print(f"{'file':<28}{'audio s':>9}{'beam s':>9}{'2-pass s':>10}{'refined':>10}{'WER beam':>10}{'WER 2p':>9}")
+    for name, duration, single_s, cascade_s, refined, segments, wer_single, wer_cascade in rows:
+        wer_columns = (
+            f"{wer_single:>10.3f}{wer_cascade:>9.3f}" if wer_single is not None else f"{'-':>10}{'-':>9}"
+        )
+        print(f"{name[:27]:<28}{duration:>9.1f}{single_s:>9.2f}{cascade_s:>10.2f}{f'{refined}/{segments}':>10}{wer_columns}")
+
+    for name, (decode, audio_seconds) in totals.items():
+        if audio_seconds:
+            print(f"{name:<9} RTF {decode / audio_seconds:.3f}  ({audio_seconds / decode:.1f}x real time)")
+    if totals["two_pass"][0]:
+        print(f"speed-up: {totals['single'][0] / totals['two_pass'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# circuit_breaker.py
+# Process-wide circuit breaker for the Groq path.
+#
+# Why?
+# Every LLM stage already falls back to a rule-based path when Groq fails, but
+# only after the failure: during an outage each request still waits for the
+# extraction call, the SOAP call and every section repair call to time out or
+# exhaust their retries. The breaker remembers recent failures instead:
+# - closed: calls go through. Failures (5xx, timeouts, connection errors) are
+#   counted in a sliding window; LLM_CIRCUIT_FAILURE_THRESHOLD of them within
+#   LLM_CIRCUIT_WINDOW_SECONDS opens the circuit.
+# - open: calls are rejected immediately with CircuitOpenError, which the
+#   stages treat like any other Groq failure and fall back to rules at once.
+# - half-open: after LLM_CIRCUIT_OPEN_SECONDS, up to LLM_CIRCUIT_HALF_OPEN_PROBES
+#   calls are let through as probes. One success closes the circuit; a failure
+#   opens it again for another full period.
+#
+# 429s do not count: a rate-limited Groq is healthy, and llm_gateway paces
+# itself against the quota. The state is guarded by a threading lock so it can
+# be read from sync endpoints (GET /ready) as well as the event loop.
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_WINDOW_SECONDS = float(os.getenv("LLM_CIRCUIT_WINDOW_SECONDS", "60"))
+LLM_CIRCUIT_OPEN_SECONDS = float(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30"))
+LLM_CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("LLM_CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+        window_seconds: float = LLM_CIRCUIT_WINDOW_SECONDS,
+        open_seconds: float = LLM_CIRCUIT_OPEN_SECONDS,
+        half_open_probes: int = LLM_CIRCUIT_HALF_OPEN_PROBES,
+    ):
+        self.name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._window_seconds = window_seconds
+        self._open_seconds = open_seconds
+        self._half_open_probes = max(1, half_open_probes)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures: deque[float] = deque()
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._last_failure: str | None = None
+
+    def before_call(self) -> None:
+        """
+        Reserve permission for one call, or raise CircuitOpenError. Every call
+        that gets through must be followed by record_success() or
+        record_failure() (or release() if it ended for an unrelated reason).
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+                self._transition(HALF_OPEN)
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._probes_in_flight < self._half_open_probes:
+                self._probes_in_flight += 1
+                return
+            state = self._state
+        metrics.increment("llm_circuit_rejections_total", circuit=self.name)
+        raise CircuitOpenError(f"{self.name} circuit is {state}; using the rule-based path")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._failures.clear()
+                self._transition(CLOSED)
+
+    def record_failure(self, reason: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_failure = reason
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self._window_seconds:
+                self._failures.popleft()
+            if len(self._failures) >= self._failure_threshold:
+                self._open(now)
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without judging the outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def snapshot(self) -> dict:
+        """State for GET /ready and GET /metrics."""
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for failed_at in self._failures if now - failed_at <= self._window_seconds)
+            retry_in = self._open_seconds - (now - self._opened_at) if self._state == OPEN else 0.0
+            return {
+                "state": HALF_OPEN if self._state == OPEN and retry_in <= 0 else self._state,
+                "recent_failures": recent,
+                "failure_threshold": self._failure_threshold,
+                "window_seconds": self._window_seconds,
+                "retry_in_seconds": round(max(0.0, retry_in), 1),
+                "last_failure": self._last_failure,
+            }
+
+    def _open(self, now: float) -> None:
+        self._opened_at = now
+        self._failures.clear()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        previous, self._state = self._state, state
+        if state != HALF_OPEN:
+            self._probes_in_flight = 0
+        metrics.increment("llm_circuit_transitions_total", circuit=self.name, to=state)
+        print(f"Circuit {self.name}: {previous} -> {state}")
+
+
+groq_circuit = CircuitBreaker("groq")
@@ -7,19 +7,18 @@ instead of raw conversational text alone.
 """
 from __future__ import annotations
 
+import asyncio
+import copy
 import json
-import os
 import re
 from datetime import datetime
 
 from dotenv import load_dotenv
 
-load_dotenv()
+from llm_gateway import gateway
+from prompt_budget import build_budgeted_message
 
-try:
-    from groq import Groq
-except ImportError:  # pragma: no cover
-    Groq = None  # type: ignore
+load_dotenv()
 
 
 MONTH_NAME_TO_NUMBER = {
@@ -36,55 +35,94 @@ MONTH_NAME_TO_NUMBER = {
     "november": 11,
     "december": 12,
 }
-def extract_clinical_representation(
+async def extract_clinical_representation(
     transcription: str,
     categorized_entities: dict,
     encounter_type: str | None = None,
+    use_llm: bool = True,
 ) -> dict:
     """
     Return a normalized intermediate clinical representation.
 
     Prefer LLM extraction when available, but always fall back to local
     heuristics so the pipeline keeps working without network/API access.
+    The Groq call is awaited through the LLM gateway; the heuristic passes
+    run in a worker thread. use_llm=False goes straight to the heuristics.
     """
+    if not use_llm:
+        rep = await asyncio.to_thread(_extract_with_rules_representation, transcription, categorized_entities, encounter_type)
+        rep["extraction_source"] = "rules"
+        return rep
+
     try:
-        structured = _extract_with_groq(transcription, categorized_entities)
-        return _postprocess_representation(structured, transcription, categorized_entities, encounter_type)
+        structured = await _extract_with_groq(transcription, categorized_entities)
+        rep = await asyncio.to_thread(
+            _postprocess_representation, structured, transcription, categorized_entities, encounter_type,
+        )
+        rep["extraction_source"] = "groq"
+        return rep
     except Exception as exc:
         print(f"Structured extraction via Groq failed: {exc}")
-        return _postprocess_representation(
-            _extract_with_rules(transcription, categorized_entities),
-            transcription,
-            categorized_entities,
-            encounter_type,
-        )
+        rep = await asyncio.to_thread(_extract_with_rules_representation, transcription, categorized_entities, encounter_type)
+        rep["extraction_source"] = "rules"
+        return rep
 
 
-def _extract_with_groq(transcription: str, categorized_entities: dict) -> dict:
-    api_key = os.getenv("GROQ_API_KEY") or os.getenv("OPENAI_API_KEY")
-    if not api_key or Groq is None:
-        raise EnvironmentError("No Groq client/API key available for structured extraction.")
+def _extract_with_rules_representation(
+    transcription: str,
+    categorized_entities: dict,
+    encounter_type: str | None = None,
+) -> dict:
+    return _postprocess_representation(
+        _extract_with_rules(transcription, categorized_entities),
+        transcription,
+        categorized_entities,
+        encounter_type,
+    )
+
+
+def retarget_clinical_representation(
+    clinical_representation: dict,
+    transcription: str,
+    categorized_entities: dict,
+    encounter_type: str,
+) -> dict:
+    """
+    Re-run post-processing on a stored representation for a different
+    encounter type. No LLM call: used when a note is regenerated from
+    history with new overrides.
+    """
+    rep = copy.deepcopy(clinical_representation)
+    rep.setdefault("encounter", {})["type"] = None
+    return _postprocess_representation(rep, transcription, categorized_entities, encounter_type)
 
-    client = Groq(api_key=api_key)
+
+async def _extract_with_groq(transcription: str, categorized_entities: dict) -> dict:
     patient = _extract_patient_details(transcription)
-    user_message = (
-        f"Transcript:\n{transcription}\n\n"
-        f"Patient metadata:\n{json.dumps(patient, indent=2)}\n\n"
-        f"Categorized entities:\n{json.dumps(_compact_entities(categorized_entities), indent=2)}\n\n"
-        "Return the structured representation as JSON."
+    compact_entities = _compact_entities(categorized_entities)
+    user_message = build_budgeted_message(
+        "structured_extraction",
+        system_prompt=_STRUCTURED_EXTRACTION_PROMPT,
+        transcription=transcription,
+        entities=categorized_entities,
+        render=lambda transcript, dumps: (
+            f"Transcript:\n{transcript}\n\n"
+            f"Patient metadata:\n{dumps(patient)}\n\n"
+            f"Categorized entities:\n{dumps(compact_entities)}\n\n"
+            "Return the structured representation as JSON."
+        ),
     )
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
+    raw = await gateway.complete(
+        "structured_extraction",
+        [
             {"role": "system", "content": _STRUCTURED_EXTRACTION_PROMPT},
             {"role": "user", "content": user_message},
         ],
         temperature=0.1,
         max_tokens=1400,
     )
-
-    raw = response.choices[0].message.content.replace("```json", "").replace("```", "").strip()
+    raw = raw.replace("```json", "").replace("```", "").strip()
     return json.loads(raw)
 
 
@@ -0,0 +1,113 @@
+# cpu_budget.py
+# One CPU thread budget for every inference library in the pipeline.
+#
+# Why?
+# transcription.py used to give both torch and CTranslate2 os.cpu_count()
+# threads, and spaCy's BLAS and OpenMP pools sized themselves the same way.
+# With two overlapping jobs, each library in each worker was trying to use
+# every core. The host was oversubscribed several times over, and context
+# switching made both jobs slower than running them one after the other.
+#
+# The budget splits CPU_BUDGET_CORES between CPU_INFERENCE_SLOTS concurrent
+# inference jobs:
+# - Whisper (CTranslate2 cpu_threads, torch intra-op threads) gets
+#   cores // slots threads per job.
+# - spaCy NER and rapidfuzz run on short texts and get one BLAS/OpenMP
+#   thread; more only adds synchronisation overhead.
+# - At most CPU_INFERENCE_SLOTS jobs are in a model-inference stage
+#   (transcription, NER) at once. Further jobs wait for a slot, and the wait
+#   is exported as a metric.
+#
+# The CPU stage workers call apply_worker_limits() before importing any model
+# library, because OpenMP/BLAS read their thread counts at import time.
+# Per-stage overrides: CPU_THREADS_WHISPER, CPU_THREADS_NLP.
+# benchmarks/cpu_budget_matrix.py measures the best split for a host.
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import time
+
+import metrics
+from stage_executor import CPU_STAGE_WORKERS
+
+CPU_BUDGET_CORES = int(os.getenv("CPU_BUDGET_CORES") or os.cpu_count() or 1)
+CPU_INFERENCE_SLOTS = int(os.getenv("CPU_INFERENCE_SLOTS") or max(1, CPU_STAGE_WORKERS))
+
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def plan(cores: int = CPU_BUDGET_CORES, slots: int = CPU_INFERENCE_SLOTS) -> dict:
+    """Thread counts per stage for `slots` concurrent jobs on `cores` cores."""
+    slots = max(1, slots)
+    per_job = max(1, cores // slots)
+    return {
+        "cores": cores,
+        "inference_slots": slots,
+        "whisper": int(os.getenv("CPU_THREADS_WHISPER") or per_job),
+        "nlp": int(os.getenv("CPU_THREADS_NLP") or 1),
+    }
+
+
+def stage_threads(stage: str) -> int:
+    """Threads a library in `stage` ("whisper" or "nlp") may use."""
+    return plan()[stage]
+
+
+def apply_worker_limits() -> None:
+    """
+    Cap OpenMP/BLAS pools for this process. Must run before numpy, torch,
+    spaCy or CTranslate2 are imported; existing values win, so an operator
+    can still pin them explicitly.
+    """
+    threads = str(stage_threads("nlp"))
+    for name in _THREAD_ENV_VARS:
+        os.environ.setdefault(name, threads)
+
+
+class InferenceGovernor:
+    """Admission control for model-inference stages, in the API process."""
+
+    def __init__(self, slots: int = CPU_INFERENCE_SLOTS):
+        self.slots = max(1, slots)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._active = 0
+        self._waiting = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, stage: str):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.slots)
+        started_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started_at
+        metrics.observe("cpu_inference_slot_wait_seconds", waited, stage=stage)
+        if waited > 1:
+            print(f"CPU budget: {stage} waited {waited:.1f}s for an inference slot")
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        """Budget and slot usage, for GET /metrics."""
+        return {**plan(), "active": self._active, "waiting": self._waiting}
+
+
+governor = InferenceGovernor()
@@ -6,8 +6,31 @@
 # generator that yields one session per request and guarantees it is closed
 # when the request finishes — even if an exception occurs. This prevents
 # connection leaks under load.
+#
+# Pool sizing
+# The default QueuePool (5 connections + 10 overflow, no liveness check) ran
+# out under concurrent uploads, and connections dropped by the server or a
+# proxy surfaced as errors on the next request. Size, overflow, checkout
+# timeout, recycle age and pre-ping are now set from DB_POOL_* variables.
+# DB_POOL_SIZE + DB_MAX_OVERFLOW should be at least IO_STAGE_WORKERS plus the
+# number of concurrent sync requests.
+#
+# The async engine below has its own, separate pool (DB_ASYNC_POOL_SIZE +
+# DB_ASYNC_MAX_OVERFLOW). It only persists finished transcriptions, so it is
+# small by default. Each app process can open both pools in full:
+#   (DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW)
+#     x app processes  <  the server's max_connections
+# With the defaults that is 40 connections per process.
+#
+# Async engine
+# get_async_db() / AsyncSessionLocal give async endpoints a session on an
+# asyncpg connection, so database work can be awaited on the event loop
+# instead of parking a thread per call. The engine is created on first use,
+# and asyncpg is an optional dependency: async_engine_available() tells
+# callers whether to fall back to the sync engine.
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -24,9 +47,37 @@ if not DATABASE_URL:
         "Add it to your .env file for local development."
     )
 
-# connect_args is only needed for SQLite (not used here, but left as a comment
-# for reference). For PostgreSQL, no extra connect args are needed.
-engine = create_engine(DATABASE_URL)
+DB_POOL_SIZE     = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW  = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT  = float(os.getenv("DB_POOL_TIMEOUT", "10"))     # seconds to wait for a free connection
+DB_POOL_RECYCLE  = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # replace connections older than this (seconds)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_ASYNC_POOL_SIZE    = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+
+# Async drivers for each sync backend.
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _pool_options(url: URL, pool_size: int, max_overflow: int) -> dict:
+    # SQLite (local experiments only) keeps SQLAlchemy's defaults; its
+    # in-memory pool rejects these arguments.
+    if url.get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size":     pool_size,
+        "max_overflow":  max_overflow,
+        "pool_timeout":  DB_POOL_TIMEOUT,
+        "pool_recycle":  DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **_pool_options(make_url(DATABASE_URL), DB_POOL_SIZE, DB_MAX_OVERFLOW))
 
 # Each instance of SessionLocal is one database session.
 # autocommit=False means we control transactions explicitly (commit/rollback).
@@ -37,6 +88,88 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def async_database_url(url: str | URL) -> tuple[URL, dict]:
+    """
+    The async-driver equivalent of a sync DATABASE_URL, plus connect_args.
+    asyncpg does not understand libpq's ?sslmode=; it is passed as ssl=.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend}")
+    connect_args = {}
+    if backend == "postgresql" and "sslmode" in url.query:
+        connect_args["ssl"] = url.query["sslmode"]
+        url = url.difference_update_query(["sslmode"])
+    return url.set(drivername=_ASYNC_DRIVERS[backend]), connect_args
+
+
+_async_engine = None
+AsyncSessionLocal = None
+_async_engine_error: str | None = None
+
+
+def get_async_engine():
+    """The shared AsyncEngine, created on first use. Raises RuntimeError if unavailable."""
+    global _async_engine, AsyncSessionLocal, _async_engine_error
+    if _async_engine is not None:
+        return _async_engine
+    if _async_engine_error is not None:
+        raise RuntimeError(_async_engine_error)
+    if not DB_ASYNC_ENABLED:
+        _async_engine_error = "Async engine disabled (DB_ASYNC_ENABLED=false)"
+        raise RuntimeError(_async_engine_error)
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    try:
+        url, connect_args = async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(
+            url, connect_args=connect_args, **_pool_options(url, DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW),
+        )
+    except (ImportError, RuntimeError) as exc:
+        # e.g. asyncpg not installed: remember it, callers use the sync engine.
+        _async_engine_error = f"Async engine unavailable: {exc}"
+        print(_async_engine_error)
+        raise RuntimeError(_async_engine_error) from exc
+    # expire_on_commit=False: attributes stay readable after commit without
+    # an implicit (and, in async code, illegal) lazy refresh.
+    AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+def async_engine_available() -> bool:
+    try:
+        get_async_engine()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def dispose_async_engine() -> None:
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def new_async_session():
+    """An AsyncSession on the shared async engine; use as `async with`."""
+    get_async_engine()
+    return AsyncSessionLocal()
+
+
+async def get_async_db():
+    """
+    FastAPI dependency for async endpoints: yields an AsyncSession and closes
+    it after the request.
+
+        @app.get("/example")
+        async def example(db: AsyncSession = Depends(get_async_db)):
+            rows = (await db.execute(select(models.User))).scalars().all()
+    """
+    async with new_async_session() as db:
+        yield db
+
+
 def get_db():
     """
     FastAPI dependency. Yields a database session for the duration of one
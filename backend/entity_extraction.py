@@ -230,7 +230,7 @@ def filter_contextual_false_positives(entities, original_text):
     return filtered
 
 
-def extract_medical_entities(text):
+def extract_medical_entities(text, use_ner=True):
     """
     Extract and categorize medical entities from text using scispacy + dictionary scan.
 
@@ -253,6 +253,8 @@ def extract_medical_entities(text):
 
     Args:
         text (str): The transcribed medical text
+        use_ner (bool): Run Pass 1. The "fast" pipeline mode passes False to
+                        get a dictionary-only pass without the scispaCy model.
 
     Returns:
         dict: Extracted entities with categories
@@ -263,18 +265,19 @@ def extract_medical_entities(text):
 
     try:
         # ── Pass 1: NER model ─────────────────────────────────────────────────
-        doc = nlp(text)
-
         entities = []
-        for ent in doc.ents:
-            entities.append({
-                "text":  ent.text,
-                "label": ent.label_,
-                "start": ent.start_char,
-                "end":   ent.end_char,
-            })
-
-        print(f"Pass 1 (NER): {len(entities)} entities (CHEMICAL/DISEASE)")
+        if use_ner:
+            doc = nlp(text)
+            for ent in doc.ents:
+                entities.append({
+                    "text":  ent.text,
+                    "label": ent.label_,
+                    "start": ent.start_char,
+                    "end":   ent.end_char,
+                })
+            print(f"Pass 1 (NER): {len(entities)} entities (CHEMICAL/DISEASE)")
+        else:
+            print("Pass 1 (NER): skipped (dictionary-only)")
 
         if len(entities) > 1:
             print("Checking for compound medical terms (dynamic merge)...")
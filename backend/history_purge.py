@@ -0,0 +1,179 @@
+# history_purge.py
+# Set-based deletes for history and account removal.
+#
+# Why?
+# DELETE /api/history loaded every Transcription and db.delete()d each one,
+# and the ORM cascade then loaded and deleted every entity and SOAP note row
+# by row. DELETE /api/auth/me did the same for the whole user graph. At 10k
+# transcriptions (~200k entities) that is hundreds of thousands of
+# statements and ORM objects.
+#
+# Here each table is cleared with one DELETE ... WHERE. Child tables go
+# first, keyed through the indexed transcription_id / user_id columns. The
+# foreign keys are also ON DELETE CASCADE (Alembic 20261019_0007), which
+# covers any other delete path. The explicit child deletes keep this correct
+# where the database does not enforce foreign keys (SQLite).
+#
+# Accounts with more than PURGE_INLINE_LIMIT transcriptions are purged in
+# the background instead: the account is deactivated and its email released
+# at once, then purge_account() deletes PURGE_BATCH_SIZE transcriptions per
+# transaction, so no single transaction holds locks on the whole history.
+#
+# That background job is best effort: it dies with the process, and a failed
+# batch is only logged. An account marked for deletion keeps its medical data
+# until the purge finishes, so main.py also runs purge_pending_accounts() at
+# startup and every PURGE_SWEEP_INTERVAL_SECONDS. It re-runs purge_account()
+# for every deactivated account that still carries a deleted-* email.
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+import history_stats
+import metrics
+import models
+from database import SessionLocal
+
+PURGE_INLINE_LIMIT = int(os.getenv("HISTORY_PURGE_INLINE_LIMIT", "20000"))
+PURGE_BATCH_SIZE = int(os.getenv("HISTORY_PURGE_BATCH_SIZE", "5000"))
+PURGE_SWEEP_INTERVAL_SECONDS = float(os.getenv("HISTORY_PURGE_SWEEP_INTERVAL_SECONDS", "600"))
+
+# delete_account() gives accounts awaiting a background purge this address,
+# which is how purge_pending_accounts() finds them again.
+_DELETED_EMAIL_PREFIX = "deleted-"
+_DELETED_EMAIL_DOMAIN = "@deleted.invalid"
+
+# Accounts being purged in this process, so the sweep does not run a second
+# purge alongside the request's background task.
+_purging: set[int] = set()
+_purging_lock = threading.Lock()
+
+
+def _delete_transcriptions(db: Session, transcription_ids) -> int:
+    """Delete transcriptions (ids or an id subquery) and their children. Does not commit."""
+    db.execute(delete(models.MedicalEntity).where(models.MedicalEntity.transcription_id.in_(transcription_ids)))
+    db.execute(delete(models.SoapNote).where(models.SoapNote.transcription_id.in_(transcription_ids)))
+    return db.execute(
+        delete(models.Transcription).where(models.Transcription.id.in_(transcription_ids))
+    ).rowcount
+
+
+def delete_transcription(db: Session, record: models.Transcription) -> None:
+    """Delete one transcription and its children, updating stats. Does not commit."""
+    history_stats.forget_transcription(db, record)
+    _delete_transcriptions(db, [record.id])
+
+
+def delete_history(db: Session, user_id: int) -> int:
+    """Delete all of a user's transcriptions and reset their stats. Does not commit."""
+    owned = select(models.Transcription.id).where(models.Transcription.user_id == user_id)
+    deleted = _delete_transcriptions(db, owned)
+    history_stats.reset(db, user_id)
+    return deleted
+
+
+def _delete_user(db: Session, user_id: int) -> None:
+    db.execute(delete(models.UserDailyActivity).where(models.UserDailyActivity.user_id == user_id))
+    db.execute(delete(models.UserHistoryStats).where(models.UserHistoryStats.user_id == user_id))
+    db.execute(delete(models.User).where(models.User.id == user_id))
+
+
+def delete_account(db: Session, user: models.User) -> bool:
+    """
+    Delete the user and everything they own, committing. Returns False when
+    the account is too large to delete inline. In that case it is only
+    deactivated here, and the caller must schedule purge_account(user.id).
+    """
+    user_id = user.id
+    transcriptions = db.execute(
+        select(func.count()).select_from(models.Transcription).where(models.Transcription.user_id == user_id)
+    ).scalar_one()
+
+    if transcriptions > PURGE_INLINE_LIMIT:
+        # Locked out immediately (get_current_user rejects inactive users),
+        # and the email can be registered again before the purge finishes.
+        user.is_active = False
+        user.email = f"{_DELETED_EMAIL_PREFIX}{user_id}-{uuid.uuid4().hex}{_DELETED_EMAIL_DOMAIN}"
+        db.commit()
+        print(f"Account {user_id}: {transcriptions} transcriptions, purging in the background")
+        return False
+
+    _delete_transcriptions(db, select(models.Transcription.id).where(models.Transcription.user_id == user_id))
+    _delete_user(db, user_id)
+    db.commit()
+    return True
+
+
+def purge_account(user_id: int) -> bool:
+    """
+    Background job: delete a deactivated account in batches of
+    PURGE_BATCH_SIZE transcriptions, one transaction per batch. Safe to re-run
+    after an interruption. Returns False if the purge failed, or if it is
+    already running in this process.
+    """
+    with _purging_lock:
+        if user_id in _purging:
+            return False
+        _purging.add(user_id)
+    try:
+        return _purge_account(user_id)
+    finally:
+        with _purging_lock:
+            _purging.discard(user_id)
+
+
+def _purge_account(user_id: int) -> bool:
+    started_at = time.perf_counter()
+    deleted = 0
+    with SessionLocal() as db:
+        try:
+            while True:
+                batch = db.execute(
+                    select(models.Transcription.id)
+                    .where(models.Transcription.user_id == user_id)
+                    .limit(PURGE_BATCH_SIZE)
+                ).scalars().all()
+                if not batch:
+                    break
+                deleted += _delete_transcriptions(db, batch)
+                db.commit()
+            _delete_user(db, user_id)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            metrics.increment("account_purge_failures_total")
+            print(
+                f"Account {user_id}: background purge failed after {deleted} transcriptions, "
+                f"will be retried by the next sweep: {exc}"
+            )
+            return False
+
+    elapsed = time.perf_counter() - started_at
+    metrics.observe("account_purge_seconds", elapsed)
+    print(f"Account {user_id}: purged {deleted} transcriptions in {elapsed:.1f}s")
+    return True
+
+
+def pending_purges(db: Session) -> list[int]:
+    """Ids of accounts deactivated by delete_account() whose purge has not finished."""
+    return db.execute(
+        select(models.User.id)
+        .where(models.User.is_active.is_(False))
+        .where(models.User.email.like(f"{_DELETED_EMAIL_PREFIX}%{_DELETED_EMAIL_DOMAIN}"))
+        .order_by(models.User.id)
+    ).scalars().all()
+
+
+def purge_pending_accounts() -> int:
+    """Re-run purge_account() for every pending account. Returns how many finished."""
+    with SessionLocal() as db:
+        user_ids = pending_purges(db)
+    if user_ids:
+        print(f"Purge sweep: {len(user_ids)} account(s) pending deletion")
+    return sum(purge_account(user_id) for user_id in user_ids)
@@ -0,0 +1,197 @@
+# history_search.py
+# Full-text search over a user's transcripts and SOAP notes for
+# GET /api/history/search.
+#
+# Why?
+# HistoryPage.tsx filtered history in the browser, so every record had to be
+# downloaded before anything could be searched, and only patient IDs and
+# dates were searchable at all.
+#
+# On PostgreSQL (Alembic 20261019_0005):
+# - transcriptions.search_vector and soap_notes.search_vector are STORED
+#   generated tsvector columns. Postgres keeps them in sync on every
+#   insert/update; the app never writes them. SOAP sections are weighted
+#   (assessment A, subjective/plan B, objective C) so a hit in the assessment
+#   outranks one in the transcript body (D).
+# - Both have GIN indexes. Matching ids are collected with one index-backed
+#   query per table (UNION) rather than an OR across the join, which no
+#   single index can serve. Patient IDs are matched as substrings, as the
+#   old client-side filter did; those hits rank 0 unless the text matches too.
+# - Results are ranked with ts_rank_cd and paged with a keyset cursor on
+#   (rank, id). ts_headline, the expensive part, only runs for the page being
+#   returned.
+# The columns are not mapped on the ORM models: they are database-managed
+# and Postgres-only, and the models must still create_all() on SQLite.
+#
+# Other dialects fall back to a case-insensitive LIKE over the same text,
+# with every result ranked 0 (i.e. newest first) and no snippets.
+
+from __future__ import annotations
+
+import base64
+
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+import models
+
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=18, MinWords=6, FragmentDelimiter= … "
+
+TRANSCRIPT_VECTOR_SQL = f"to_tsvector('{SEARCH_CONFIG}', coalesce(transcription, ''))"
+SOAP_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(assessment, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(subjective, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(plan, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(objective, '')), 'C')"
+)
+
+# Startup fallback for databases not managed by Alembic, mirroring
+# _ADDED_COLUMNS / _ADDED_INDEXES in main.py. PostgreSQL only.
+SEARCH_DDL = (
+    "ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({TRANSCRIPT_VECTOR_SQL}) STORED",
+    "ALTER TABLE soap_notes ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({SOAP_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_transcriptions_search_vector ON transcriptions USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_soap_notes_search_vector ON soap_notes USING gin (search_vector)",
+)
+
+_SEARCH_SQL = text(f"""
+WITH query AS (
+    SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS tsquery
+),
+matches AS (
+    SELECT t.id
+    FROM transcriptions t, query
+    WHERE t.user_id = :user_id AND t.search_vector @@ query.tsquery
+    UNION
+    SELECT s.transcription_id
+    FROM soap_notes s JOIN transcriptions t ON t.id = s.transcription_id, query
+    WHERE t.user_id = :user_id AND s.search_vector @@ query.tsquery
+    UNION
+    SELECT t.id
+    FROM transcriptions t
+    WHERE t.user_id = :user_id AND t.patient_id ILIKE :pattern
+),
+ranked AS (
+    SELECT t.id,
+           ts_rank_cd(t.search_vector || coalesce(s.search_vector, ''::tsvector), query.tsquery) AS rank
+    FROM matches
+    JOIN transcriptions t ON t.id = matches.id
+    LEFT JOIN soap_notes s ON s.transcription_id = t.id, query
+),
+page AS (
+    SELECT id, rank FROM ranked
+    WHERE CAST(:cursor_rank AS double precision) IS NULL
+       OR (rank, id) < (CAST(:cursor_rank AS double precision), CAST(:cursor_id AS integer))
+    ORDER BY rank DESC, id DESC
+    LIMIT :limit
+)
+SELECT t.id, t.patient_id, t.filename, t.confidence_score, t.duration, t.status, t.created_at,
+       t.encounter_type,
+       (SELECT count(*) FROM medical_entities e WHERE e.transcription_id = t.id) AS entity_count,
+       s.source AS soap_source, s.quality_score,
+       page.rank,
+       CASE WHEN t.search_vector @@ query.tsquery
+            THEN ts_headline('{SEARCH_CONFIG}', t.transcription, query.tsquery, '{HEADLINE_OPTIONS}') END
+           AS transcript_snippet,
+       CASE WHEN s.search_vector @@ query.tsquery
+            THEN ts_headline('{SEARCH_CONFIG}', concat_ws(' ', s.subjective, s.objective, s.assessment, s.plan),
+                             query.tsquery, '{HEADLINE_OPTIONS}') END
+           AS soap_snippet
+FROM page
+JOIN transcriptions t ON t.id = page.id
+LEFT JOIN soap_notes s ON s.transcription_id = t.id, query
+ORDER BY page.rank DESC, page.id DESC
+""")
+
+
+def ensure_search_columns(engine: Engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for statement in SEARCH_DDL:
+            connection.execute(text(statement))
+
+
+def encode_cursor(rank: float, transcription_id: int) -> str:
+    raw = f"{rank!r}|{transcription_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """Raises ValueError for a malformed cursor."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    rank, _, transcription_id = raw.partition("|")
+    return float(rank), int(transcription_id)
+
+
+def search(db: Session, user_id: int, q: str, limit: int, cursor: tuple[float, int] | None) -> dict:
+    """
+    One page of the user's transcriptions matching `q`, best match first.
+    `q` uses web-search syntax: words, "quoted phrases", OR, -excluded.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.execute(_SEARCH_SQL, {
+            "q": q,
+            "pattern": _like_pattern(q),
+            "user_id": user_id,
+            "limit": limit + 1,
+            "cursor_rank": cursor[0] if cursor else None,
+            "cursor_id": cursor[1] if cursor else None,
+        }).mappings().all()
+    else:
+        rows = _search_with_like(db, user_id, q, limit + 1, cursor)
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1]["rank"], items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _search_with_like(db: Session, user_id: int, q: str, limit: int, cursor: tuple[float, int] | None) -> list:
+    pattern = _like_pattern(q)
+    transcription, soap = models.Transcription, models.SoapNote
+    entity_count = (
+        select(func.count())
+        .select_from(models.MedicalEntity)
+        .where(models.MedicalEntity.transcription_id == transcription.id)
+        .correlate(transcription)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            transcription.id, transcription.patient_id, transcription.filename, transcription.confidence_score,
+            transcription.duration, transcription.status, transcription.created_at, transcription.encounter_type,
+            entity_count.label("entity_count"),
+            soap.source.label("soap_source"), soap.quality_score,
+        )
+        .outerjoin(soap, soap.transcription_id == transcription.id)
+        .where(
+            transcription.user_id == user_id,
+            or_(
+                transcription.patient_id.ilike(pattern, escape="\\"),
+                transcription.transcription.ilike(pattern, escape="\\"),
+                soap.subjective.ilike(pattern, escape="\\"),
+                soap.objective.ilike(pattern, escape="\\"),
+                soap.assessment.ilike(pattern, escape="\\"),
+                soap.plan.ilike(pattern, escape="\\"),
+            ),
+        )
+        .order_by(transcription.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        query = query.where(transcription.id < cursor[1])
+    return [
+        {**row, "rank": 0.0, "transcript_snippet": None, "soap_snippet": None}
+        for row in db.execute(query).mappings()
+    ]
@@ -0,0 +1,202 @@
+# history_stats.py
+# Incrementally maintained per-user history statistics for
+# GET /api/history/stats.
+#
+# Why?
+# The dashboard's StatsBar worked out session count and average confidence by
+# downloading the user's whole history and reducing over it in the browser.
+# Aggregating on the server still costs O(history) per page load. Instead, the
+# same transaction that saves or deletes a transcription also adjusts:
+# - one user_history_stats row (count, confidence sum, duration, entity
+#   counts per category)
+# - one user_daily_activity row per day with activity
+# Reading the stats is a primary-key lookup plus a short range scan, whatever
+# the history size.
+#
+# Concurrent saves for the same user serialise on the stats row
+# (SELECT ... FOR UPDATE). A user without a stats row yet (history saved
+# before this table existed) gets it built once from SQL aggregates over their
+# transactions. Call the record_/forget_ helpers BEFORE inserting or deleting
+# the transcription, so a first-time rebuild does not count it twice.
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from lib.utils import parse_duration_seconds
+
+UNCATEGORIZED = "unknown"
+
+
+def _utc_day(value: datetime | date | str | None) -> date:
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if isinstance(value, str):  # SQLite returns date() results as text
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def _rebuild(db: Session, user_id: int) -> models.UserHistoryStats:
+    """Compute a user's stats from their transcriptions with SQL aggregates."""
+    transcriptions = models.Transcription
+    entities = models.MedicalEntity
+    count, confidence_sum = db.execute(
+        select(func.count(transcriptions.id), func.coalesce(func.sum(transcriptions.confidence_score), 0.0))
+        .where(transcriptions.user_id == user_id)
+    ).one()
+    category_counts = dict(db.execute(
+        select(func.coalesce(entities.category, UNCATEGORIZED), func.count())
+        .join(transcriptions, transcriptions.id == entities.transcription_id)
+        .where(transcriptions.user_id == user_id)
+        .group_by(func.coalesce(entities.category, UNCATEGORIZED))
+    ).all())
+    # duration is stored as "M:SS" text, so it is summed here rather than in SQL.
+    duration_seconds = sum(
+        parse_duration_seconds(duration)
+        for duration in db.scalars(select(transcriptions.duration).where(transcriptions.user_id == user_id))
+    )
+
+    db.query(models.UserDailyActivity).filter(models.UserDailyActivity.user_id == user_id).delete()
+    # Bucket by UTC day, like _utc_day() in record/forget_transcription. On
+    # PostgreSQL a bare date() uses the session TimeZone.
+    created_at = transcriptions.created_at
+    if db.get_bind().dialect.name == "postgresql":
+        created_at = func.timezone("UTC", created_at)
+    day = func.date(created_at)
+    for created_on, day_count in db.execute(
+        select(day, func.count()).where(transcriptions.user_id == user_id).group_by(day)
+    ):
+        db.add(models.UserDailyActivity(user_id=user_id, day=_utc_day(created_on), transcription_count=day_count))
+
+    stats = models.UserHistoryStats(
+        user_id=user_id,
+        transcription_count=count,
+        confidence_sum=float(confidence_sum),
+        duration_seconds=duration_seconds,
+        entity_count=sum(category_counts.values()),
+        category_counts=category_counts,
+    )
+    db.add(stats)
+    db.flush()
+    return stats
+
+
+def _locked_stats(db: Session, user_id: int) -> models.UserHistoryStats:
+    query = (
+        db.query(models.UserHistoryStats)
+        .filter(models.UserHistoryStats.user_id == user_id)
+        .with_for_update()
+    )
+    stats = query.first()
+    if stats is not None:
+        return stats
+    try:
+        with db.begin_nested():
+            return _rebuild(db, user_id)
+    except IntegrityError:
+        # A concurrent request built the row first; use theirs.
+        return query.one()
+
+
+def _add_day(db: Session, user_id: int, day: date, delta: int) -> None:
+    activity = db.get(models.UserDailyActivity, (user_id, day))
+    if activity is None:
+        if delta > 0:
+            db.add(models.UserDailyActivity(user_id=user_id, day=day, transcription_count=delta))
+        return
+    activity.transcription_count = max(0, activity.transcription_count + delta)
+    if activity.transcription_count == 0:
+        db.delete(activity)
+
+
+def _apply(
+    stats: models.UserHistoryStats,
+    sign: int,
+    confidence_score: float,
+    duration_seconds: int,
+    categories: Counter,
+) -> None:
+    stats.transcription_count = max(0, stats.transcription_count + sign)
+    stats.confidence_sum = stats.confidence_sum + sign * confidence_score if stats.transcription_count else 0.0
+    stats.duration_seconds = max(0, stats.duration_seconds + sign * duration_seconds)
+    category_counts = dict(stats.category_counts or {})
+    for category, count in categories.items():
+        category_counts[category] = category_counts.get(category, 0) + sign * count
+    # Reassign (not mutate) so the JSON column is marked dirty.
+    stats.category_counts = {category: count for category, count in category_counts.items() if count > 0}
+    stats.entity_count = sum(stats.category_counts.values())
+
+
+def record_transcription(
+    db: Session,
+    user_id: int,
+    *,
+    confidence_score: float,
+    duration: str | None,
+    entity_categories: list[str | None],
+    created_at: datetime,
+) -> None:
+    """Count a transcription that is about to be inserted. Does not commit."""
+    stats = _locked_stats(db, user_id)
+    categories = Counter(category or UNCATEGORIZED for category in entity_categories)
+    _apply(stats, 1, confidence_score, parse_duration_seconds(duration), categories)
+    _add_day(db, user_id, _utc_day(created_at), 1)
+
+
+def forget_transcription(db: Session, record: models.Transcription) -> None:
+    """Uncount a transcription that is about to be deleted. Does not commit."""
+    stats = _locked_stats(db, record.user_id)
+    categories = Counter(dict(db.execute(
+        select(func.coalesce(models.MedicalEntity.category, UNCATEGORIZED), func.count())
+        .where(models.MedicalEntity.transcription_id == record.id)
+        .group_by(func.coalesce(models.MedicalEntity.category, UNCATEGORIZED))
+    ).all()))
+    _apply(stats, -1, record.confidence_score, parse_duration_seconds(record.duration), categories)
+    _add_day(db, record.user_id, _utc_day(record.created_at), -1)
+
+
+def reset(db: Session, user_id: int) -> None:
+    """Zero a user's stats when their whole history is deleted. Does not commit."""
+    db.query(models.UserDailyActivity).filter(models.UserDailyActivity.user_id == user_id).delete()
+    db.query(models.UserHistoryStats).filter(models.UserHistoryStats.user_id == user_id).delete()
+    db.add(models.UserHistoryStats(
+        user_id=user_id, transcription_count=0, confidence_sum=0.0,
+        duration_seconds=0, entity_count=0, category_counts={},
+    ))
+
+
+def get_stats(db: Session, user_id: int, days: int) -> dict:
+    """The stats row plus daily activity for the last `days` days (UTC)."""
+    stats = db.get(models.UserHistoryStats, user_id)
+    if stats is None:
+        stats = _locked_stats(db, user_id)
+        db.commit()
+
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    activity = (
+        db.query(models.UserDailyActivity)
+        .filter(models.UserDailyActivity.user_id == user_id, models.UserDailyActivity.day >= since)
+        .order_by(models.UserDailyActivity.day)
+        .all()
+    )
+    count = stats.transcription_count
+    return {
+        "transcription_count": count,
+        "average_confidence": round(stats.confidence_sum / count, 2) if count else None,
+        "total_duration_seconds": stats.duration_seconds,
+        "entity_count": stats.entity_count,
+        "entities_by_category": stats.category_counts or {},
+        "daily_activity": [
+            {"day": row.day, "transcriptions": row.transcription_count} for row in activity
+        ],
+    }
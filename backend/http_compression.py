@@ -0,0 +1,121 @@
+# http_compression.py
+# Brotli / gzip compression of large buffered API responses.
+#
+# Why?
+# A /api/transcribe response carries the transcript, every entity, the
+# clinical representation and the SOAP note. On a long encounter that is
+# 50-200 KB of JSON, and history detail responses are similar. JSON of this
+# kind shrinks 5-10x, which matters on the clinic Wi-Fi and mobile links the
+# frontend runs on.
+#
+# Why not Starlette's GZipMiddleware?
+# It also compresses streaming responses. The Starlette release pinned here
+# does not flush the compressor between chunks, so Server-Sent Events
+# (GET /api/jobs/{job_id}/events) would sit in its buffer instead of reaching
+# the browser as each stage finishes. It also has no Brotli.
+#
+# This middleware only compresses a response whose body arrives as a single
+# message, which is what JSONResponse / ORJSONResponse / Response send. It
+# also requires that body to be at least COMPRESSION_MIN_BYTES of a
+# compressible type. Streaming responses, SSE included, pass through
+# untouched. Brotli is used when the client accepts it and the optional
+# `brotli` package is installed; otherwise gzip.
+
+from __future__ import annotations
+
+import gzip
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# 0-11. Dynamic responses are compressed per request, so stay at the fast end.
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv")
+
+
+def _accepted_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        decided = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            decided = True
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            metrics.increment("response_bytes_uncompressed_total", len(body), encoding=encoding)
+            metrics.increment("response_bytes_sent_total", len(compressed), encoding=encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
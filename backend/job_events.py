@@ -0,0 +1,204 @@
+# job_events.py
+# Per-job progress events for the transcription pipeline, streamed to the
+# browser as Server-Sent Events from GET /api/jobs/{job_id}/events.
+#
+# Why an in-process broker?
+# The backend runs a single Uvicorn worker (see Dockerfile), so the request
+# running the pipeline and the request streaming its events always live in
+# the same process. A dict of channels with asyncio queues is enough; a
+# Redis pub/sub would only be needed once the pipeline moves to a separate
+# worker fleet.
+#
+# Events are kept on the channel after they are published so a subscriber
+# that connects late (or reconnects with Last-Event-ID) receives everything
+# it missed. Finished channels are pruned after JOB_EVENTS_RETENTION_SECONDS.
+# A job_id carries one pipeline run: the upload claims its channel with
+# start(), subscribers use open(), and a second start() is a conflict.
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+JOB_EVENTS_RETENTION_SECONDS = int(os.getenv("JOB_EVENTS_RETENTION_SECONDS", "600"))
+JOB_EVENTS_HEARTBEAT_SECONDS = 15
+
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+# Pipeline stages in the order transcribe_audio_endpoint completes them.
+PIPELINE_STAGES = (
+    "transcription",
+    "normalization",
+    "validation",
+    "entities",
+    "clinical_representation",
+    "soap",
+    "persistence",
+)
+
+TERMINAL_EVENTS = {"complete", "failed"}
+
+
+class JobAccessError(Exception):
+    """Raised when a user touches a job channel owned by someone else."""
+
+
+class JobConflictError(Exception):
+    """Raised when a pipeline starts on a job channel another run already used."""
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+
+
+@dataclass
+class JobChannel:
+    job_id: str
+    owner_id: int
+    updated_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    # Set once a pipeline has claimed the channel (JobEventBroker.start).
+    started: bool = False
+    events: list[dict] = field(default_factory=list)
+    subscribers: list[_Subscriber] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+
+class JobEventBroker:
+    def __init__(self, retention_seconds: int = JOB_EVENTS_RETENTION_SECONDS):
+        self._retention_seconds = retention_seconds
+        self._channels: dict[str, JobChannel] = {}
+        self._lock = threading.Lock()
+
+    def start(self, job_id: str, owner_id: int) -> JobChannel:
+        """
+        Claim the channel for `job_id` for a new pipeline run. A channel a
+        subscriber opened while waiting for the upload is reused; one that
+        already has a pipeline, or whose run has finished but is not yet
+        pruned, raises JobConflictError. Reusing it would drop every event of
+        the new run and replay the old run's events to subscribers.
+        """
+        with self._lock:
+            self._prune_locked()
+            channel = self._channels.get(job_id)
+            if channel is None:
+                channel = JobChannel(job_id=job_id, owner_id=owner_id)
+                self._channels[job_id] = channel
+            elif channel.owner_id != owner_id:
+                raise JobAccessError(job_id)
+            elif channel.started or channel.finished:
+                raise JobConflictError(job_id)
+            channel.started = True
+            return channel
+
+    def open(self, job_id: str, owner_id: int) -> JobChannel:
+        """
+        Subscriber side: return the channel for `job_id`, creating a waiting
+        one if the pipeline has not started yet. Both must be the same user.
+        """
+        with self._lock:
+            self._prune_locked()
+            channel = self._channels.get(job_id)
+            if channel is None:
+                channel = JobChannel(job_id=job_id, owner_id=owner_id)
+                self._channels[job_id] = channel
+            elif channel.owner_id != owner_id:
+                raise JobAccessError(job_id)
+            return channel
+
+    def publish(self, job_id: str, event: str, data: dict[str, Any]) -> None:
+        """
+        Append an event to the job and fan it out to live subscribers.
+        Safe to call from the event loop or from a worker thread.
+        """
+        with self._lock:
+            channel = self._channels.get(job_id)
+            if channel is None or channel.finished:
+                return
+            message = {"id": len(channel.events) + 1, "event": event, "data": data}
+            channel.events.append(message)
+            channel.updated_at = time.monotonic()
+            if event in TERMINAL_EVENTS:
+                channel.finished_at = time.monotonic()
+            subscribers = list(channel.subscribers)
+
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(subscriber.queue.put_nowait, message)
+
+    def publish_stage(self, job_id: str, stage: str, payload: dict[str, Any], elapsed_seconds: float) -> None:
+        self.publish(job_id, "stage", {
+            "stage": stage,
+            "stage_index": PIPELINE_STAGES.index(stage) + 1,
+            "stage_count": len(PIPELINE_STAGES),
+            "elapsed_seconds": round(elapsed_seconds, 3),
+            "payload": payload,
+        })
+
+    async def subscribe(self, job_id: str, owner_id: int, last_event_id: int = 0) -> AsyncIterator[dict]:
+        """
+        Yield every event after `last_event_id`, then live events until the
+        job reaches a terminal event. Yields None as a heartbeat while idle.
+        """
+        channel = self.open(job_id, owner_id)
+        subscriber = _Subscriber(loop=asyncio.get_running_loop(), queue=asyncio.Queue())
+        with self._lock:
+            backlog = [event for event in channel.events if event["id"] > last_event_id]
+            if not channel.finished:
+                channel.subscribers.append(subscriber)
+
+        try:
+            for event in backlog:
+                yield event
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+            if channel.finished:
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=JOB_EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event["id"] <= last_event_id:
+                    continue
+                yield event
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                if subscriber in channel.subscribers:
+                    channel.subscribers.remove(subscriber)
+
+    def _prune_locked(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id
+            for job_id, channel in self._channels.items()
+            if now - channel.updated_at > self._retention_seconds
+            and (channel.finished or not channel.subscribers)
+        ]
+        for job_id in expired:
+            del self._channels[job_id]
+
+
+def format_sse(event: dict | None) -> str:
+    """Render one broker event (or a heartbeat when None) in SSE wire format."""
+    if event is None:
+        return ": keep-alive\n\n"
+    payload = json.dumps(event["data"], default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {payload}\n\n"
+
+
+broker = JobEventBroker()
@@ -12,13 +12,29 @@ def generate_patient_id() -> str:
     return f"PT-{random.randint(10000, 99999)}"
 
 
-def estimate_duration(file_size_bytes: int) -> str:
+def estimate_duration_seconds(file_size_bytes: int) -> int:
     """
-    Estimates audio duration from file size.
+    Estimates audio duration in seconds from file size.
     This is the same rough heuristic the frontend used before database persistence:
-    roughly 1 second per 10KB of audio. Returns a MM:SS string.
+    roughly 1 second per 10KB of audio.
     """
-    seconds = max(1, file_size_bytes // 10000)
+    return max(1, file_size_bytes // 10000)
+
+
+def estimate_duration(file_size_bytes: int) -> str:
+    """Estimated audio duration from file size as a MM:SS string."""
+    seconds = estimate_duration_seconds(file_size_bytes)
     minutes = seconds // 60
     secs    = seconds % 60
-    return f"{minutes}:{str(secs).zfill(2)}"
\ No newline at end of file
+    return f"{minutes}:{str(secs).zfill(2)}"
+
+
+def parse_duration_seconds(duration: str | None) -> int:
+    """Inverse of estimate_duration(): "M:SS" (or "H:MM:SS") to seconds, 0 if unparseable."""
+    try:
+        seconds = 0
+        for part in (duration or "").split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return 0
@@ -0,0 +1,262 @@
+# llm_gateway.py
+# Single async entry point for every Groq chat completion in the pipeline.
+#
+# Why a gateway?
+# The extraction, SOAP and section-repair stages used to call the synchronous
+# Groq client, each holding a worker thread for the whole network round trip
+# and each discovering the account's rate limits independently (by getting a
+# 429). The gateway runs on the event loop with AsyncGroq and applies, in
+# order, to every call:
+# - a global concurrency limit (LLM_MAX_CONCURRENCY in-flight requests),
+# - two token buckets matching the Groq quota: requests per minute and tokens
+#   per minute (prompt estimate + max_tokens), so we queue locally instead of
+#   being throttled remotely,
+# - retries with full-jitter exponential backoff on 429, 5xx, timeouts and
+#   connection errors, honouring Retry-After when Groq sends one,
+# - the process-wide circuit breaker (circuit_breaker.py): while Groq is
+#   failing, calls raise CircuitOpenError immediately so the stages fall back
+#   to their rule-based paths without waiting.
+#
+# GROQ_BASE_URL points the client at another server, e.g. the offline fake in
+# benchmarks/fake_groq_server.py for load tests.
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from typing import Callable
+
+import metrics
+from circuit_breaker import OPEN, CircuitOpenError, groq_circuit
+from prompt_budget import estimate_tokens
+
+try:
+    import groq
+    from groq import AsyncGroq
+except ImportError:  # pragma: no cover
+    groq = None  # type: ignore
+    AsyncGroq = None  # type: ignore
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+
+
+class TokenBucket:
+    """
+    Refills continuously at capacity-per-minute. acquire() waits until the
+    requested amount is available. Only ever touched from the event loop, so
+    no lock is needed between awaits.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(1, per_minute))
+        self._rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take `amount` tokens, sleeping as needed. Returns seconds waited."""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return waited
+            delay = (amount - self._tokens) / self._rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        requests_per_minute: int = GROQ_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = GROQ_TOKENS_PER_MINUTE,
+    ):
+        self._max_concurrency = max_concurrency
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._client = None
+
+    def _bind_to_running_loop(self) -> None:
+        # asyncio primitives and the httpx pool belong to one event loop. The
+        # app has exactly one, but scripts that call asyncio.run() repeatedly
+        # get a fresh semaphore and client per loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if AsyncGroq is None:
+            raise EnvironmentError("The 'groq' package is not installed.")
+        api_key = os.getenv("GROQ_API_KEY") or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise EnvironmentError(
+                "Missing API key. Set GROQ_API_KEY (preferred) in your environment or .env file."
+            )
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        # Retries are ours (with jitter and rate-limit awareness), not the SDK's.
+        self._client = AsyncGroq(
+            api_key=api_key,
+            base_url=GROQ_BASE_URL,
+            max_retries=0,
+            timeout=LLM_TIMEOUT_SECONDS,
+        )
+
+    async def complete(
+        self,
+        call_name: str,
+        messages: list[dict],
+        *,
+        temperature: float,
+        max_tokens: int,
+        model: str = GROQ_MODEL,
+        on_delta: Callable[[str], None] | None = None,
+    ) -> str:
+        """
+        Run one chat completion and return the message content.
+
+        With `on_delta`, the completion is streamed and each content delta is
+        passed to the callback as it arrives. A streamed call is only retried
+        if it failed before the first delta was delivered.
+        """
+        self._bind_to_running_loop()
+        token_cost = sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+
+        attempt = 0
+        while True:
+            delivered = False
+
+            def forward(delta: str) -> None:
+                nonlocal delivered
+                delivered = True
+                on_delta(delta)
+
+            try:
+                groq_circuit.before_call()
+            except CircuitOpenError:
+                metrics.increment("llm_requests_total", call=call_name, outcome="circuit_open")
+                raise
+
+            started_at = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    waited = await self._requests.acquire(1)
+                    waited += await self._tokens.acquire(token_cost)
+                    if waited:
+                        metrics.observe("llm_rate_limit_wait_seconds", waited, call=call_name)
+                    if on_delta is None:
+                        content = await self._create(messages, model, temperature, max_tokens)
+                    else:
+                        content = await self._stream(messages, model, temperature, max_tokens, forward)
+            except asyncio.CancelledError:
+                groq_circuit.release()
+                raise
+            except Exception as exc:
+                metrics.observe("llm_request_seconds", time.perf_counter() - started_at, call=call_name)
+                if _is_outage(exc):
+                    groq_circuit.record_failure(_error_reason(exc))
+                else:
+                    groq_circuit.release()
+                # No point backing off for a retry the open circuit would reject.
+                retryable = _is_retryable(exc) and not delivered and groq_circuit.state != OPEN
+                if not retryable or attempt >= LLM_MAX_RETRIES:
+                    metrics.increment("llm_requests_total", call=call_name, outcome="error")
+                    raise
+                delay = _retry_delay(exc, attempt)
+                attempt += 1
+                metrics.increment("llm_retries_total", call=call_name, reason=_error_reason(exc))
+                print(f"LLM call {call_name} failed ({_error_reason(exc)}); retry {attempt}/{LLM_MAX_RETRIES} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            groq_circuit.record_success()
+            metrics.observe("llm_request_seconds", time.perf_counter() - started_at, call=call_name)
+            metrics.increment("llm_requests_total", call=call_name, outcome="ok")
+            return content
+
+    async def _create(self, messages: list[dict], model: str, temperature: float, max_tokens: int) -> str:
+        response = await self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content or ""
+
+    async def _stream(
+        self,
+        messages: list[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        on_delta: Callable[[str], None],
+    ) -> str:
+        stream = await self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+        return "".join(parts)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if groq is None:
+        return False
+    if isinstance(exc, (groq.RateLimitError, groq.InternalServerError, groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    return isinstance(exc, groq.APIStatusError) and exc.status_code >= 500
+
+
+def _is_outage(exc: Exception) -> bool:
+    """Failures that count towards opening the circuit. 429 means Groq is up."""
+    return _is_retryable(exc) and not isinstance(exc, groq.RateLimitError)
+
+
+def _error_reason(exc: Exception) -> str:
+    status_code = getattr(exc, "status_code", None)
+    if status_code:
+        return str(status_code)
+    return type(exc).__name__
+
+
+def _retry_delay(exc: Exception, attempt: int) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After."""
+    backoff = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * (2 ** attempt)))
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(backoff, min(LLM_RETRY_MAX_SECONDS, float(retry_after))) if retry_after else backoff
+    except ValueError:
+        return backoff
+
+
+gateway = LLMGateway()
@@ -1,56 +1,53 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, File, Header, UploadFile, HTTPException, Request, Response, Depends, status, Form
+from fastapi import FastAPI, File, Header, UploadFile, HTTPException, Request, Response, Depends, status, Form, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import inspect, text
+from sqlalchemy import func, select, text, tuple_
 from sqlalchemy.orm import Session, selectinload
+import asyncio
+import base64
+import hashlib
 import os
 import time
-
-from transcription import transcribe_audio_realtime
-from entity_extraction import extract_medical_entities
-from clinical_extraction import extract_clinical_representation
+import uuid
+from datetime import datetime, timezone
+
+from transcription import (
+    WHISPER_BACKEND,
+    WHISPER_BEAM_SIZE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_MODEL,
+    WHISPER_TWO_PASS_SETTINGS,
+)
+from audio_ingestion import probe_duration
+from clinical_extraction import extract_clinical_representation, retarget_clinical_representation
+from medical_categories import group_entities_by_category
 from soap_generator import generate_soap_note, format_soap_note_text
-from content_validator import validate_medical_content
-from spell_correction import correct_medical_spelling
-from database import get_db, engine
-from auth import hash_password, verify_password, create_access_token, get_current_user
+from database import get_db, engine, async_engine_available, dispose_async_engine, new_async_session
+from auth import hash_password, verify_password, create_access_token, get_current_user, get_streaming_user_id
 from documentation_style import normalize_encounter_type, resolve_style_profile
+from pipeline_modes import PIPELINE_MODES, resolve_pipeline_mode
 import models
 import schemas
-from lib.utils import generate_patient_id, estimate_duration
-
-# Create all tables on startup if they do not exist.
-# In production, Alembic handles migrations. This line is a safe fallback that
-# ensures tables exist on first boot without requiring a manual migration step.
-models.Base.metadata.create_all(bind=engine)
-
-
-def _ensure_user_style_columns() -> None:
-    inspector = inspect(engine)
-    if "users" not in inspector.get_table_names():
-        return
-
-    existing_columns = {column["name"] for column in inspector.get_columns("users")}
-    required_alters = {
-        "note_style_preset": "ALTER TABLE users ADD COLUMN note_style_preset VARCHAR NOT NULL DEFAULT 'balanced'",
-        "preferred_focus": "ALTER TABLE users ADD COLUMN preferred_focus VARCHAR NOT NULL DEFAULT 'general'",
-        "include_bullets_in_plan": "ALTER TABLE users ADD COLUMN include_bullets_in_plan BOOLEAN NOT NULL DEFAULT false",
-        "include_patient_friendly_language": "ALTER TABLE users ADD COLUMN include_patient_friendly_language BOOLEAN NOT NULL DEFAULT false",
-    }
-
-    missing = [statement for column, statement in required_alters.items() if column not in existing_columns]
-    if not missing:
-        return
-
-    with engine.begin() as connection:
-        for statement in missing:
-            connection.execute(text(statement))
-
-
-_ensure_user_style_columns()
+from lib.utils import generate_patient_id, estimate_duration, estimate_duration_seconds
+import metrics
+import job_events
+import persistence
+import history_stats
+import history_search
+import history_purge
+import schema_startup
+from http_compression import CompressionMiddleware
+from user_cache import cache as user_cache
+from circuit_breaker import groq_circuit
+import stage_cache
+from cpu_budget import governor as cpu_governor
+import whisper_tiers
+from stage_executor import executor as stage_executor
+from job_events import JOB_ID_PATTERN, JobAccessError, JobConflictError, format_sse
 
 app = FastAPI(
     title="MediScribe AI API",
@@ -85,10 +82,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli / gzip for large buffered responses; SSE streams pass through.
+app.add_middleware(CompressionMiddleware)
+
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+# Schema check (or the migration-less fallback), see schema_startup.py.
+# Registered first so a database behind the code fails startup before the
+# worker processes load their models.
+@app.on_event("startup")
+def prepare_schema():
+    schema_startup.prepare(engine)
+
+
+# Whisper, scispaCy and rapidfuzz run in the stage executor's worker
+# processes, never on the event loop. Starting it here loads the models once
+# per worker before the first request arrives.
+@app.on_event("startup")
+def start_stage_executor():
+    stage_executor.start()
+
+
+@app.on_event("shutdown")
+def stop_stage_executor():
+    stage_executor.shutdown()
+
+
+# Finishes account purges that an earlier process did not complete, then
+# keeps retrying failed ones (see history_purge.py).
+async def _purge_sweep_loop():
+    while True:
+        try:
+            await asyncio.to_thread(history_purge.purge_pending_accounts)
+        except Exception as exc:
+            print(f"Purge sweep failed: {exc}")
+        await asyncio.sleep(history_purge.PURGE_SWEEP_INTERVAL_SECONDS)
+
+
+_purge_sweep_task: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_purge_sweep():
+    global _purge_sweep_task
+    _purge_sweep_task = asyncio.create_task(_purge_sweep_loop())
+
+
+@app.on_event("shutdown")
+async def stop_purge_sweep():
+    if _purge_sweep_task is not None:
+        _purge_sweep_task.cancel()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
+
+
 # ── Health / root ─────────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -101,6 +153,53 @@ def health_check():
     return {"status": "healthy", "service": "MediScribe AI Backend"}
 
 
+@app.get("/ready")
+def readiness_check(response: Response, db: Session = Depends(get_db)):
+    """
+    Readiness for load balancers and the ops dashboard. 503 only when the
+    database is unreachable; an open Groq circuit reports "degraded" because
+    notes are still produced on the rule-based path.
+    """
+    try:
+        db.execute(text("SELECT 1"))
+        database_ok = True
+    except Exception as exc:
+        print(f"Readiness check: database unavailable: {exc}")
+        database_ok = False
+
+    llm_circuit = groq_circuit.snapshot()
+    if not database_ok:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        readiness = "unavailable"
+    elif llm_circuit["state"] != "closed":
+        readiness = "degraded"
+    else:
+        readiness = "ready"
+    return {
+        "status": readiness,
+        "database": "ok" if database_ok else "unavailable",
+        "llm_circuit": llm_circuit,
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    In-process counters and summaries (prompt token usage per LLM call, etc.)
+    plus per-stage pipeline cache hit rates, the Groq circuit state, the
+    Whisper tier ladder with its measured throughput, the CPU budget and the
+    authenticated-user cache.
+    """
+    return {
+        **metrics.snapshot(),
+        "stage_cache": stage_cache.cache.stats(),
+        "llm_circuit": groq_circuit.snapshot(),
+        "whisper_tiers": whisper_tiers.manager.snapshot(),
+        "cpu_budget": cpu_governor.snapshot(),
+        "user_cache": user_cache.stats(),
+    }
+
+
 # ── Auth ──────────────────────────────────────────────────────────────────────
 
 @app.post("/api/auth/register", response_model=schemas.TokenResponse, status_code=status.HTTP_201_CREATED)
@@ -142,7 +241,10 @@ def login(payload: schemas.LoginRequest, db: Session = Depends(get_db)):
             detail="Incorrect email or password"
         )
 
-    token = create_access_token(user.id)
+    token = create_access_token(user.id, is_active=bool(user.is_active))
+    if user.is_active:
+        # The client's next call is GET /api/auth/me.
+        user_cache.put(user)
     return schemas.TokenResponse(access_token=token, user=schemas.UserPublic.model_validate(user))
 
 
@@ -166,19 +268,22 @@ def update_me(
         setattr(current_user, field, value)
     db.add(current_user)
     db.commit()
+    user_cache.invalidate(current_user.id)
     db.refresh(current_user)
     return current_user
 
 
 # ── History ───────────────────────────────────────────────────────────────────
 
-@app.get("/api/history", response_model=list[schemas.HistoryEntryOut])
+@app.get("/api/history", response_model=list[schemas.HistoryEntryOut], response_class=ORJSONResponse)
 def get_history(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
-    Returns all transcriptions for the authenticated user, newest first.
+    Returns all transcriptions for the authenticated user, newest first, with
+    full transcripts, entities and SOAP notes. Prefer the paginated
+    GET /api/history/summary for listings.
     """
     return (
         db.query(models.Transcription)
@@ -191,7 +296,161 @@ def get_history(
         .all()
     )
 
-@app.get("/api/history/{transcription_id}", response_model=schemas.HistoryEntryOut)
+HISTORY_PAGE_MAX_LIMIT = 200
+
+
+def _encode_history_cursor(created_at: datetime, transcription_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{transcription_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_history_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, _, transcription_id = raw.rpartition("|")
+        return datetime.fromisoformat(created_at), int(transcription_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+
+
+@app.get("/api/history/summary", response_model=schemas.HistoryPageOut)
+def get_history_summary(
+    limit: int = Query(default=50, ge=1, le=HISTORY_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    One page of the user's transcriptions, newest first, without transcript
+    text or entity lists (use GET /api/history/{id} for those).
+
+    Keyset pagination on (created_at, id): each page is an index range scan
+    that starts where the previous page ended, so page 200 costs the same as
+    page 1. Pass `next_cursor` from the response as `cursor` to continue.
+    """
+    return _history_summary_page(db, current_user.id, limit, cursor)
+
+
+def _history_summary_page(db: Session, user_id: int, limit: int, cursor: str | None, *conditions) -> dict:
+    """One keyset page of summary rows for `user_id`, narrowed by `conditions`."""
+    entity_count = (
+        # count(*) so the count is an index-only scan on
+        # ix_medical_entities_transcription_id.
+        select(func.count())
+        .select_from(models.MedicalEntity)
+        .where(models.MedicalEntity.transcription_id == models.Transcription.id)
+        .correlate(models.Transcription)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            models.Transcription.id,
+            models.Transcription.patient_id,
+            models.Transcription.filename,
+            models.Transcription.confidence_score,
+            models.Transcription.duration,
+            models.Transcription.status,
+            models.Transcription.created_at,
+            models.Transcription.encounter_type,
+            entity_count.label("entity_count"),
+            models.SoapNote.source.label("soap_source"),
+            models.SoapNote.quality_score,
+        )
+        .outerjoin(models.SoapNote, models.SoapNote.transcription_id == models.Transcription.id)
+        .where(models.Transcription.user_id == user_id, *conditions)
+        .order_by(models.Transcription.created_at.desc(), models.Transcription.id.desc())
+        # One extra row tells us whether there is a next page.
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(
+            tuple_(models.Transcription.created_at, models.Transcription.id) < tuple_(*_decode_history_cursor(cursor))
+        )
+
+    rows = db.execute(query).mappings().all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _encode_history_cursor(items[-1]["created_at"], items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@app.get("/api/history/by-entity", response_model=schemas.HistoryPageOut)
+def get_history_by_entity(
+    entity: str = Query(alias="text", min_length=1, max_length=200),
+    category: str | None = Query(default=None, max_length=50),
+    limit: int = Query(default=50, ge=1, le=HISTORY_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    The user's transcriptions that mention an entity, e.g. ?text=ibuprofen,
+    newest first, in the same pages as GET /api/history/summary. Matching is
+    on the normalized term (case and spacing ignored); `category` narrows it
+    to one medical_categories category, e.g. medication.
+    """
+    term = persistence.normalize_entity_text(entity)
+    if not term:
+        raise HTTPException(status_code=400, detail="Entity text is empty")
+    # Semi-join answered from ix_medical_entities_user_id_normalized_text.
+    mentions = (
+        select(models.MedicalEntity.id)
+        .where(
+            models.MedicalEntity.user_id == current_user.id,
+            models.MedicalEntity.normalized_text == term,
+            models.MedicalEntity.transcription_id == models.Transcription.id,
+        )
+        .correlate(models.Transcription)
+    )
+    if category:
+        mentions = mentions.where(models.MedicalEntity.category == category.strip().lower())
+    return _history_summary_page(db, current_user.id, limit, cursor, mentions.exists())
+
+
+HISTORY_SEARCH_MAX_QUERY = 200
+
+
+@app.get("/api/history/search", response_model=schemas.HistorySearchPageOut)
+def search_history(
+    q: str = Query(min_length=1, max_length=HISTORY_SEARCH_MAX_QUERY),
+    limit: int = Query(default=20, ge=1, le=HISTORY_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Full-text search over the user's transcripts and SOAP notes, best match
+    first, with highlighted snippets (matches wrapped in <mark>...</mark>).
+    `q` accepts web-search syntax: words, "quoted phrases", OR and -exclusions.
+    Pass `next_cursor` from the response as `cursor` to continue.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    decoded_cursor = None
+    if cursor:
+        try:
+            decoded_cursor = history_search.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid search cursor")
+    return history_search.search(db, current_user.id, q, limit, decoded_cursor)
+
+
+@app.get("/api/history/stats", response_model=schemas.HistoryStatsOut)
+def get_history_stats(
+    days: int = Query(default=30, ge=1, le=366),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Totals over the user's whole history plus transcriptions per day for the
+    last `days` days. Served from incrementally maintained summary rows
+    (history_stats.py), so the cost does not grow with the history.
+    """
+    return history_stats.get_stats(db, current_user.id, days)
+
+
+@app.get("/api/history/{transcription_id}", response_model=schemas.HistoryEntryOut, response_class=ORJSONResponse)
 def get_transcription(
     transcription_id: int,
     current_user: models.User = Depends(get_current_user),
@@ -213,6 +472,102 @@ def get_transcription(
     return record
 
 
+@app.post("/api/history/{transcription_id}/regenerate", response_class=ORJSONResponse)
+async def regenerate_soap_note(
+    transcription_id: int,
+    payload: schemas.RegenerateRequest,
+    compact: bool = Query(default=False),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Re-runs only the SOAP stage for a stored transcription with new style or
+    encounter overrides, reusing the persisted transcript, entities and
+    clinical representation. One LLM call instead of Whisper + NER + two LLM
+    calls. The stored note is replaced with the new one.
+
+    `?compact=true` omits entities.all_entities (see _response_entities).
+    """
+    record = await stage_executor.run_io(_load_transcription_with_artifacts, db, transcription_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+    if record.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorised")
+    # _save_regenerated_soap_note commits on the I/O pool, which expires the
+    # record. Reading these afterwards would reload it from the event loop.
+    record_id = record.id
+    transcription_text = record.transcription
+    confidence_score = record.confidence_score
+
+    started_at = time.perf_counter()
+    entities = [
+        {
+            "text": entity.text,
+            "label": entity.label,
+            "confidence": entity.confidence,
+            "start": entity.start,
+            "end": entity.end,
+            "category": entity.category,
+        }
+        for entity in record.entities
+    ]
+    categorized = group_entities_by_category(entities)["categorized"]
+
+    stored_encounter_type = record.encounter_type or (record.clinical_representation or {}).get("encounter", {}).get("type")
+    resolved_encounter_type = normalize_encounter_type(payload.encounter_type or stored_encounter_type)
+    if record.clinical_representation is None:
+        # Rows saved before artifacts were persisted: rebuild the representation once.
+        clinical_representation = await _cached_clinical_representation(
+            record.transcription, categorized, resolved_encounter_type,
+        )
+    elif resolved_encounter_type != stored_encounter_type:
+        clinical_representation = await stage_executor.run_io(
+            retarget_clinical_representation,
+            record.clinical_representation, record.transcription, categorized, resolved_encounter_type,
+        )
+    else:
+        clinical_representation = record.clinical_representation
+
+    stored_style_profile = record.soap_note.style_profile if record.soap_note else None
+    resolved_style_profile = resolve_style_profile(
+        user=stored_style_profile or current_user,
+        overrides=payload.model_dump(exclude={"encounter_type"}),
+    )
+
+    soap_note = await _cached_soap_note(
+        record.transcription,
+        categorized,
+        clinical_representation,
+        resolved_style_profile,
+    )
+
+    await stage_executor.run_io(
+        _save_regenerated_soap_note, db, record, soap_note, resolved_encounter_type, clinical_representation,
+    )
+
+    processing_time = round(time.perf_counter() - started_at, 3)
+    print(f"Regenerated SOAP note for transcription id={record_id} in {processing_time}s")
+    return ORJSONResponse({
+        "success": True,
+        "db_id": record_id,
+        "transcription": transcription_text,
+        "confidence_score": confidence_score / 100,
+        "entities": _response_entities({
+            "total": len(entities),
+            "categorized": categorized,
+            "all_entities": entities,
+        }, compact),
+        "soap_note": soap_note,
+        "soap_note_text": format_soap_note_text(soap_note),
+        "clinical_representation": clinical_representation,
+        "quality_report": soap_note.get("quality_report"),
+        "quality_score": soap_note.get("quality_score"),
+        "resolved_encounter_type": resolved_encounter_type,
+        "resolved_style_profile": resolved_style_profile,
+        "processing_time": processing_time,
+    })
+
+
 @app.delete("/api/history/{transcription_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_history_item(
     transcription_id: int,
@@ -228,7 +583,7 @@ def delete_history_item(
         raise HTTPException(status_code=404, detail="Transcription not found")
     if record.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorised")
-    db.delete(record)
+    history_purge.delete_transcription(db, record)
     db.commit()
 
 
@@ -238,33 +593,295 @@ def delete_all_history(
     db: Session = Depends(get_db),
 ):
     """
-    Deletes all transcriptions owned by the authenticated user.
+    Deletes all transcriptions owned by the authenticated user, one set-based
+    DELETE per table (history_purge.py).
     """
-    records = (
-        db.query(models.Transcription)
-        .filter(models.Transcription.user_id == current_user.id)
-        .all()
-    )
-    for record in records:
-        db.delete(record)
+    history_purge.delete_history(db, current_user.id)
     db.commit()
 
 
 @app.delete("/api/auth/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_my_account(
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Permanently deletes the authenticated user's account and all related data.
+    Very large accounts are deactivated at once and purged in the background.
     """
-    db.delete(current_user)
-    db.commit()
+    user_id = current_user.id
+    deleted = history_purge.delete_account(db, current_user)
+    user_cache.invalidate(user_id)
+    if not deleted:
+        background_tasks.add_task(history_purge.purge_account, user_id)
 
 
 # ── Transcription ─────────────────────────────────────────────────────────────
 
-@app.post("/api/transcribe")
+def _soap_section_to_str(val) -> str:
+    # soap_note sections may be strings (Groq) or dicts (fallback)
+    if isinstance(val, str):
+        return val
+    if isinstance(val, dict):
+        return "\n".join(f"{k}: {v}" for k, v in val.items())
+    return str(val) if val is not None else ""
+
+
+def _soap_note_columns(soap_note: dict) -> dict:
+    return {
+        "subjective":     _soap_section_to_str(soap_note.get('subjective')),
+        "objective":      _soap_section_to_str(soap_note.get('objective')),
+        "assessment":     _soap_section_to_str(soap_note.get('assessment')),
+        "plan":           _soap_section_to_str(soap_note.get('plan')),
+        "source":         soap_note.get('source', ''),
+        "quality_report": soap_note.get('quality_report'),
+        "quality_score":  soap_note.get('quality_score'),
+        "style_profile":  soap_note.get('resolved_style_profile'),
+    }
+
+
+def _apply_soap_note(soap_row: models.SoapNote, soap_note: dict) -> None:
+    for column, value in _soap_note_columns(soap_note).items():
+        setattr(soap_row, column, value)
+
+
+# ── Cached pipeline stages ──
+# Thin wrappers that route each stage through stage_cache so retries, restyles
+# and reprocessing skip every stage whose inputs are unchanged.
+#
+# CPU-bound stages are awaited on the stage executor's process pool and are
+# named by "module:function" so the models only live in the worker processes.
+# The LLM stages are coroutines that await Groq through llm_gateway on the
+# event loop; only their rule-based fallbacks use worker threads.
+
+async def _cached_transcription(
+    file_path: str,
+    audio_sha256: str,
+    model_name: str = WHISPER_MODEL,
+    beam_size: int = WHISPER_BEAM_SIZE,
+    on_decoded=None,
+) -> dict:
+    """
+    Returns text, per-segment confidence metadata and two-pass statistics.
+    `on_decoded(result)` receives the full decoder result on a cache miss.
+    """
+    inputs = {
+        "audio_sha256": audio_sha256,
+        "backend": WHISPER_BACKEND,
+        "model": model_name,
+        "compute_type": WHISPER_COMPUTE_TYPE,
+        "beam_size": beam_size,
+        "two_pass": WHISPER_TWO_PASS_SETTINGS,
+    }
+
+    async def transcribe() -> dict:
+        async with cpu_governor.slot("transcription"):
+            result = await stage_executor.run_cpu(
+                "transcription:transcribe_audio", file_path, model_name=model_name, beam_size=beam_size,
+            )
+        if not result["success"]:
+            raise Exception(f"Transcription failed: {result['error']}")
+        if on_decoded is not None:
+            on_decoded(result)
+        return {key: result[key] for key in ("text", "segments", "two_pass")}
+
+    return await stage_cache.cache.run_async("transcription", inputs, transcribe)
+
+
+async def _cached_normalization(transcription_text: str) -> tuple[str, dict]:
+    return await stage_cache.cache.run_async(
+        "normalization",
+        {"transcription": transcription_text},
+        lambda: stage_executor.run_cpu("spell_correction:correct_medical_spelling", transcription_text, verbose=True),
+    )
+
+
+async def _cached_validation(transcription_text: str) -> dict:
+    return await stage_cache.cache.run_async(
+        "validation",
+        {"transcription": transcription_text},
+        lambda: stage_executor.run_cpu("content_validator:validate_medical_content", transcription_text),
+    )
+
+
+async def _cached_entities(transcription_text: str, use_ner: bool = True) -> dict:
+    async def extract() -> dict:
+        if not use_ner:
+            # Dictionary-only matching; no model, so no inference slot.
+            return await stage_executor.run_cpu("entity_extraction:extract_medical_entities", transcription_text, use_ner=False)
+        async with cpu_governor.slot("entities"):
+            return await stage_executor.run_cpu("entity_extraction:extract_medical_entities", transcription_text, use_ner=True)
+
+    return await stage_cache.cache.run_async(
+        "entities",
+        {"transcription": transcription_text, "use_ner": use_ner},
+        extract,
+        cacheable=lambda result: bool(result.get("success")),
+    )
+
+
+async def _cached_clinical_representation(
+    transcription_text: str,
+    categorized: dict,
+    encounter_type: str,
+    use_llm: bool = True,
+) -> dict:
+    return await stage_cache.cache.run_async(
+        "clinical_representation",
+        {
+            "transcription": transcription_text,
+            "categorized": categorized,
+            "encounter_type": encounter_type,
+            "use_llm": use_llm,
+        },
+        lambda: extract_clinical_representation(transcription_text, categorized, encounter_type, use_llm=use_llm),
+        # Rules output is only a fallback when the LLM was asked for.
+        cacheable=lambda rep: not use_llm or rep.get("extraction_source") == "groq",
+    )
+
+
+async def _cached_soap_note(
+    transcription_text: str,
+    categorized: dict,
+    clinical_representation: dict,
+    style_profile: dict,
+    on_section=None,
+    use_llm: bool = True,
+    llm_repair: bool = True,
+) -> dict:
+    inputs = {
+        "transcription": transcription_text,
+        "categorized": categorized,
+        # structured_at changes on every extraction without changing the note.
+        "clinical_representation": {
+            key: value for key, value in clinical_representation.items() if key != "structured_at"
+        },
+        "style_profile": style_profile,
+        "use_llm": use_llm,
+        "llm_repair": llm_repair,
+    }
+    return await stage_cache.cache.run_async(
+        "soap",
+        inputs,
+        lambda: generate_soap_note(
+            transcription_text,
+            categorized,
+            clinical_representation,
+            style_profile,
+            on_section=on_section,
+            use_llm=use_llm,
+            llm_repair=llm_repair,
+        ),
+        cacheable=lambda soap: not use_llm or soap.get("source") != "rule-based-fallback",
+    )
+
+
+def _persist_transcription(
+    db: Session,
+    *,
+    user_id: int,
+    filename: str,
+    transcription_text: str,
+    validation_result: dict,
+    entities_result: dict,
+    soap_note: dict,
+    audio_size_bytes: int,
+    encounter_type: str,
+    clinical_representation: dict,
+) -> int:
+    """
+    Insert the transcription, its SOAP note and all entities in one bulk
+    statement (see persistence.py) and return the new transcription id.
+    """
+    confidence_0_to_100 = float(validation_result['confidence_score']) * 100
+    duration = estimate_duration(audio_size_bytes)
+    created_at = datetime.now(timezone.utc)
+    entity_rows = persistence.entity_rows(entities_result['entities'])
+
+    # Before the insert: see history_stats.py.
+    history_stats.record_transcription(
+        db,
+        user_id,
+        confidence_score=confidence_0_to_100,
+        duration=duration,
+        entity_categories=[row["category"] for row in entity_rows],
+        created_at=created_at,
+    )
+    transcription_id = persistence.insert_transcription_bundle(
+        db,
+        transcription={
+            "user_id":          user_id,
+            "patient_id":       generate_patient_id(),
+            "filename":         filename,
+            "transcription":    transcription_text,
+            "confidence_score": confidence_0_to_100,
+            "duration":         duration,
+            "status":           "complete",
+            "encounter_type":   encounter_type,
+            "clinical_representation": clinical_representation,
+            "created_at":       created_at,
+        },
+        soap_note=_soap_note_columns(soap_note),
+        entities=entity_rows,
+    )
+    db.commit()
+    return transcription_id
+
+
+async def _run_db_write(fn, db: Session, **kwargs):
+    """
+    Run a sync persistence function `fn(session, **kwargs)`. With the async
+    engine available it runs via AsyncSession.run_sync on an asyncpg
+    connection, awaited on the event loop; otherwise on the I/O pool with
+    the request's session `db`.
+    """
+    if async_engine_available():
+        async with new_async_session() as async_db:
+            return await async_db.run_sync(fn, **kwargs)
+    return await stage_executor.run_io(fn, db, **kwargs)
+
+
+def _load_transcription_with_artifacts(db: Session, transcription_id: int) -> models.Transcription | None:
+    return (
+        db.query(models.Transcription)
+        .options(
+            selectinload(models.Transcription.entities),
+            selectinload(models.Transcription.soap_note),
+        )
+        .filter(models.Transcription.id == transcription_id)
+        .first()
+    )
+
+
+def _save_regenerated_soap_note(
+    db: Session,
+    record: models.Transcription,
+    soap_note: dict,
+    encounter_type: str,
+    clinical_representation: dict,
+) -> None:
+    if record.soap_note is None:
+        record.soap_note = models.SoapNote(transcription_id=record.id)
+    _apply_soap_note(record.soap_note, soap_note)
+    record.encounter_type = encounter_type
+    record.clinical_representation = clinical_representation
+    db.commit()
+
+
+def _response_entities(entities_payload: dict, compact: bool) -> dict:
+    """
+    The `entities` block of a transcribe / regenerate response. Every entity
+    appears twice in it: grouped under `categorized` and again in the flat
+    `all_entities` list. With `compact` the flat list is left out (about a
+    fifth of a typical response); clients rebuild it from `categorized`.
+    """
+    if not compact:
+        return entities_payload
+    return {key: value for key, value in entities_payload.items() if key != "all_entities"}
+
+
+@app.post("/api/transcribe", response_class=ORJSONResponse)
 async def transcribe_audio_endpoint(
     request: Request,
     file: UploadFile = File(...),
@@ -273,13 +890,32 @@ async def transcribe_audio_endpoint(
     preferred_focus: str | None = Form(default=None),
     include_bullets_in_plan: bool | None = Form(default=None),
     include_patient_friendly_language: bool | None = Form(default=None),
+    job_id: str | None = Form(default=None),
+    pipeline_mode: str | None = Form(default=None),
+    latency_target_seconds: float | None = Form(default=None),
     audio_duration_seconds: float | None = Header(default=None, alias="X-Audio-Duration-Seconds"),
+    compact: bool = Query(default=False),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Transcribe uploaded audio, extract entities, generate SOAP note, and
     persist the full result to the database linked to the authenticated user.
+
+    Progress is published per stage to GET /api/jobs/{job_id}/events. The
+    client may pass its own `job_id` so it can subscribe before uploading;
+    otherwise one is generated and returned in the response.
+
+    `pipeline_mode` trades quality for latency: "fast" (small Whisper model,
+    no scispaCy, no Groq), "balanced" or "thorough" (default when omitted);
+    any other value is rejected with 400. See pipeline_modes.py. The
+    response records the mode and per-stage timings.
+
+    In the adaptive modes the Whisper model and beam size are chosen per job
+    by whisper_tiers.py to meet `latency_target_seconds` given the current
+    queue; the choice is returned as `transcription_tier`.
+
+    `?compact=true` omits entities.all_entities (see _response_entities).
     """
     print("\n" + "=" * 60)
     print("NEW TRANSCRIPTION REQUEST")
@@ -287,7 +923,24 @@ async def transcribe_audio_endpoint(
     print(f"User: {current_user.email} (id={current_user.id})")
     print(f"File: {file.filename}")
 
+    # Omitted means the default; anything else must name a mode.
+    if pipeline_mode is not None and pipeline_mode not in PIPELINE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"pipeline_mode must be one of: {', '.join(PIPELINE_MODES)}",
+        )
+
+    job_id = job_id or uuid.uuid4().hex
+    if not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=400, detail="job_id must be 8-64 letters, digits, '-' or '_'")
+    try:
+        job_events.broker.start(job_id, current_user.id)
+    except (JobAccessError, JobConflictError):
+        raise HTTPException(status_code=409, detail="job_id is already in use")
+
     resolved_encounter_type = normalize_encounter_type(encounter_type)
+    mode = resolve_pipeline_mode(pipeline_mode)
+    print(f"Pipeline mode: {mode['mode']}")
     resolved_style_profile = resolve_style_profile(
         user=current_user,
         overrides={
@@ -297,10 +950,15 @@ async def transcribe_audio_endpoint(
             "include_patient_friendly_language": include_patient_friendly_language,
         },
     )
+    # Everything needed from the user row has been read. Hand the request's
+    # connection back to the pool instead of holding it (possibly idle in a
+    # transaction) for the minutes the pipeline runs.
+    db.close()
 
     allowed_extensions = ['.mp3', '.wav', '.m4a', '.webm', '.ogg', '.flac']
     file_ext = os.path.splitext(file.filename)[1].lower()
     if file_ext not in allowed_extensions:
+        job_events.broker.publish(job_id, "failed", {"message": f"File type {file_ext} not supported."})
         raise HTTPException(
             status_code=400,
             detail=f"File type {file_ext} not supported. Allowed: {allowed_extensions}"
@@ -310,6 +968,24 @@ async def transcribe_audio_endpoint(
     request_started_at = time.perf_counter()
     minimum_audio_duration_seconds = 45
 
+    stage_timings: dict[str, float] = {}
+    stage_started_at = request_started_at
+
+    def emit_stage(stage: str, payload: dict) -> None:
+        nonlocal stage_started_at
+        now = time.perf_counter()
+        stage_timings[stage] = round(now - stage_started_at, 3)
+        metrics.observe("pipeline_stage_seconds", now - stage_started_at, stage=stage, mode=mode["mode"])
+        stage_started_at = now
+        job_events.broker.publish_stage(job_id, stage, payload, now - request_started_at)
+
+    def emit_failed(response: dict) -> dict:
+        job_events.broker.publish(job_id, "failed", {
+            "message": response["message"],
+            "processing_time": response["processing_time"],
+        })
+        return response
+
     try:
         with open(file_path, "wb") as buffer:
             content = await file.read()
@@ -319,8 +995,9 @@ async def transcribe_audio_endpoint(
             processing_time = round(time.perf_counter() - request_started_at, 3)
             if os.path.exists(file_path):
                 os.remove(file_path)
-            return {
+            return emit_failed({
                 "success": False,
+                "job_id": job_id,
                 "filename": file.filename,
                 "transcription": "",
                 "validation": {
@@ -334,25 +1011,49 @@ async def transcribe_audio_endpoint(
                 },
                 "processing_time": processing_time,
                 "message": "Recording is too short to process. Please upload a longer clinical audio clip.",
-            }
+            })
+
+        # Every blocking stage runs on the stage executor so the event loop
+        # stays free for other requests and for flushing progress events.
 
         # Step 1: Transcribe
         print("\n--- STEP 1: TRANSCRIPTION ---")
-        transcription_result = transcribe_audio_realtime(file_path)
+        if mode["adaptive_whisper"] and whisper_tiers.WHISPER_ADAPTIVE:
+            tier = whisper_tiers.manager.select(
+                audio_duration_seconds or probe_duration(file_path) or estimate_duration_seconds(len(content)),
+                latency_target=latency_target_seconds,
+                max_beam_size=mode["max_beam_size"],
+            )
+        else:
+            tier = {"model": mode["whisper_model"], "beam_size": mode["beam_size"], "reason": "fixed"}
+        decoded: dict = {}
+        try:
+            transcription_output = await _cached_transcription(
+                file_path,
+                hashlib.sha256(content).hexdigest(),
+                model_name=tier["model"],
+                beam_size=tier["beam_size"],
+                on_decoded=decoded.update,
+            )
+        finally:
+            if "ticket" in tier:
+                whisper_tiers.manager.finish(tier, decoded.get("decode_seconds"), decoded.get("duration"))
+        transcription_tier = {key: value for key, value in tier.items() if key != "ticket"}
+        transcription_result = transcription_output["text"]
         print(f"Transcription: {transcription_result[:200]}...")
+        emit_stage("transcription", {"transcription": transcription_result})
 
         print("\n--- STEP 1B: TRANSCRIPT NORMALISATION ---")
-        transcription_result, correction_log = correct_medical_spelling(
-            transcription_result,
-            verbose=True,
-        )
+        transcription_result, correction_log = await _cached_normalization(transcription_result)
         print(f"Transcript normalisation complete: {len(correction_log['phrase_replacements'])} phrase replacements, "
               f"{len(correction_log['word_corrections'])} word corrections")
+        emit_stage("normalization", {"transcription": transcription_result, "corrections": correction_log})
 
         # Step 2: Validate
         print("\n--- STEP 2: CONTENT VALIDATION ---")
-        validation_result = validate_medical_content(transcription_result)
+        validation_result = await _cached_validation(transcription_result)
         print(f"Validation: {validation_result['is_valid']} | Confidence: {validation_result['confidence_score']}")
+        emit_stage("validation", {"validation": validation_result})
 
         if not validation_result['is_valid']:
             processing_time = round(time.perf_counter() - request_started_at, 3)
@@ -360,104 +1061,101 @@ async def transcribe_audio_endpoint(
             print("VALIDATION FAILED — skipping entity extraction and SOAP generation")
             if os.path.exists(file_path):
                 os.remove(file_path)
-            return {
+            return emit_failed({
                 "success": False,
+                "job_id": job_id,
                 "filename": file.filename,
                 "transcription": transcription_result,
                 "validation": validation_result,
+                "pipeline_mode": mode["mode"],
+                "stage_timings": stage_timings,
                 "processing_time": processing_time,
                 "message": validation_result["reason"],
-            }
+            })
 
         # Step 3: Extract entities
         print("\n--- STEP 3: ENTITY EXTRACTION ---")
-        entities_result = extract_medical_entities(transcription_result)
+        entities_result = await _cached_entities(transcription_result, use_ner=mode["use_ner"])
         print(f"Found {entities_result['total_entities']} entities")
+        entities_payload = {
+            "total":       entities_result["total_entities"],
+            "breakdown":   entities_result["category_counts"],
+            "categorized": entities_result["categorized"],
+            "all_entities": entities_result["entities"],
+        }
+        emit_stage("entities", {"entities": entities_payload})
 
         # Step 4: Build structured clinical representation
         print("\n--- STEP 4: STRUCTURED CLINICAL EXTRACTION ---")
-        clinical_representation = extract_clinical_representation(
+        clinical_representation = await _cached_clinical_representation(
             transcription_result,
             entities_result["categorized"],
             resolved_encounter_type,
+            use_llm=mode["llm_extraction"],
         )
         print(f"Encounter type: {clinical_representation.get('encounter', {}).get('type')}")
+        emit_stage("clinical_representation", {"clinical_representation": clinical_representation})
 
         # Step 5: Generate SOAP note
         print("\n--- STEP 5: SOAP NOTE GENERATION ---")
-        soap_note = generate_soap_note(
+        soap_note = await _cached_soap_note(
             transcription_result,
             entities_result['categorized'],
             clinical_representation,
             resolved_style_profile,
+            on_section=lambda section, text: job_events.broker.publish(
+                job_id, "soap_section", {"section": section, "text": text},
+            ),
+            use_llm=mode["llm_soap"],
+            llm_repair=mode["llm_repair"],
         )
         soap_text = format_soap_note_text(soap_note)
         print("SOAP note generated")
+        emit_stage("soap", {
+            "soap_note": soap_note,
+            "soap_note_text": soap_text,
+            "quality_report": soap_note.get("quality_report"),
+            "quality_score": soap_note.get("quality_score"),
+        })
 
         # Step 6: Persist to database
         print("\n--- STEP 6: PERSISTING TO DATABASE ---")
-        confidence_0_to_100 = float(validation_result['confidence_score']) * 100
-
-        db_transcription = models.Transcription(
-            user_id          = current_user.id,
-            patient_id       = generate_patient_id(),
-            filename         = file.filename,
-            transcription    = transcription_result,
-            confidence_score = confidence_0_to_100,
-            duration         = estimate_duration(len(content)),
-            status           = "complete",
+        db_transcription_id = await _run_db_write(
+            _persist_transcription,
+            db,
+            user_id=current_user.id,
+            filename=file.filename,
+            transcription_text=transcription_result,
+            validation_result=validation_result,
+            entities_result=entities_result,
+            soap_note=soap_note,
+            audio_size_bytes=len(content),
+            encounter_type=resolved_encounter_type,
+            clinical_representation=clinical_representation,
         )
-        db.add(db_transcription)
-        db.flush()  # get db_transcription.id before committing
-
-        for ent in entities_result['entities']:
-            db.add(models.MedicalEntity(
-                transcription_id = db_transcription.id,
-                text             = ent.get('text', ''),
-                label            = ent.get('label', ''),
-                confidence       = float(ent.get('confidence', 0.0)),
-                start            = int(ent.get('start', 0)),
-                end              = int(ent.get('end', 0)),
-            ))
-
-        # soap_note sections may be strings (Groq) or dicts (fallback)
-        def _to_str(val) -> str:
-            if isinstance(val, str):
-                return val
-            if isinstance(val, dict):
-                return "\n".join(f"{k}: {v}" for k, v in val.items())
-            return str(val) if val is not None else ""
-
-        db.add(models.SoapNote(
-            transcription_id = db_transcription.id,
-            subjective       = _to_str(soap_note.get('subjective')),
-            objective        = _to_str(soap_note.get('objective')),
-            assessment       = _to_str(soap_note.get('assessment')),
-            plan             = _to_str(soap_note.get('plan')),
-            source           = soap_note.get('source', ''),
-        ))
-
-        db.commit()
-        db.refresh(db_transcription)
         processing_time = round(time.perf_counter() - request_started_at, 3)
         print(f"Total processing time: {processing_time}s")
-        print(f"Persisted transcription id={db_transcription.id}")
+        print(f"Persisted transcription id={db_transcription_id}")
         print("=" * 60 + "\n")
+        emit_stage("persistence", {"db_id": db_transcription_id})
 
         if os.path.exists(file_path):
             os.remove(file_path)
 
-        return {
+        job_events.broker.publish(job_id, "complete", {
+            "db_id": db_transcription_id,
+            "processing_time": processing_time,
+        })
+
+        # Returned directly: the payload is plain JSON types already, so
+        # FastAPI's jsonable_encoder pass over it can be skipped.
+        return ORJSONResponse({
             "success": True,
+            "job_id": job_id,
             "filename": file.filename,
             "transcription": transcription_result,
             "validation": validation_result,
-            "entities": {
-                "total":       entities_result["total_entities"],
-                "breakdown":   entities_result["category_counts"],
-                "categorized": entities_result["categorized"],
-                "all_entities": entities_result["entities"],
-            },
+            "entities": _response_entities(entities_payload, compact),
             "soap_note":      soap_note,
             "soap_note_text": soap_text,
             "clinical_representation": clinical_representation,
@@ -465,17 +1163,60 @@ async def transcribe_audio_endpoint(
             "quality_score": soap_note.get("quality_score"),
             "resolved_encounter_type": resolved_encounter_type,
             "resolved_style_profile": resolved_style_profile,
+            "pipeline_mode": mode["mode"],
+            "transcription_tier": transcription_tier,
+            "transcription_segments": transcription_output["segments"],
+            "two_pass": transcription_output["two_pass"],
+            "stage_timings": stage_timings,
             "processing_time": processing_time,
-            "db_id":          db_transcription.id,
-        }
+            "db_id":          db_transcription_id,
+        })
 
     except Exception as e:
         if os.path.exists(file_path):
             os.remove(file_path)
         print(f"\nERROR in transcribe endpoint: {str(e)}\n")
+        job_events.broker.publish(job_id, "failed", {"message": str(e)})
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    last_event_id: int | None = Header(default=None, alias="Last-Event-ID"),
+    user_id: int = Depends(get_streaming_user_id),
+):
+    """
+    Server-Sent Events stream of pipeline progress for one transcription job.
+
+    Emits a `stage` event as each pipeline stage finishes, carrying that
+    stage's partial payload, and a `soap_section` event for each draft SOAP
+    section as the LLM streams it, then a single terminal `complete` or
+    `failed` event. Events published before the client connected are replayed, so the
+    stream can be opened before or after the upload starts.
+    """
+    if not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job id")
+    try:
+        job_events.broker.open(job_id, user_id)
+    except JobAccessError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for event in job_events.broker.subscribe(job_id, user_id, last_event_id or 0):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Tell the Nginx proxy not to buffer the stream.
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 # ── Download ──────────────────────────────────────────────────────────────────
 
 class DownloadRequest(BaseModel):
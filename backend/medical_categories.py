@@ -484,6 +484,19 @@ def categorize_entity(entity_text):
     return "unknown"
 
 
+# Map per-entity categories to their keys in the categorized dict
+CATEGORY_KEYS = {
+    "symptom": "symptoms",
+    "medication": "medications",
+    "condition": "conditions",
+    "procedure": "procedures",
+    "anatomical": "anatomical",
+    "modifier": "modifiers",
+    "clinical_term": "clinical_terms",
+    "unknown": "unknown"
+}
+
+
 def categorize_entities(entities):
     """
     Categorize a list of medical entities.
@@ -494,46 +507,30 @@ def categorize_entities(entities):
     Returns:
         dict: Categorized entities with counts
     """
-    categorized = {
-        "symptoms": [],
-        "medications": [],
-        "conditions": [],
-        "procedures": [],
-        "anatomical": [],
-        "modifiers": [],
-        "clinical_terms": [],
-        "unknown": []
-    }
+    for entity in entities:
+        entity['category'] = categorize_entity(entity['text'])
+    return group_entities_by_category(entities)
+
+
+def group_entities_by_category(entities):
+    """
+    Group entities that already carry a 'category' into the categorized
+    dict shape used by the pipeline. Entities without one (e.g. rows stored
+    before categories were persisted) are categorized on the fly.
     
-    # Map categories to their dictionary keys
-    category_map = {
-        "symptom": "symptoms",
-        "medication": "medications",
-        "condition": "conditions",
-        "procedure": "procedures",
-        "anatomical": "anatomical",
-        "modifier": "modifiers",
-        "clinical_term": "clinical_terms",
-        "unknown": "unknown"
-    }
+    Returns:
+        dict: Categorized entities with counts
+    """
+    categorized = {dict_key: [] for dict_key in CATEGORY_KEYS.values()}
     
     for entity in entities:
-        category = categorize_entity(entity['text'])
+        category = entity.get('category') or categorize_entity(entity['text'])
         entity['category'] = category
-        dict_key = category_map.get(category, "unknown")
+        dict_key = CATEGORY_KEYS.get(category, "unknown")
         categorized[dict_key].append(entity)
     
     # Count entities in each category
-    counts = {
-        "symptoms": len(categorized["symptoms"]),
-        "medications": len(categorized["medications"]),
-        "conditions": len(categorized["conditions"]),
-        "procedures": len(categorized["procedures"]),
-        "anatomical": len(categorized["anatomical"]),
-        "modifiers": len(categorized["modifiers"]),
-        "clinical_terms": len(categorized["clinical_terms"]),
-        "unknown": len(categorized["unknown"])
-    }
+    counts = {dict_key: len(items) for dict_key, items in categorized.items()}
     
     return {
         "categorized": categorized,
@@ -0,0 +1,59 @@
+# metrics.py
+# Small in-process metrics registry exposed at GET /metrics.
+#
+# Why not Prometheus?
+# The backend runs as a single Uvicorn worker and the numbers we care about
+# (prompt sizes, cache hit rates, stage latencies) are only needed for local
+# benchmarking and the readiness dashboard. A thread-safe dict of counters and
+# summaries is enough and adds no dependency. Labels are folded into the key,
+# e.g. "llm_prompt_tokens_sent_total{call=soap_generation}".
+
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_summaries: dict[str, dict[str, float]] = {}
+
+
+def _key(name: str, labels: dict[str, Any]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f"{key}={labels[key]}" for key in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+def increment(name: str, value: float = 1.0, **labels: Any) -> None:
+    """Add `value` to a monotonically increasing counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    """Record one observation (count, sum, min, max) for a summary metric."""
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            _summaries[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            return
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["min"] = min(summary["min"], value)
+        summary["max"] = max(summary["max"], value)
+
+
+def snapshot() -> dict:
+    """Return a JSON-serialisable copy of every counter and summary."""
+    with _lock:
+        summaries = {
+            key: {**values, "avg": round(values["sum"] / values["count"], 4) if values["count"] else 0.0}
+            for key, values in _summaries.items()
+        }
+        return {
+            "counters": dict(_counters),
+            "summaries": summaries,
+        }
@@ -1,6 +1,9 @@
 # models.py
 # SQLAlchemy ORM models. Each class maps to one database table.
 #
+# Every foreign key is ON DELETE CASCADE, so deleting a user or transcription
+# row removes everything under it; bulk deletes live in history_purge.py.
+#
 # Why store entities and soap_notes in separate tables rather than as JSON
 # columns on transcriptions?
 # Separate tables allow querying — e.g. "show all transcriptions where
@@ -8,8 +11,13 @@
 # the full entity list". JSON columns make queries like these impossible
 # without scanning every row. For a portfolio project this also demonstrates
 # proper relational design.
+#
+# The pipeline's intermediate artifacts (structured clinical representation,
+# SOAP quality report, resolved style profile) ARE stored as JSON columns:
+# they are only ever read back whole, to regenerate a note without re-running
+# Whisper and NER, never queried into.
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index, Text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -35,19 +43,23 @@ class User(Base):
 
     # One user has many transcriptions
     transcriptions = relationship("Transcription", back_populates="user", cascade="all, delete-orphan")
+    history_stats  = relationship("UserHistoryStats", uselist=False, cascade="all, delete-orphan")
+    daily_activity = relationship("UserDailyActivity", cascade="all, delete-orphan")
 
 
 class Transcription(Base):
     __tablename__ = "transcriptions"
 
     id               = Column(Integer, primary_key=True, index=True)
-    user_id          = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id          = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     patient_id       = Column(String, nullable=False)       # PT-##### generated ID
     filename         = Column(String, nullable=False)
     transcription    = Column(Text, nullable=False)
     confidence_score = Column(Float, nullable=False, default=0.0)  # stored as 0-100
     duration         = Column(String, nullable=True)
     status           = Column(String, default="complete")
+    encounter_type   = Column(String, nullable=True)
+    clinical_representation = Column(JSON, nullable=True)
     created_at       = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -55,31 +67,77 @@ class Transcription(Base):
     entities    = relationship("MedicalEntity", back_populates="transcription", cascade="all, delete-orphan")
     soap_note   = relationship("SoapNote", back_populates="transcription", uselist=False, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # History listings: WHERE user_id = ? ORDER BY created_at DESC, id DESC,
+        # including the keyset cursor. Also serves the users -> transcriptions
+        # foreign key on user deletes.
+        Index("ix_transcriptions_user_id_created_at", user_id, created_at.desc(), id.desc()),
+    )
+
 
 class MedicalEntity(Base):
     __tablename__ = "medical_entities"
 
     id               = Column(Integer, primary_key=True, index=True)
-    transcription_id = Column(Integer, ForeignKey("transcriptions.id"), nullable=False)
+    transcription_id = Column(Integer, ForeignKey("transcriptions.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized from transcriptions.user_id so per-user entity lookups
+    # need no join (persistence.py fills it on insert).
+    user_id          = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     text             = Column(String, nullable=False)
+    normalized_text  = Column(String, nullable=True)    # persistence.normalize_entity_text(text)
     label            = Column(String, nullable=False)   # CHEMICAL, DISEASE, SYMPTOM, TEST, PROCEDURE
+    category         = Column(String, nullable=True)    # symptom, medication, condition, ... (medical_categories)
     confidence       = Column(Float, default=0.0)
     start            = Column(Integer, default=0)
     end              = Column(Integer, default=0)
 
     transcription = relationship("Transcription", back_populates="entities")
 
+    __table_args__ = (
+        # Entity loads (selectinload), per-transcription counts and deletes.
+        Index("ix_medical_entities_transcription_id", transcription_id),
+        # GET /api/history/by-entity: WHERE user_id = ? AND normalized_text = ?,
+        # with transcription_id in the index so the match is index-only.
+        Index("ix_medical_entities_user_id_normalized_text", user_id, normalized_text, transcription_id),
+    )
+
 
 class SoapNote(Base):
     __tablename__ = "soap_notes"
 
     id               = Column(Integer, primary_key=True, index=True)
-    transcription_id = Column(Integer, ForeignKey("transcriptions.id"), nullable=False, unique=True)
+    transcription_id = Column(Integer, ForeignKey("transcriptions.id", ondelete="CASCADE"), nullable=False, unique=True)
     subjective       = Column(Text, nullable=True)
     objective        = Column(Text, nullable=True)
     assessment       = Column(Text, nullable=True)
     plan             = Column(Text, nullable=True)
     source           = Column(String, nullable=True)   # "groq-llama-3.3-70b-versatile" or "rule-based-fallback"
+    quality_report   = Column(JSON, nullable=True)
+    quality_score    = Column(Float, nullable=True)
+    style_profile    = Column(JSON, nullable=True)     # resolved NoteStyleProfile the note was written with
     created_at       = Column(DateTime(timezone=True), server_default=func.now())
 
     transcription = relationship("Transcription", back_populates="soap_note")
+
+
+# Per-user history statistics, kept up to date as transcriptions are saved and
+# deleted (history_stats.py) so GET /api/history/stats reads one row plus a
+# short range of daily rows instead of aggregating the whole history.
+class UserHistoryStats(Base):
+    __tablename__ = "user_history_stats"
+
+    user_id             = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    transcription_count = Column(Integer, nullable=False, default=0)
+    confidence_sum      = Column(Float, nullable=False, default=0.0)    # sum of 0-100 scores
+    duration_seconds    = Column(Integer, nullable=False, default=0)
+    entity_count        = Column(Integer, nullable=False, default=0)
+    category_counts     = Column(JSON, nullable=False, default=dict)    # {"symptom": 12, ...}
+    updated_at          = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class UserDailyActivity(Base):
+    __tablename__ = "user_daily_activity"
+
+    user_id             = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day                 = Column(Date, primary_key=True)                # UTC date of created_at
+    transcription_count = Column(Integer, nullable=False, default=0)
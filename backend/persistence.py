@@ -0,0 +1,188 @@
+# persistence.py
+# Bulk insert of a finished transcription: transcription row, SOAP note row
+# and every medical entity.
+#
+# Why?
+# _persist_transcription used to db.add() one MedicalEntity per entity. A long
+# consultation with 150+ entities paid ORM identity-map and unit-of-work
+# bookkeeping for each one before the flush sent them. None of those objects
+# is used again after the commit; the endpoint only needs the new id.
+#
+# On PostgreSQL everything is inserted in ONE statement with data-modifying
+# CTEs:
+#
+#   WITH new_transcription AS (INSERT INTO transcriptions ... RETURNING id, user_id),
+#        new_soap_note     AS (INSERT INTO soap_notes ... SELECT id FROM new_transcription),
+#        new_entities      AS (INSERT INTO medical_entities ...
+#                              SELECT id, user_id, e.* FROM new_transcription,
+#                                     jsonb_to_recordset(:entities) AS e(...))
+#   SELECT id FROM new_transcription
+#
+# The entities travel as a single JSON parameter, so the statement has a fixed
+# number of bind parameters whether there are 10 entities or 10,000 (Postgres
+# caps a statement at 32,767).
+#
+# Other dialects (SQLite in local experiments) get three Core inserts instead.
+# The entities are still one executemany, which SQLAlchemy 2.0 sends as
+# batched multi-row INSERTs.
+#
+# benchmarks/persistence_benchmark.py compares this with the old per-entity
+# ORM path.
+#
+# Each entity row also carries the owning user_id and a normalized_text
+# (normalize_entity_text) for GET /api/history/by-entity.
+
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String, cast, column, func, insert, select, text, true
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+import models
+
+_transcriptions = models.Transcription.__table__
+_soap_notes = models.SoapNote.__table__
+_entities = models.MedicalEntity.__table__
+
+# Columns filled from each entity dict, with the SQL type used to unpack the
+# JSON parameter on PostgreSQL.
+_ENTITY_COLUMNS = {
+    "text": String,
+    "normalized_text": String,
+    "label": String,
+    "confidence": Float,
+    "start": Integer,
+    "end": Integer,
+    "category": String,
+}
+
+
+def normalize_entity_text(text: str) -> str:
+    """
+    Lookup key for an entity term: lower-cased, whitespace collapsed.
+    Keep in step with backfill_normalized_text() below.
+    """
+    return " ".join(text.split()).lower()
+
+
+_BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_normalized_text(connection) -> None:
+    """
+    Fill medical_entities.normalized_text for rows that have none. PostgreSQL
+    does it in one UPDATE with the SQL equivalent of normalize_entity_text().
+    SQLite has no regexp_replace to collapse inner whitespace, so there the
+    rows are read in id order and normalized here.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            "UPDATE medical_entities SET normalized_text = lower(btrim(regexp_replace(text, '\\s+', ' ', 'g'))) "
+            "WHERE normalized_text IS NULL"
+        ))
+        return
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text(
+                "SELECT id, text FROM medical_entities WHERE normalized_text IS NULL AND id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": _BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            return
+        connection.execute(
+            text("UPDATE medical_entities SET normalized_text = :normalized_text WHERE id = :id"),
+            [{"id": row.id, "normalized_text": normalize_entity_text(row.text or "")} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def entity_rows(entities: list[dict]) -> list[dict]:
+    """Normalise pipeline entity dicts to medical_entities column values."""
+    return [
+        {
+            "text":       ent.get("text", ""),
+            "normalized_text": normalize_entity_text(ent.get("text", "")),
+            "label":      ent.get("label", ""),
+            "confidence": float(ent.get("confidence", 0.0)),
+            "start":      int(ent.get("start", 0)),
+            "end":        int(ent.get("end", 0)),
+            "category":   ent.get("category"),
+        }
+        for ent in entities
+    ]
+
+
+def insert_transcription_bundle(
+    db: Session,
+    transcription: dict,
+    soap_note: dict,
+    entities: list[dict],
+) -> int:
+    """
+    Insert the transcription row, its SOAP note row and `entities` (rows from
+    entity_rows()) and return the new transcription id. Does not commit.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return _insert_with_ctes(db, transcription, soap_note, entities)
+
+    transcription_id = db.execute(
+        insert(_transcriptions).values(**transcription).returning(_transcriptions.c.id)
+    ).scalar_one()
+    db.execute(insert(_soap_notes).values(transcription_id=transcription_id, **soap_note))
+    if entities:
+        db.execute(
+            insert(_entities),
+            [{"transcription_id": transcription_id, "user_id": transcription["user_id"], **row} for row in entities],
+        )
+    return transcription_id
+
+
+def _insert_with_ctes(db: Session, transcription: dict, soap_note: dict, entities: list[dict]) -> int:
+    new_transcription = (
+        insert(_transcriptions)
+        .values(**transcription)
+        .returning(_transcriptions.c.id, _transcriptions.c.user_id)
+        .cte("new_transcription")
+    )
+
+    soap_columns = list(soap_note)
+    new_soap_note = (
+        insert(_soap_notes)
+        .from_select(
+            ["transcription_id", *soap_columns],
+            select(
+                new_transcription.c.id,
+                # Typed casts: untyped parameters in an INSERT ... SELECT list
+                # would otherwise resolve to text, which JSON columns reject.
+                *(cast(soap_note[name], _soap_notes.c[name].type) for name in soap_columns),
+            ),
+        )
+        .cte("new_soap_note")
+    )
+
+    records = (
+        func.jsonb_to_recordset(cast(entities, JSONB))
+        .table_valued(*(column(name, type_()) for name, type_ in _ENTITY_COLUMNS.items()))
+        .render_derived(name="entity", with_types=True)
+    )
+    new_entities = (
+        insert(_entities)
+        .from_select(
+            ["transcription_id", "user_id", *_ENTITY_COLUMNS],
+            select(
+                new_transcription.c.id,
+                new_transcription.c.user_id,
+                *(records.c[name] for name in _ENTITY_COLUMNS),
+            )
+            .select_from(new_transcription)
+            .join(records, true()),
+        )
+        .cte("new_entities")
+    )
+
+    statement = select(new_transcription.c.id).add_cte(new_soap_note).add_cte(new_entities)
+    return db.execute(statement).scalar_one()
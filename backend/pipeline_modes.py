@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from transcription import WHISPER_BEAM_SIZE, WHISPER_FAST_MODEL, WHISPER_MODEL
+
+# Speed/quality trade-off for one /api/transcribe request.
+#
+# - fast: a draft in seconds. Small Whisper model with greedy decoding, a
+#   dictionary-only entity pass (no scispaCy), rule-based clinical extraction
+#   and the rule-based SOAP generator. No Groq calls at all.
+# - balanced: the default Whisper model decoded greedily, full NER, rule-based
+#   extraction and a single Groq call for the SOAP draft; weak sections are
+#   repaired with rules rather than further Groq calls.
+# - thorough: the original pipeline (beam search, Groq extraction, Groq SOAP
+#   with Groq section repair).
+#
+# With adaptive_whisper, whisper_tiers.py picks the model and beam size per
+# job from the queue and the latency target (capped at max_beam_size);
+# whisper_model / beam_size are then only used when WHISPER_ADAPTIVE=0.
+# On an idle server the tier manager always picks the top of the ladder, so
+# "thorough" decodes exactly as before; it steps down only under queue load.
+PIPELINE_MODES = {
+    "fast": {
+        "whisper_model": WHISPER_FAST_MODEL,
+        "beam_size": 1,
+        "adaptive_whisper": False,
+        "max_beam_size": 1,
+        "use_ner": False,
+        "llm_extraction": False,
+        "llm_soap": False,
+        "llm_repair": False,
+    },
+    "balanced": {
+        "whisper_model": WHISPER_MODEL,
+        "beam_size": 1,
+        "adaptive_whisper": True,
+        "max_beam_size": 1,
+        "use_ner": True,
+        "llm_extraction": False,
+        "llm_soap": True,
+        "llm_repair": False,
+    },
+    "thorough": {
+        "whisper_model": WHISPER_MODEL,
+        "beam_size": WHISPER_BEAM_SIZE,
+        "adaptive_whisper": True,
+        "max_beam_size": None,
+        "use_ner": True,
+        "llm_extraction": True,
+        "llm_soap": True,
+        "llm_repair": True,
+    },
+}
+
+DEFAULT_PIPELINE_MODE = "thorough"
+
+
+def normalize_pipeline_mode(value: str | None) -> str:
+    if value in PIPELINE_MODES:
+        return value
+    return DEFAULT_PIPELINE_MODE
+
+
+def resolve_pipeline_mode(value: str | None) -> dict:
+    mode = normalize_pipeline_mode(value)
+    return {"mode": mode, **PIPELINE_MODES[mode]}
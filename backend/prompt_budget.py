@@ -0,0 +1,227 @@
+"""
+Prompt token budgeting for the Groq calls.
+
+Long consultations put thousands of tokens of greetings and small talk in
+front of the model, alongside pretty-printed JSON payloads. This module
+estimates prompt size, serialises payloads compactly, drops filler turns that
+carry no clinical signal, and trims further only when the prompt would still
+exceed LLM_PROMPT_TOKEN_BUDGET. Turns that contain a clinical marker, a number,
+or overlap an extracted entity span are never dropped.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+import metrics
+from content_validator import check_clinical_markers
+
+# Rough chars-per-token ratio for English prose with the Llama 3 tokenizer.
+# Good enough for budgeting; we never need an exact count.
+CHARS_PER_TOKEN = 4
+
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+
+# A turn made up only of these words is a greeting or acknowledgement.
+# "yes" and "no" are deliberately absent: they are usually answers.
+FILLER_WORDS = {
+    "hi", "hello", "hey", "good", "morning", "afternoon", "evening", "nice",
+    "to", "meet", "you", "thank", "thanks", "okay", "ok", "right", "yeah",
+    "lovely", "great", "perfect", "brilliant", "sure", "alright", "all",
+    "bye", "goodbye", "take", "care", "see", "so", "um", "uh", "erm", "mm",
+    "hmm", "oh", "well", "cool", "fine", "come", "in", "please", "sit",
+    "down", "very", "much", "that's", "it", "worries", "cheers", "there",
+}
+
+_TURN_PATTERN = re.compile(r"[^.?!]+(?:[.?!]+|$)")
+
+TRUNCATION_NOTE = "[Transcript truncated to fit the prompt budget.]"
+
+# Render callback: (transcript_text, json_dumps) -> user message.
+MessageRenderer = Callable[[str, Callable[[object], str]], str]
+
+
+@dataclass
+class TranscriptFit:
+    text: str
+    original_tokens: int
+    tokens: int
+    dropped_turns: int = 0
+    truncated: bool = False
+    kept_turns: list[str] = field(default_factory=list)
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_json(payload: object) -> str:
+    """Serialise a prompt payload without indentation or padding."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def pretty_json(payload: object) -> str:
+    """The previous prompt serialisation, kept to measure what compaction saves."""
+    return json.dumps(payload, indent=2, default=str)
+
+
+def entity_spans(entities: dict | list | None) -> list[tuple[int, int]]:
+    """Collect (start, end) character spans from categorized or flat entity lists."""
+    if not entities:
+        return []
+    if isinstance(entities, dict):
+        items = [item for values in entities.values() for item in (values or [])]
+    else:
+        items = list(entities)
+
+    spans = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        start, end = item.get("start"), item.get("end")
+        if isinstance(start, int) and isinstance(end, int) and end > start:
+            spans.append((start, end))
+    return sorted(spans)
+
+
+def _split_turns(transcription: str) -> list[tuple[int, int, str]]:
+    return [
+        (match.start(), match.end(), match.group().strip())
+        for match in _TURN_PATTERN.finditer(transcription)
+        if match.group().strip()
+    ]
+
+
+def _overlaps(start: int, end: int, spans: list[tuple[int, int]]) -> bool:
+    return any(span_start < end and span_end > start for span_start, span_end in spans)
+
+
+def _is_protected(turn: str, start: int, end: int, spans: list[tuple[int, int]]) -> bool:
+    if _overlaps(start, end, spans):
+        return True
+    if re.search(r"\d", turn):
+        return True
+    return check_clinical_markers(turn)["marker_count"] > 0
+
+
+def _is_filler(turn: str) -> bool:
+    words = re.findall(r"[a-z']+", turn.lower().replace("’", "'"))
+    return bool(words) and all(word in FILLER_WORDS for word in words)
+
+
+def fit_transcript(
+    transcription: str,
+    entities: dict | list | None,
+    budget_tokens: int,
+) -> TranscriptFit:
+    """
+    Compact a transcript so it fits inside `budget_tokens`.
+
+    1. Greeting and filler turns with no clinical signal are always removed.
+    2. If still over budget, the longest unprotected turns are removed next.
+    3. If protected turns alone exceed the budget, the transcript is cut at
+       the last turn that fits and a truncation note is appended.
+
+    Turn order is preserved throughout.
+    """
+    original_tokens = estimate_tokens(transcription)
+    turns = _split_turns(transcription)
+    if not turns:
+        return TranscriptFit(text=transcription, original_tokens=original_tokens, tokens=original_tokens)
+
+    spans = entity_spans(entities)
+    protected = [_is_protected(text, start, end, spans) for start, end, text in turns]
+    # Keep the answer to a clinical question even when the answer alone looks
+    # unremarkable, e.g. "Does it go anywhere?" -> "No, it stays there."
+    for index in range(1, len(turns)):
+        if protected[index - 1] and turns[index - 1][2].endswith("?"):
+            protected[index] = True
+    keep = [
+        is_protected or not _is_filler(text)
+        for (_, _, text), is_protected in zip(turns, protected)
+    ]
+
+    def kept_tokens() -> int:
+        return estimate_tokens(" ".join(text for (_, _, text), kept in zip(turns, keep) if kept))
+
+    if kept_tokens() > budget_tokens:
+        droppable = sorted(
+            (index for index, kept in enumerate(keep) if kept and not protected[index]),
+            key=lambda index: len(turns[index][2]),
+            reverse=True,
+        )
+        for index in droppable:
+            keep[index] = False
+            if kept_tokens() <= budget_tokens:
+                break
+
+    kept = [text for (_, _, text), is_kept in zip(turns, keep) if is_kept]
+    truncated = False
+    if estimate_tokens(" ".join(kept)) > budget_tokens:
+        limit = max(0, budget_tokens - estimate_tokens(TRUNCATION_NOTE))
+        fitted: list[str] = []
+        for text in kept:
+            if estimate_tokens(" ".join(fitted + [text])) > limit:
+                break
+            fitted.append(text)
+        kept = fitted
+        truncated = True
+
+    text = " ".join(kept + ([TRUNCATION_NOTE] if truncated else []))
+    return TranscriptFit(
+        text=text,
+        original_tokens=original_tokens,
+        tokens=estimate_tokens(text),
+        dropped_turns=len(turns) - len(kept),
+        truncated=truncated,
+        kept_turns=kept,
+    )
+
+
+def build_budgeted_message(
+    call_name: str,
+    *,
+    system_prompt: str,
+    transcription: str,
+    entities: dict | list | None,
+    render: MessageRenderer,
+    budget_tokens: int | None = None,
+) -> str:
+    """
+    Render a user message whose total prompt stays under the token ceiling.
+
+    `render(transcript_text, dumps)` must build the full user message. It is
+    called once with compact JSON to size the fixed parts of the prompt, once
+    with the fitted transcript, and once with the raw transcript and
+    pretty-printed JSON to measure how many tokens the budgeting saved.
+    """
+    budget = budget_tokens or LLM_PROMPT_TOKEN_BUDGET
+    system_tokens = estimate_tokens(system_prompt)
+    fixed_tokens = system_tokens + estimate_tokens(render("", compact_json))
+    fitted = fit_transcript(transcription, entities, max(0, budget - fixed_tokens))
+
+    message = render(fitted.text, compact_json)
+    sent_tokens = system_tokens + estimate_tokens(message)
+    baseline_tokens = system_tokens + estimate_tokens(render(transcription, pretty_json))
+    record_prompt_usage(call_name, sent_tokens, baseline_tokens, fitted)
+    return message
+
+
+def record_prompt_usage(call_name: str, sent_tokens: int, baseline_tokens: int, fitted: TranscriptFit) -> None:
+    saved_tokens = max(0, baseline_tokens - sent_tokens)
+    metrics.increment("llm_prompt_calls_total", call=call_name)
+    metrics.increment("llm_prompt_tokens_sent_total", sent_tokens, call=call_name)
+    metrics.increment("llm_prompt_tokens_saved_total", saved_tokens, call=call_name)
+    metrics.observe("llm_prompt_tokens_sent", sent_tokens, call=call_name)
+    if fitted.truncated:
+        metrics.increment("llm_prompt_truncations_total", call=call_name)
+    print(
+        f"Prompt budget [{call_name}]: sent ~{sent_tokens} tokens, saved ~{saved_tokens} tokens "
+        f"({fitted.dropped_turns} transcript turns dropped{', truncated' if fitted.truncated else ''})"
+    )
@@ -0,0 +1,174 @@
+# schema_startup.py
+# What the API does to the database schema when it starts.
+#
+# Why?
+# main.py used to run create_all() plus the added-column, added-index and
+# search-column fallbacks at import time. Each one inspects the catalog
+# (has_table per table, get_columns per table, ...), which is a dozen or more
+# round-trips before the app can serve. That cost repeats on every worker start
+# and every --reload. It also hits anything that merely imports main.
+#
+# Alembic owns the schema: the Dockerfile and scripts/dev-backend.sh run
+# `alembic upgrade head` before uvicorn, and every column and index below has
+# a migration. So by default ("check") startup runs one query, reads
+# alembic_version, and refuses to start unless it matches the head revision
+# of the migration scripts shipped with this code.
+#
+# SCHEMA_STARTUP:
+#   check   (default) one query against alembic_version; fail fast if behind
+#   create  the old fallback for databases without migrations (create_all
+#           plus the ALTER / CREATE INDEX statements below)
+#   off     do nothing
+#
+# Runs from the FastAPI startup hook, never at import time.
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+import history_search
+import models
+import persistence
+
+SCHEMA_STARTUP = os.getenv("SCHEMA_STARTUP", "check").strip().lower()
+SCHEMA_STARTUP_MODES = ("check", "create", "off")
+
+_ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+
+
+# Columns added after the initial schema. create_all() never alters existing
+# tables, so in "create" mode these are added here.
+_ADDED_COLUMNS = {
+    "users": {
+        "note_style_preset": "ALTER TABLE users ADD COLUMN note_style_preset VARCHAR NOT NULL DEFAULT 'balanced'",
+        "preferred_focus": "ALTER TABLE users ADD COLUMN preferred_focus VARCHAR NOT NULL DEFAULT 'general'",
+        "include_bullets_in_plan": "ALTER TABLE users ADD COLUMN include_bullets_in_plan BOOLEAN NOT NULL DEFAULT false",
+        "include_patient_friendly_language": "ALTER TABLE users ADD COLUMN include_patient_friendly_language BOOLEAN NOT NULL DEFAULT false",
+    },
+    "transcriptions": {
+        "encounter_type": "ALTER TABLE transcriptions ADD COLUMN encounter_type VARCHAR",
+        "clinical_representation": "ALTER TABLE transcriptions ADD COLUMN clinical_representation JSON",
+    },
+    "medical_entities": {
+        "category": "ALTER TABLE medical_entities ADD COLUMN category VARCHAR",
+        "user_id": "ALTER TABLE medical_entities ADD COLUMN user_id INTEGER REFERENCES users (id)",
+        "normalized_text": "ALTER TABLE medical_entities ADD COLUMN normalized_text VARCHAR",
+    },
+    "soap_notes": {
+        "quality_report": "ALTER TABLE soap_notes ADD COLUMN quality_report JSON",
+        "quality_score": "ALTER TABLE soap_notes ADD COLUMN quality_score FLOAT",
+        "style_profile": "ALTER TABLE soap_notes ADD COLUMN style_profile JSON",
+    },
+}
+
+# Filled in for existing rows when the column is added above: an UPDATE
+# statement, or a function of the connection.
+_ADDED_COLUMN_BACKFILLS = {
+    ("medical_entities", "user_id"): (
+        "UPDATE medical_entities SET user_id = "
+        "(SELECT user_id FROM transcriptions WHERE transcriptions.id = medical_entities.transcription_id)"
+    ),
+    ("medical_entities", "normalized_text"): persistence.backfill_normalized_text,
+}
+
+# Indexes added after the initial schema (Alembic 20261019_0003 and 0006), for
+# the same reason. IF NOT EXISTS makes this a no-op once they are in place.
+_ADDED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_transcriptions_user_id_created_at "
+    "ON transcriptions (user_id, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_medical_entities_transcription_id "
+    "ON medical_entities (transcription_id)",
+    "CREATE INDEX IF NOT EXISTS ix_medical_entities_user_id_normalized_text "
+    "ON medical_entities (user_id, normalized_text, transcription_id)",
+)
+
+
+def _ensure_added_columns(engine: Engine) -> None:
+    inspector = inspect(engine)
+    table_names = set(inspector.get_table_names())
+
+    missing = []
+    for table_name, required_alters in _ADDED_COLUMNS.items():
+        if table_name not in table_names:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
+        missing.extend((table_name, column) for column in required_alters if column not in existing_columns)
+    if not missing:
+        return
+
+    with engine.begin() as connection:
+        for table_name, column in missing:
+            connection.execute(text(_ADDED_COLUMNS[table_name][column]))
+        for key in missing:
+            backfill = _ADDED_COLUMN_BACKFILLS.get(key)
+            if callable(backfill):
+                backfill(connection)
+            elif backfill is not None:
+                connection.execute(text(backfill))
+
+
+def _ensure_added_indexes(engine: Engine) -> None:
+    with engine.begin() as connection:
+        for statement in _ADDED_INDEXES:
+            connection.execute(text(statement))
+
+
+def create_schema(engine: Engine) -> None:
+    """The "create" mode: build or patch the schema without Alembic."""
+    models.Base.metadata.create_all(bind=engine)
+    _ensure_added_columns(engine)
+    _ensure_added_indexes(engine)
+    # Full-text search columns (Alembic 20261019_0005). PostgreSQL only.
+    history_search.ensure_search_columns(engine)
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """The head revision of the migration scripts next to this file. Reads files only."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    heads = ScriptDirectory.from_config(Config(str(_ALEMBIC_INI))).get_heads()
+    if len(heads) != 1:
+        raise RuntimeError(f"Expected one Alembic head, found {len(heads)}: {', '.join(heads)}")
+    return heads[0]
+
+
+def current_revision(engine: Engine) -> str | None:
+    """The revision stamped in alembic_version, or None if there is none. One query."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except DBAPIError:
+        # No alembic_version table: the database was never migrated. Anything
+        # else (e.g. the database is unreachable) is re-raised as is.
+        if inspect(engine).has_table("alembic_version"):
+            raise
+        return None
+
+
+def check_schema(engine: Engine) -> None:
+    """The "check" mode: raise unless the database is at the head revision."""
+    expected = head_revision()
+    found = current_revision(engine)
+    if found != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {found or '(none)'}, this code needs {expected}. "
+            "Run `alembic -c alembic.ini upgrade head` from backend/, "
+            "or set SCHEMA_STARTUP=create for a database managed without migrations."
+        )
+
+
+def prepare(engine: Engine, mode: str = SCHEMA_STARTUP) -> None:
+    if mode == "check":
+        check_schema(engine)
+    elif mode == "create":
+        create_schema(engine)
+    elif mode != "off":
+        raise RuntimeError(f"SCHEMA_STARTUP must be one of {', '.join(SCHEMA_STARTUP_MODES)}, not {mode!r}")
@@ -9,8 +9,8 @@
 # independently from the schema.
 
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Literal
-from datetime import datetime
+from typing import Any, Optional, List, Literal
+from datetime import date, datetime
 
 
 # ── Auth ──────────────────────────────────────────────────────────────────────
@@ -82,6 +82,7 @@ class EntityOut(BaseModel):
     confidence: float
     start:      int
     end:        int
+    category:   Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -93,6 +94,9 @@ class SoapNoteOut(BaseModel):
     assessment: Optional[str]
     plan:       Optional[str]
     source:     Optional[str]
+    quality_report: Optional[dict[str, Any]] = None
+    quality_score:  Optional[float] = None
+    style_profile:  Optional[dict[str, Any]] = None
 
     class Config:
         from_attributes = True
@@ -107,8 +111,68 @@ class HistoryEntryOut(BaseModel):
     duration:         Optional[str]
     status:           str
     created_at:       datetime
+    encounter_type:   Optional[str] = None
+    clinical_representation: Optional[dict[str, Any]] = None
     entities:         List[EntityOut]
     soap_note:        Optional[SoapNoteOut]
 
     class Config:
         from_attributes = True
+
+
+class HistorySummaryOut(BaseModel):
+    # One row of the paginated history list: no transcript text, no entities.
+    id:               int
+    patient_id:       str
+    filename:         str
+    confidence_score: float
+    duration:         Optional[str]
+    status:           str
+    created_at:       datetime
+    encounter_type:   Optional[str] = None
+    entity_count:     int
+    soap_source:      Optional[str] = None
+    quality_score:    Optional[float] = None
+
+
+class HistoryPageOut(BaseModel):
+    items:       List[HistorySummaryOut]
+    # Pass back as ?cursor= for the next (older) page; null on the last page.
+    next_cursor: Optional[str] = None
+
+
+class HistorySearchResultOut(HistorySummaryOut):
+    rank:               float
+    # Matching fragments with hits wrapped in <mark>...</mark>; null when that
+    # text did not match (and always null outside PostgreSQL).
+    transcript_snippet: Optional[str] = None
+    soap_snippet:       Optional[str] = None
+
+
+class HistorySearchPageOut(BaseModel):
+    items:       List[HistorySearchResultOut]
+    next_cursor: Optional[str] = None
+
+
+class DailyActivityOut(BaseModel):
+    day:            date
+    transcriptions: int
+
+
+class HistoryStatsOut(BaseModel):
+    transcription_count:    int
+    average_confidence:     Optional[float] = None   # 0-100; null with no history
+    total_duration_seconds: int
+    entity_count:           int
+    entities_by_category:   dict[str, int]
+    daily_activity:         List[DailyActivityOut]    # oldest first; days without activity omitted
+
+
+class RegenerateRequest(BaseModel):
+    # Every field is optional; omitted fields keep the values the note was
+    # last generated with.
+    encounter_type: Optional[Literal["acute_visit", "follow_up", "counselling_education", "medication_review"]] = None
+    note_style_preset: Optional[Literal["balanced", "concise", "detailed"]] = None
+    preferred_focus: Optional[Literal["general", "symptom_driven", "assessment_driven", "plan_driven"]] = None
+    include_bullets_in_plan: Optional[bool] = None
+    include_patient_friendly_language: Optional[bool] = None
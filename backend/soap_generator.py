@@ -6,12 +6,17 @@ Fallback path: Rule-based generation if API call fails.
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
+import asyncio
 import json
 import re
+import time
 from datetime import datetime
-from groq import Groq
+from typing import Callable
 from documentation_style import DEFAULT_STYLE_PROFILE, resolve_style_profile
+from llm_gateway import gateway
+from prompt_budget import build_budgeted_message, compact_json
+from soap_stream import SoapSectionStreamParser
+import metrics
 
 INSUFFICIENT_SECTION_TEXT = "Not enough information in the recording to complete this section."
 
@@ -33,11 +38,14 @@ MONTH_NAME_TO_NUMBER = {
 # Public entry point
 # ---------------------------------------------------------------------------
 
-def generate_soap_note(
+async def generate_soap_note(
     transcription: str,
     categorized_entities: dict,
     clinical_representation: dict | None = None,
     style_profile: dict | None = None,
+    on_section: Callable[[str, str], None] | None = None,
+    use_llm: bool = True,
+    llm_repair: bool = True,
 ) -> dict:
     """
     Generate a SOAP note from transcribed text and categorized medical entities.
@@ -47,10 +55,21 @@ def generate_soap_note(
     function falls back to the rule-based generator so the rest of the
     pipeline always receives a valid SOAP dict.
 
+    Groq calls are awaited through the LLM gateway; the rule-based repair
+    and scoring passes run in a worker thread to keep the event loop free.
+
     Args:
         transcription: Full transcription text.
         categorized_entities: Dict of entity lists keyed by category name
                               (symptoms, conditions, medications, procedures).
+        on_section: Optional callback. When given, the Groq completion is
+                    streamed and on_section(name, text) is called with each
+                    draft section as soon as the model finishes writing it.
+                    Drafts are pre-repair; the returned dict is final.
+        use_llm: False goes straight to the rule-based generator (the
+                 "fast" pipeline mode).
+        llm_repair: False keeps weak-section repair on the rule-based path
+                    instead of regenerating sections with Groq.
 
     Returns:
         Dict with keys: generated_at, subjective, objective, assessment, plan.
@@ -58,37 +77,45 @@ def generate_soap_note(
         a structured dict (fallback path) — the frontend handles both shapes.
     """
     resolved_style_profile = resolve_style_profile(overrides=style_profile or DEFAULT_STYLE_PROFILE)
-    try:
-        soap = _generate_with_groq(
-            transcription,
-            categorized_entities,
-            clinical_representation,
-            resolved_style_profile,
-        )
-        soap = _validate_and_repair_soap_note(transcription, soap, clinical_representation or {})
-        if resolved_style_profile["include_bullets_in_plan"]:
-            soap["plan"] = _format_plan_with_bullets(str(soap.get("plan", "")))
-        soap["generated_at"] = datetime.now().isoformat()
-        soap["source"] = "groq-llama-3.1-70b-versatile"
-        soap["resolved_style_profile"] = resolved_style_profile
-        print("SOAP note generated via Groq llama-3.3-70b-versatile")
-        return soap
-    except Exception as exc:
-        print(f"Groq SOAP generation failed: {exc}")
-        print("Falling back to rule-based SOAP generation")
-        soap = _generate_fallback(
-            transcription,
-            categorized_entities,
-            clinical_representation or {},
-            resolved_style_profile,
-        )
-        soap = _validate_and_repair_soap_note(transcription, soap, clinical_representation or {})
-        if resolved_style_profile["include_bullets_in_plan"]:
-            soap["plan"] = _format_plan_with_bullets(str(soap.get("plan", "")))
-        soap["generated_at"] = datetime.now().isoformat()
-        soap["source"] = "rule-based-fallback"
-        soap["resolved_style_profile"] = resolved_style_profile
-        return soap
+    if use_llm:
+        try:
+            soap = await _generate_with_groq(
+                transcription,
+                categorized_entities,
+                clinical_representation,
+                resolved_style_profile,
+                on_section=on_section,
+            )
+            soap = await _validate_and_repair_soap_note(
+                transcription, soap, clinical_representation or {}, llm_repair=llm_repair,
+            )
+            if resolved_style_profile["include_bullets_in_plan"]:
+                soap["plan"] = _format_plan_with_bullets(str(soap.get("plan", "")))
+            soap["generated_at"] = datetime.now().isoformat()
+            soap["source"] = "groq-llama-3.1-70b-versatile"
+            soap["resolved_style_profile"] = resolved_style_profile
+            print("SOAP note generated via Groq llama-3.3-70b-versatile")
+            return soap
+        except Exception as exc:
+            print(f"Groq SOAP generation failed: {exc}")
+            print("Falling back to rule-based SOAP generation")
+
+    soap = await asyncio.to_thread(
+        _generate_fallback,
+        transcription,
+        categorized_entities,
+        clinical_representation or {},
+        resolved_style_profile,
+    )
+    soap = await _validate_and_repair_soap_note(
+        transcription, soap, clinical_representation or {}, llm_repair=use_llm and llm_repair,
+    )
+    if resolved_style_profile["include_bullets_in_plan"]:
+        soap["plan"] = _format_plan_with_bullets(str(soap.get("plan", "")))
+    soap["generated_at"] = datetime.now().isoformat()
+    soap["source"] = "rule-based-fallback"
+    soap["resolved_style_profile"] = resolved_style_profile
+    return soap
 
 
 # ---------------------------------------------------------------------------
@@ -117,13 +144,24 @@ def _build_entity_summary(categorized_entities: dict) -> str:
     return "\n".join(lines) if lines else "No specific entities extracted."
 
 
-def _build_clinical_representation_summary(clinical_representation: dict | None) -> str:
+def _build_clinical_representation_summary(clinical_representation: dict | None, dumps=compact_json) -> str:
     if not clinical_representation:
         return "No structured clinical representation available."
-    return json.dumps(clinical_representation, indent=2)
+    return dumps(_clinical_representation_prompt_view(clinical_representation))
+
 
+def _clinical_representation_prompt_view(clinical_representation: dict) -> dict:
+    # source_entities repeats the entity summary that is already in the prompt,
+    # and structured_at / extraction_source are bookkeeping the model has no
+    # use for.
+    return {
+        key: value
+        for key, value in clinical_representation.items()
+        if key not in ("source_entities", "structured_at", "extraction_source")
+    }
 
-def _build_style_profile_summary(style_profile: dict | None) -> str:
+
+def _build_style_profile_summary(style_profile: dict | None, dumps=compact_json) -> str:
     resolved = resolve_style_profile(overrides=style_profile or DEFAULT_STYLE_PROFILE)
     preset = resolved["note_style_preset"]
     focus = resolved["preferred_focus"]
@@ -153,10 +191,10 @@ def _build_style_profile_summary(style_profile: dict | None) -> str:
             "Where counselling language is already supported by the transcript, use clearer patient-friendly phrasing without simplifying diagnoses inaccurately."
         )
 
-    return json.dumps({
+    return dumps({
         "resolved_style_profile": resolved,
         "generation_instructions": instructions,
-    }, indent=2)
+    })
 
 
 def _extract_patient_context(transcription: str) -> dict:
@@ -453,11 +491,12 @@ Rules:
 """
 
 
-def _generate_with_groq(
+async def _generate_with_groq(
     transcription: str,
     categorized_entities: dict,
     clinical_representation: dict | None = None,
     style_profile: dict | None = None,
+    on_section: Callable[[str, str], None] | None = None,
 ) -> dict:
     """
     Call Groq API and parse the JSON response into a SOAP dict.
@@ -465,35 +504,36 @@ def _generate_with_groq(
     Raises an exception if the API call fails or the response cannot be
     parsed as valid JSON with the required four keys — the caller catches
     this and falls back to rule-based generation.
+
+    With `on_section`, the completion is streamed and each section is handed
+    to the callback as soon as its JSON value closes.
     """
-    # Prefer GROQ_API_KEY, but allow OPENAI_API_KEY for backward compatibility
-    # with older project setup/docs.
-    client = _get_groq_client()
     entity_summary = _build_entity_summary(categorized_entities)
     patient_context = _extract_patient_context(transcription)
-    structured_summary = _build_clinical_representation_summary(clinical_representation)
-    style_summary = _build_style_profile_summary(style_profile)
-
-    user_message = (
-        f"Transcript:\n{transcription}\n\n"
-        f"Prompt metadata:\n{json.dumps(patient_context, indent=2)}\n\n"
-        f"Structured clinical representation:\n{structured_summary}\n\n"
-        f"Documentation style profile:\n{style_summary}\n\n"
-        f"Extracted medical entities:\n{entity_summary}\n\n"
-        "Generate the SOAP note as JSON."
-    )
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": _SYSTEM_PROMPT},
-            {"role": "user", "content": user_message},
-        ],
-        temperature=0.3,
-        max_tokens=1000,
+    user_message = build_budgeted_message(
+        "soap_generation",
+        system_prompt=_SYSTEM_PROMPT,
+        transcription=transcription,
+        entities=categorized_entities,
+        render=lambda transcript, dumps: (
+            f"Transcript:\n{transcript}\n\n"
+            f"Prompt metadata:\n{dumps(patient_context)}\n\n"
+            f"Structured clinical representation:\n{_build_clinical_representation_summary(clinical_representation, dumps)}\n\n"
+            f"Documentation style profile:\n{_build_style_profile_summary(style_profile, dumps)}\n\n"
+            f"Extracted medical entities:\n{entity_summary}\n\n"
+            "Generate the SOAP note as JSON."
+        ),
     )
 
-    raw = response.choices[0].message.content
+    messages = [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": user_message},
+    ]
+    if on_section is None:
+        raw = await gateway.complete("soap_generation", messages, temperature=0.3, max_tokens=1000)
+    else:
+        raw = await _stream_soap_completion(messages, on_section)
 
     # Strip markdown code fences that the model sometimes adds despite instructions.
     raw = raw.replace("```json", "").replace("```", "").strip()
@@ -509,41 +549,67 @@ def _generate_with_groq(
     return soap
 
 
-def _get_groq_client() -> Groq:
-    api_key = os.getenv("GROQ_API_KEY") or os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise EnvironmentError(
-            "Missing API key. Set GROQ_API_KEY (preferred) in your environment or .env file."
-        )
-    return Groq(api_key=api_key)
+async def _stream_soap_completion(messages: list[dict], on_section: Callable[[str, str], None]) -> str:
+    """
+    Stream the SOAP completion, forwarding each section as it closes, and
+    return the full raw text for the usual parse and validation.
+    """
+    started_at = time.perf_counter()
+
+    def forward(section: str, value: object) -> None:
+        if len(parser.emitted) == 1:
+            metrics.observe("soap_stream_first_section_seconds", time.perf_counter() - started_at)
+        text = value.strip() if isinstance(value, str) else compact_json(value)
+        try:
+            on_section(section, text or INSUFFICIENT_SECTION_TEXT)
+        except Exception as exc:
+            # A broken progress consumer must not cost us the note.
+            print(f"SOAP section callback failed for {section}: {exc}")
+
+    parser = SoapSectionStreamParser(forward)
+    raw = await gateway.complete(
+        "soap_generation",
+        messages,
+        temperature=0.3,
+        max_tokens=1000,
+        on_delta=parser.feed,
+    )
+    metrics.observe("soap_stream_total_seconds", time.perf_counter() - started_at)
+    return raw
 
 
-def _regenerate_section_with_groq(
+async def _regenerate_section_with_groq(
     section: str,
     transcription: str,
     current_soap: dict,
     clinical_representation: dict,
     section_issues: list[str],
 ) -> str:
-    client = _get_groq_client()
     payload = {
         "requested_section": section,
         "current_section_text": current_soap.get(section, ""),
         "other_sections": {k: current_soap.get(k, "") for k in ("subjective", "objective", "assessment", "plan") if k != section},
         "section_issues": section_issues,
-        "structured_clinical_representation": clinical_representation,
+        "structured_clinical_representation": _clinical_representation_prompt_view(clinical_representation),
         "prompt_metadata": _extract_patient_context(transcription),
     }
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
+    user_message = build_budgeted_message(
+        "soap_section_repair",
+        system_prompt=_SECTION_REGEN_PROMPT,
+        transcription=transcription,
+        entities=None,
+        render=lambda transcript, dumps: f"Transcript:\n{transcript}\n\nRepair payload:\n{dumps(payload)}",
+    )
+    raw = await gateway.complete(
+        "soap_section_repair",
+        [
             {"role": "system", "content": _SECTION_REGEN_PROMPT},
-            {"role": "user", "content": f"Transcript:\n{transcription}\n\nRepair payload:\n{json.dumps(payload, indent=2)}"},
+            {"role": "user", "content": user_message},
         ],
         temperature=0.1,
         max_tokens=650,
     )
-    raw = response.choices[0].message.content.replace("```json", "").replace("```", "").strip()
+    raw = raw.replace("```json", "").replace("```", "").strip()
     parsed = json.loads(raw)
     if section not in parsed:
         raise ValueError(f"Section regeneration response missing key: {section}")
@@ -968,10 +1034,34 @@ def _apply_clinical_consistency_rules(transcription: str, soap: dict) -> dict:
     return soap
 
 
-def _validate_and_repair_soap_note(transcription: str, soap: dict, clinical_representation: dict) -> dict:
+async def _validate_and_repair_soap_note(
+    transcription: str,
+    soap: dict,
+    clinical_representation: dict,
+    llm_repair: bool = True,
+) -> dict:
     """
     Apply a grounded validation/repair pass after initial generation.
     """
+    soap, quality_report = await asyncio.to_thread(_repair_draft_soap_note, transcription, soap, clinical_representation)
+
+    if (not quality_report["passes_threshold"]) or any(quality_report["section_issues"].values()):
+        regenerated = await _regenerate_weak_sections(
+            transcription, soap, clinical_representation, quality_report, llm_repair=llm_repair,
+        )
+        regenerated, regenerated_report = await asyncio.to_thread(
+            _repair_regenerated_soap_note, transcription, regenerated, clinical_representation,
+        )
+        if regenerated_report["overall_score"] >= quality_report["overall_score"]:
+            soap = regenerated
+            quality_report = regenerated_report
+
+    soap["quality_report"] = quality_report
+    soap["quality_score"] = quality_report["overall_score"]
+    return soap
+
+
+def _repair_draft_soap_note(transcription: str, soap: dict, clinical_representation: dict) -> tuple[dict, dict]:
     soap = _normalize_soap_sections(soap)
     soap = _apply_clinical_consistency_rules(transcription, soap)
 
@@ -982,25 +1072,18 @@ def _validate_and_repair_soap_note(transcription: str, soap: dict, clinical_repr
 
     soap = _normalize_soap_sections(soap)
     soap = _apply_clinical_consistency_rules(transcription, soap)
-    quality_report = _score_soap_quality(transcription, soap, clinical_representation)
+    return soap, _score_soap_quality(transcription, soap, clinical_representation)
 
-    if (not quality_report["passes_threshold"]) or any(quality_report["section_issues"].values()):
-        regenerated = _regenerate_weak_sections(transcription, soap, clinical_representation, quality_report)
+
+def _repair_regenerated_soap_note(transcription: str, regenerated: dict, clinical_representation: dict) -> tuple[dict, dict]:
+    regenerated = _normalize_soap_sections(regenerated)
+    regenerated = _apply_clinical_consistency_rules(transcription, regenerated)
+    regenerated_issues = _collect_soap_issues(transcription, regenerated, clinical_representation)
+    if regenerated_issues:
+        regenerated = _repair_soap_with_rules(transcription, regenerated, clinical_representation, regenerated_issues)
         regenerated = _normalize_soap_sections(regenerated)
         regenerated = _apply_clinical_consistency_rules(transcription, regenerated)
-        regenerated_issues = _collect_soap_issues(transcription, regenerated, clinical_representation)
-        if regenerated_issues:
-            regenerated = _repair_soap_with_rules(transcription, regenerated, clinical_representation, regenerated_issues)
-            regenerated = _normalize_soap_sections(regenerated)
-            regenerated = _apply_clinical_consistency_rules(transcription, regenerated)
-        regenerated_report = _score_soap_quality(transcription, regenerated, clinical_representation)
-        if regenerated_report["overall_score"] >= quality_report["overall_score"]:
-            soap = regenerated
-            quality_report = regenerated_report
-
-    soap["quality_report"] = quality_report
-    soap["quality_score"] = quality_report["overall_score"]
-    return soap
+    return regenerated, _score_soap_quality(transcription, regenerated, clinical_representation)
 
 
 def _collect_soap_issues(transcription: str, soap: dict, clinical_representation: dict) -> list[str]:
@@ -1164,7 +1247,13 @@ def _score_soap_quality(transcription: str, soap: dict, clinical_representation:
     }
 
 
-def _regenerate_weak_sections(transcription: str, soap: dict, clinical_representation: dict, quality_report: dict) -> dict:
+async def _regenerate_weak_sections(
+    transcription: str,
+    soap: dict,
+    clinical_representation: dict,
+    quality_report: dict,
+    llm_repair: bool = True,
+) -> dict:
     updated = dict(soap)
     section_issues = quality_report.get("section_issues", {})
     section_scores = quality_report.get("section_scores", {})
@@ -1180,18 +1269,21 @@ def _regenerate_weak_sections(transcription: str, soap: dict, clinical_represent
         if section == "plan" and encounter_type == "acute_visit" and str(updated.get("plan", "")).strip():
             continue
 
-        try:
-            regenerated = _regenerate_section_with_groq(
-                section,
-                transcription,
-                updated,
-                clinical_representation,
-                issues,
-            )
-            print(f"Regenerated {section} via Groq")
-        except Exception as exc:
-            print(f"Section regeneration via Groq failed for {section}: {exc}")
+        if not llm_repair:
             regenerated = _regenerate_section_with_rules(section, transcription, clinical_representation)
+        else:
+            try:
+                regenerated = await _regenerate_section_with_groq(
+                    section,
+                    transcription,
+                    updated,
+                    clinical_representation,
+                    issues,
+                )
+                print(f"Regenerated {section} via Groq")
+            except Exception as exc:
+                print(f"Section regeneration via Groq failed for {section}: {exc}")
+                regenerated = _regenerate_section_with_rules(section, transcription, clinical_representation)
 
         if regenerated:
             updated[section] = regenerated
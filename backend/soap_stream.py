@@ -0,0 +1,111 @@
+"""
+Incremental parsing of a streamed SOAP note completion.
+
+The SOAP prompt asks the model for a single JSON object with the keys
+subjective, objective, assessment and plan. When the completion is streamed,
+each section's value is complete as soon as its closing quote (or closing
+brace, for the rare dict-shaped section) arrives, long before the whole object
+is finished. SoapSectionStreamParser watches the token stream and reports each
+top-level section the moment its value closes, so the caller can forward it to
+the browser while the model is still writing the later sections.
+
+The parser only tracks top-level keys of the first JSON object in the stream.
+Anything before the opening brace (e.g. a ```json fence) is ignored. Final
+validation is still done by json.loads on the full text once the stream ends.
+"""
+from __future__ import annotations
+
+import json
+from typing import Callable
+
+SOAP_SECTIONS = ("subjective", "objective", "assessment", "plan")
+
+SectionCallback = Callable[[str, object], None]
+
+
+class SoapSectionStreamParser:
+    def __init__(self, on_section: SectionCallback):
+        self._on_section = on_section
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._value_start: int | None = None
+        self._expecting_value = False
+        self._pending_key: str | None = None
+        self._done = False
+        self.emitted: dict[str, object] = {}
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far, for the final json.loads."""
+        return self._text
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        self._text += chunk
+        if self._done:
+            return
+        text = self._text
+
+        while self._pos < len(text):
+            index = self._pos
+            char = text[index]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_top_level_string(index)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._value_start = index
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and self._expecting_value:
+                    self._value_start = index
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._emit(text[self._value_start:index + 1])
+                elif self._depth <= 0:
+                    self._done = True
+                    return
+            elif self._depth == 1:
+                if char == ":":
+                    self._expecting_value = True
+                elif char == ",":
+                    self._expecting_value = False
+                    self._pending_key = None
+
+    def _close_top_level_string(self, end_index: int) -> None:
+        literal = self._text[self._value_start:end_index + 1]
+        if self._expecting_value:
+            self._emit(literal)
+        else:
+            self._pending_key = json.loads(literal)
+            self._value_start = None
+
+    def _emit(self, literal: str) -> None:
+        key = self._pending_key
+        self._value_start = None
+        self._pending_key = None
+        self._expecting_value = False
+        if key not in SOAP_SECTIONS or key in self.emitted:
+            return
+        try:
+            value = json.loads(literal)
+        except ValueError:
+            return
+        self.emitted[key] = value
+        self._on_section(key, value)
@@ -0,0 +1,174 @@
+# stage_cache.py
+# Content-addressed memoization for the transcription pipeline stages.
+#
+# Every stage is a pure function of its inputs: normalization of the raw
+# transcript, validation and NER of the corrected text, clinical extraction of
+# text + entities + encounter type, SOAP generation of those + style profile.
+# A stage's output is stored under sha256(stage, stage version, canonical JSON
+# of its inputs), so a retry, a restyle or a reprocess skips every stage whose
+# inputs have not changed — with no per-feature special cases.
+#
+# Stage versions are fingerprints of the source files (code and lexicons) the
+# stage depends on, so editing the spell-correction dictionary or a SOAP
+# prompt invalidates exactly the affected stages. Bump STAGE_CACHE_SCHEMA to
+# flush everything, e.g. after changing the shape of a cached result.
+#
+# Values are deep-copied on the way in and out: downstream stages mutate
+# entity dicts and representations in place, and must never write through to
+# the cache. Results produced by a fallback path (Groq unavailable) are not
+# cached, so the next run retries the better path.
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, TypeVar
+
+import metrics
+
+STAGE_CACHE_SCHEMA = 1
+STAGE_CACHE_MAX_ENTRIES = int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "256"))
+
+_BACKEND_DIR = Path(__file__).resolve().parent
+
+# Source files each stage's output depends on.
+STAGE_SOURCES = {
+    "transcription": (
+        "transcription.py",
+        "whisper_backends/__init__.py",  # segment_metadata(): the cached segment shape
+        "whisper_backends/faster_whisper_backend.py",
+        "whisper_backends/openai_whisper_backend.py",
+    ),
+    "normalization": ("spell_correction.py", "medical_categories.py"),
+    "validation": ("content_validator.py", "medical_categories.py"),
+    "entities": ("entity_extraction.py", "medical_categories.py"),
+    "clinical_representation": ("clinical_extraction.py", "prompt_budget.py"),
+    "soap": ("soap_generator.py", "soap_stream.py", "documentation_style.py", "prompt_budget.py"),
+}
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+def _source_fingerprint(filenames: tuple[str, ...]) -> str:
+    digest = hashlib.sha256(str(STAGE_CACHE_SCHEMA).encode())
+    for filename in filenames:
+        path = _BACKEND_DIR / filename
+        digest.update(filename.encode())
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+STAGE_VERSIONS = {stage: _source_fingerprint(sources) for stage, sources in STAGE_SOURCES.items()}
+
+
+def stage_key(stage: str, inputs: Any) -> str:
+    """Hash a stage name, its version and its canonicalised inputs."""
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    payload = f"{stage}\x00{STAGE_VERSIONS.get(stage, '')}\x00{canonical}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    def __init__(self, max_entries: int = STAGE_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits: dict[str, int] = {}
+        self._misses: dict[str, int] = {}
+
+    def run(
+        self,
+        stage: str,
+        inputs: Any,
+        compute: Callable[[], T],
+        cacheable: Callable[[T], bool] | None = None,
+    ) -> T:
+        """
+        Return the cached output of `stage` for `inputs`, or call `compute()`
+        and cache its result. `cacheable(result)` may veto caching, e.g. for
+        results produced by a fallback path.
+        """
+        key = stage_key(stage, inputs)
+        cached = self._lookup(stage, key)
+        if cached is not _MISSING:
+            return cached
+        result = compute()
+        self._store(key, result, cacheable)
+        return result
+
+    async def run_async(
+        self,
+        stage: str,
+        inputs: Any,
+        compute: Callable[[], Awaitable[T]],
+        cacheable: Callable[[T], bool] | None = None,
+    ) -> T:
+        """Same as run(), for stages that are awaited on a stage executor."""
+        key = stage_key(stage, inputs)
+        cached = self._lookup(stage, key)
+        if cached is not _MISSING:
+            return cached
+        result = await compute()
+        self._store(key, result, cacheable)
+        return result
+
+    def _lookup(self, stage: str, key: str) -> Any:
+        with self._lock:
+            cached = self._entries.get(key, _MISSING)
+            if cached is _MISSING:
+                self._misses[stage] = self._misses.get(stage, 0) + 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits[stage] = self._hits.get(stage, 0) + 1
+
+        if cached is _MISSING:
+            metrics.increment("stage_cache_requests_total", stage=stage, result="miss")
+            return _MISSING
+        metrics.increment("stage_cache_requests_total", stage=stage, result="hit")
+        print(f"Stage cache hit: {stage}")
+        return copy.deepcopy(cached)
+
+    def _store(self, key: str, result: Any, cacheable: Callable[[Any], bool] | None) -> None:
+        if self._max_entries <= 0 or (cacheable is not None and not cacheable(result)):
+            return
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Per-stage hit/miss counts and hit rate, for GET /metrics."""
+        with self._lock:
+            stages = sorted(set(self._hits) | set(self._misses))
+            per_stage = {}
+            for stage in stages:
+                hits = self._hits.get(stage, 0)
+                misses = self._misses.get(stage, 0)
+                per_stage[stage] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                    "version": STAGE_VERSIONS.get(stage),
+                }
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "stages": per_stage,
+            }
+
+
+cache = StageCache()
@@ -0,0 +1,169 @@
+# stage_executor.py
+# Dedicated, size-limited executors for the transcription pipeline stages.
+#
+# Why not run_in_threadpool for everything?
+# Whisper decoding, scispaCy NER and rapidfuzz correction are CPU-bound Python
+# (or hold the GIL for long stretches). Run on threads inside the API process
+# they starve the event loop and every other request — auth, history, health —
+# slows down while a transcription is in flight. They also share Starlette's
+# default threadpool with every sync endpoint.
+#
+# Two pools instead:
+# - CPU pool: a process pool (spawn) for model work. Each worker loads Whisper
+#   and scispaCy once in its initializer. Targets are passed as "module:function"
+#   strings and resolved inside the worker, so nothing heavy is pickled and the
+#   API process itself never loads the models. CPU_STAGE_WORKERS=0 falls back
+#   to a single in-process thread (useful on machines too small for a second
+#   copy of the models).
+# - I/O pool: a thread pool for blocking database work.
+#
+# Thread counts inside the CPU workers, and how many jobs may be in a model
+# stage at once, come from cpu_budget.py.
+#
+# Groq calls need neither pool: they are awaited on the event loop through
+# llm_gateway.py, which applies the concurrency and rate limits.
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+import metrics
+
+CPU_STAGE_WORKERS = int(os.getenv("CPU_STAGE_WORKERS", "1"))
+IO_STAGE_WORKERS = int(os.getenv("IO_STAGE_WORKERS", "8"))
+
+# Imported (and warmed up) once per CPU worker so the first job does not pay
+# for model loading.
+CPU_STAGE_PRELOAD = (
+    "whisper_tiers:load_tier_models",
+    "entity_extraction",
+    "spell_correction",
+    "content_validator",
+)
+
+T = TypeVar("T")
+
+
+def _resolve(target: str) -> Any:
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+
+def _call_target(target: str, args: tuple, kwargs: dict) -> Any:
+    return _resolve(target)(*args, **kwargs)
+
+
+def _initialize_worker(preload: tuple[str, ...] = CPU_STAGE_PRELOAD) -> None:
+    started_at = time.perf_counter()
+    # Before any model library is imported: BLAS/OpenMP size their pools once.
+    from cpu_budget import apply_worker_limits
+
+    apply_worker_limits()
+    for target in preload:
+        resolved = _resolve(target)
+        if ":" in target:
+            resolved()
+    print(f"CPU stage worker {os.getpid()} ready in {time.perf_counter() - started_at:.1f}s")
+
+
+class StageExecutor:
+    def __init__(self, cpu_workers: int = CPU_STAGE_WORKERS, io_workers: int = IO_STAGE_WORKERS):
+        self._cpu_workers = cpu_workers
+        self._io_workers = io_workers
+        self._cpu_pool: Executor | None = None
+        self._io_pool: ThreadPoolExecutor | None = None
+
+    @property
+    def cpu_mode(self) -> str:
+        return "process" if self._cpu_workers > 0 else "thread"
+
+    def start(self) -> None:
+        """Create the pools and warm up the CPU workers. Called on app startup."""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=self._io_workers, thread_name_prefix="io-stage")
+        if self._cpu_pool is None:
+            self._cpu_pool = self._create_cpu_pool()
+            # Block until every worker has loaded its models; a missing model
+            # should fail startup, not the first upload.
+            warmups = [
+                self._cpu_pool.submit(_call_target, "stage_executor:_noop", (), {})
+                for _ in range(max(1, self._cpu_workers))
+            ]
+            for future in warmups:
+                future.result()
+        print(f"Stage executor started: cpu={self.cpu_mode} x{max(1, self._cpu_workers)}, io=thread x{self._io_workers}")
+
+    def shutdown(self) -> None:
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+
+    async def run_cpu(self, target: str, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a CPU-bound stage, given as "module:function", on the CPU pool.
+        Arguments and the return value must be picklable.
+        """
+        if self._cpu_pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._cpu_pool, _call_target, target, args, kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed mid-decode). Replace the pool so
+            # the next job gets fresh workers, and fail this one.
+            print("CPU stage pool broken; restarting workers")
+            metrics.increment("stage_executor_pool_restarts_total", pool="cpu")
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+            raise
+        finally:
+            metrics.observe("stage_executor_seconds", time.perf_counter() - started_at, pool="cpu", target=target)
+
+    async def run_io(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking I/O-bound call (database) on the I/O pool."""
+        if self._io_pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._io_pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            metrics.observe(
+                "stage_executor_seconds",
+                time.perf_counter() - started_at,
+                pool="io",
+                target=getattr(fn, "__name__", "call"),
+            )
+
+    def _create_cpu_pool(self) -> Executor:
+        if self._cpu_workers <= 0:
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cpu-stage")
+            pool.submit(_initialize_worker).result()
+            return pool
+        # spawn, not fork: forking a process that already runs an event loop
+        # and a thread pool is unsafe, and torch/ctranslate2 do not survive it.
+        return ProcessPoolExecutor(
+            max_workers=self._cpu_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker,
+        )
+
+
+def _noop() -> None:
+    return None
+
+
+executor = StageExecutor()
@@ -0,0 +1,35 @@
+import pytest
+
+from job_events import JobAccessError, JobConflictError, JobEventBroker
+
+
+def test_upload_reuses_channel_opened_by_waiting_subscriber():
+    broker = JobEventBroker()
+    waiting = broker.open("job-00001", owner_id=1)
+    assert broker.start("job-00001", owner_id=1) is waiting
+    broker.publish("job-00001", "stage", {"stage": "transcription"})
+    assert [event["event"] for event in waiting.events] == ["stage"]
+
+
+def test_second_upload_on_same_job_id_conflicts():
+    broker = JobEventBroker()
+    broker.start("job-00001", owner_id=1)
+    with pytest.raises(JobConflictError):
+        broker.start("job-00001", owner_id=1)
+
+
+def test_finished_job_id_cannot_be_restarted():
+    broker = JobEventBroker()
+    channel = broker.start("job-00001", owner_id=1)
+    broker.publish("job-00001", "complete", {})
+    with pytest.raises(JobConflictError):
+        broker.start("job-00001", owner_id=1)
+    # Subscribers may still read the finished run until it is pruned.
+    assert broker.open("job-00001", owner_id=1) is channel
+
+
+def test_other_users_job_id_is_refused():
+    broker = JobEventBroker()
+    broker.open("job-00001", owner_id=1)
+    with pytest.raises(JobAccessError):
+        broker.start("job-00001", owner_id=2)
@@ -0,0 +1,16 @@
+import transcription
+
+
+def test_first_pass_defaults_to_one_size_smaller(monkeypatch):
+    monkeypatch.setattr(transcription, "WHISPER_FIRST_PASS_MODEL", "auto")
+    assert transcription.first_pass_model("small.en") == "base.en"
+    assert transcription.first_pass_model("base.en") == "tiny.en"
+    assert transcription.first_pass_model("large-v3") == "medium"
+    assert transcription.first_pass_model("tiny.en") == "tiny.en"
+
+
+def test_first_pass_empty_setting_opts_out(monkeypatch):
+    monkeypatch.setattr(transcription, "WHISPER_FIRST_PASS_MODEL", "")
+    assert transcription.first_pass_model("base.en") == "base.en"
+    monkeypatch.setattr(transcription, "WHISPER_FIRST_PASS_MODEL", "tiny.en")
+    assert transcription.first_pass_model("small.en") == "tiny.en"
@@ -0,0 +1,24 @@
+from whisper_tiers import WhisperTierManager, parse_tiers
+
+LADDER = parse_tiers("base.en:3,base.en:1,tiny.en:1")
+
+
+def test_idle_server_keeps_best_tier_for_long_audio():
+    manager = WhisperTierManager(LADDER, workers=1)
+    # 15 minutes at base.en:3's starting RTF (0.136) is ~122 s, over the 60 s target.
+    selection = manager.select(15 * 60, latency_target=60)
+    assert (selection["model"], selection["beam_size"]) == ("base.en", 3)
+    assert selection["reason"] == "within_target"
+
+
+def test_queued_work_degrades_for_load():
+    manager = WhisperTierManager(LADDER, workers=1)
+    first = manager.select(15 * 60, latency_target=60)
+    second = manager.select(5 * 60, latency_target=60)
+    assert (second["model"], second["beam_size"]) != ("base.en", 3)
+    assert second["reason"] in {"degraded_for_load", "over_target"}
+
+    manager.finish(first)
+    manager.finish(second)
+    third = manager.select(15 * 60, latency_target=60)
+    assert (third["model"], third["beam_size"]) == ("base.en", 3)
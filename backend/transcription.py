@@ -1,25 +1,54 @@
 import os
-from pathlib import Path
+import time
 
-try:
-    from faster_whisper import WhisperModel  # type: ignore
-except ImportError:  # pragma: no cover - optional fast path
-    WhisperModel = None
-
-try:  # pragma: no cover - optional dependency for fallback path only
-    import torch  # type: ignore
-except ImportError:  # pragma: no cover
-    torch = None
-
-try:  # pragma: no cover - optional fallback
-    import whisper  # type: ignore
-except ImportError:  # pragma: no cover
-    whisper = None
+from audio_ingestion import load_audio
+from cpu_budget import stage_threads
+from whisper_backends import get_backend
 
 WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "faster-whisper")
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base.en")
 WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
 WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "3"))
+# Smaller model used by the "fast" pipeline mode (see pipeline_modes.py).
+WHISPER_FAST_MODEL = os.getenv("WHISPER_FAST_MODEL", "tiny.en")
+
+# Confidence-guided two-pass decoding (faster-whisper only). When a job asks
+# for beam search, pass one decodes greedily with a smaller model and only
+# segments whose avg_logprob or compression_ratio look unreliable are
+# re-decoded with the requested model and beam size, then spliced back in.
+# Clean dictation rarely needs pass two.
+#
+# WHISPER_FIRST_PASS_MODEL picks the pass-one model:
+#   auto    (default) one size below the job's model, keeping ".en"
+#           (small.en -> base.en, base.en -> tiny.en); tiny stays tiny
+#   <name>  that model for every job, e.g. tiny.en
+#   ""      (set but empty) the job's own model: opt-out, no speed-up from
+#           the smaller model, only from greedy decoding
+# WER trade-off: segments the smaller model gets confidently wrong stay above
+# the thresholds and are never re-decoded, so the cascade can be a little
+# worse than single-pass beam search on hard audio (accents, crosstalk, rare
+# drug names). Check with benchmarks/two_pass_benchmark.py against reference
+# transcripts before changing the default or loosening the thresholds.
+WHISPER_TWO_PASS = os.getenv("WHISPER_TWO_PASS", "1") not in {"0", "false", "False"}
+WHISPER_FIRST_PASS_MODEL = os.getenv("WHISPER_FIRST_PASS_MODEL", "auto").strip()
+WHISPER_REFINE_LOGPROB_THRESHOLD = float(os.getenv("WHISPER_REFINE_LOGPROB_THRESHOLD", "-0.7"))
+WHISPER_REFINE_COMPRESSION_THRESHOLD = float(os.getenv("WHISPER_REFINE_COMPRESSION_THRESHOLD", "2.4"))
+WHISPER_NO_SPEECH_THRESHOLD = float(os.getenv("WHISPER_NO_SPEECH_THRESHOLD", "0.6"))
+# Part of the transcription stage cache key: changing any of these changes
+# the transcript.
+WHISPER_TWO_PASS_SETTINGS = {
+    "enabled": WHISPER_TWO_PASS,
+    "first_pass_model": WHISPER_FIRST_PASS_MODEL,
+    "logprob_threshold": WHISPER_REFINE_LOGPROB_THRESHOLD,
+    "compression_threshold": WHISPER_REFINE_COMPRESSION_THRESHOLD,
+    "no_speech_threshold": WHISPER_NO_SPEECH_THRESHOLD,
+}
+
+# Model sizes smallest first, for WHISPER_FIRST_PASS_MODEL=auto.
+_MODEL_SIZES = ("tiny", "base", "small", "medium", "large")
+
+# Context kept either side of a segment when it is re-decoded on its own.
+_REFINE_PADDING_SECONDS = 0.2
 
 INITIAL_PROMPT = (
     "English clinical consultation between a medical student and a patient. "
@@ -29,84 +58,144 @@ INITIAL_PROMPT = (
     "infection, lifestyle, retinal screening, foot check, and GP surgery."
 )
 
-if torch is not None and os.cpu_count():
-    torch.set_num_threads(max(1, os.cpu_count()))
 
-print("Loading transcription model...")
+def load_transcription_model(model_name: str = WHISPER_MODEL):
+    """
+    Load a Whisper model once per process and return it.
+
+    Loading is deferred to first use (or an explicit warm-up) so that modules
+    which only need the settings above, such as main.py building stage cache
+    keys, can import this module without paying for a model they never run.
+    Only the selected backend's packages are imported (whisper_backends). The
+    CPU stage workers call this from their initializer; the thread count
+    comes from the shared CPU budget (cpu_budget.py).
+    """
+    return get_backend(WHISPER_BACKEND).load_model(model_name, stage_threads("whisper"), WHISPER_COMPUTE_TYPE)
 
-_backend_name = "openai-whisper"
-_fw_model = None
-_ow_model = None
 
-if WHISPER_BACKEND == "faster-whisper" and WhisperModel is not None:
-    _fw_model = WhisperModel(
-        WHISPER_MODEL,
-        device="cpu",
-        compute_type=WHISPER_COMPUTE_TYPE,
-        cpu_threads=max(1, os.cpu_count() or 1),
-    )
-    _backend_name = "faster-whisper"
-else:
-    if whisper is None:
-        raise RuntimeError(
-            "WHISPER_BACKEND is set to openai-whisper, but the optional "
-            "'openai-whisper' package is not installed."
-        )
-    _ow_model = whisper.load_model(WHISPER_MODEL)
+def backend_stats() -> dict:
+    """Import / model load time and RSS of the active backend in this process."""
+    return get_backend(WHISPER_BACKEND).stats()
 
-print(f"Transcription model loaded successfully! backend={_backend_name}, model={WHISPER_MODEL}")
 
+def _join_segments(segments: list[dict]) -> str:
+    return " ".join(segment["text"] for segment in segments if segment["text"]).strip()
 
-def _transcribe_with_faster_whisper(audio_file_path: str) -> tuple[str, str]:
-    assert _fw_model is not None
 
-    segments, info = _fw_model.transcribe(
-        audio_file_path,
-        task="transcribe",
-        language="en",
-        beam_size=WHISPER_BEAM_SIZE,
-        best_of=1,
-        condition_on_previous_text=True,
-        vad_filter=False,
-        initial_prompt=INITIAL_PROMPT,
-        word_timestamps=False,
+def _needs_second_pass(segment: dict) -> bool:
+    if not segment["text"] or segment["no_speech_prob"] >= WHISPER_NO_SPEECH_THRESHOLD:
+        # Silence or noise: a bigger decode will not find words in it.
+        return False
+    return (
+        segment["avg_logprob"] < WHISPER_REFINE_LOGPROB_THRESHOLD
+        or segment["compression_ratio"] > WHISPER_REFINE_COMPRESSION_THRESHOLD
     )
 
-    text = " ".join(segment.text.strip() for segment in segments if segment.text).strip()
-    return text, (info.language or "en")
-
 
-def _transcribe_with_openai_whisper(audio_file_path: str) -> tuple[str, str]:
-    assert _ow_model is not None
-
-    result = _ow_model.transcribe(
-        audio_file_path,
-        task="transcribe",
-        language="en",
-        temperature=0.0,
-        best_of=1,
-        condition_on_previous_text=True,
-        fp16=False,
-        initial_prompt=INITIAL_PROMPT,
+def _refine_segments(backend, model, audio, segments: list[dict], beam_size: int) -> int:
+    """
+    Re-decode low-confidence segments in place. A segment's text is replaced
+    only when the second pass is more confident than the first. Returns the
+    number of segments replaced.
+    """
+    refined = 0
+    for segment in segments:
+        if not _needs_second_pass(segment):
+            continue
+        samples = audio.slice(segment["start"] - _REFINE_PADDING_SECONDS, segment["end"] + _REFINE_PADDING_SECONDS)
+        if not len(samples):
+            continue
+        candidates, _, _ = backend.transcribe(
+            model, samples, beam_size, INITIAL_PROMPT, condition_on_previous_text=False,
+        )
+        candidates = [candidate for candidate in candidates if candidate["text"]]
+        if not candidates:
+            continue
+        spans = [max(0.01, candidate["end"] - candidate["start"]) for candidate in candidates]
+        avg_logprob = sum(c["avg_logprob"] * w for c, w in zip(candidates, spans)) / sum(spans)
+        if avg_logprob <= segment["avg_logprob"]:
+            continue
+        segment["first_pass_text"] = segment["text"]
+        segment["first_pass_avg_logprob"] = segment["avg_logprob"]
+        segment["text"] = _join_segments(candidates)
+        segment["avg_logprob"] = round(avg_logprob, 4)
+        segment["pass"] = 2
+        refined += 1
+    return refined
+
+
+def first_pass_model(model_name: str) -> str:
+    """The model pass one of the two-pass cascade uses for a `model_name` job."""
+    if WHISPER_FIRST_PASS_MODEL != "auto":
+        return WHISPER_FIRST_PASS_MODEL or model_name
+    size = model_name.split(".")[0].split("-")[0]
+    if size not in _MODEL_SIZES[1:]:
+        # Already the smallest, or not a stock model name: nothing to step down to.
+        return model_name
+    smaller = _MODEL_SIZES[_MODEL_SIZES.index(size) - 1]
+    return f"{smaller}.en" if model_name.endswith(".en") else smaller
+
+
+def _transcribe_two_pass(backend, model, model_name: str, audio, beam_size: int) -> tuple[list[dict], str, float | None, dict]:
+    first_pass_model_name = first_pass_model(model_name)
+    first_pass_model = load_transcription_model(first_pass_model_name)
+
+    started_at = time.perf_counter()
+    segments, language, duration = backend.transcribe(first_pass_model, audio.samples, 1, INITIAL_PROMPT)
+    first_pass_seconds = time.perf_counter() - started_at
+
+    candidates = sum(1 for segment in segments if _needs_second_pass(segment))
+    refined = _refine_segments(backend, model, audio, segments, beam_size)
+    cascade = {
+        "first_pass_model": first_pass_model_name,
+        "first_pass_seconds": round(first_pass_seconds, 3),
+        "second_pass_seconds": round(time.perf_counter() - started_at - first_pass_seconds, 3),
+        "segments": len(segments),
+        "low_confidence_segments": candidates,
+        "refined_segments": refined,
+    }
+    print(
+        f"Two-pass decode: {candidates}/{len(segments)} segments below threshold, {refined} replaced "
+        f"(pass 1 {cascade['first_pass_seconds']}s, pass 2 {cascade['second_pass_seconds']}s)"
     )
+    return segments, language, duration, cascade
 
-    return result["text"], result.get("language", "en")
 
-
-def transcribe_audio(audio_file_path: str) -> dict:
+def transcribe_audio(audio_file_path: str, model_name: str | None = None, beam_size: int | None = None) -> dict:
     """
     Transcribe audio file using a local Whisper backend.
 
     Prefer faster-whisper on CPU for better throughput with similar quality.
     Fall back to openai-whisper if faster-whisper is not installed.
+    `model_name` and `beam_size` override the process defaults for one call;
+    beam_size=1 is greedy decoding. Beam-search requests use the two-pass
+    cascade when WHISPER_TWO_PASS is on. Per-segment confidence metadata is
+    returned under "segments".
     """
+    model_name = model_name or WHISPER_MODEL
+    beam_size = beam_size or WHISPER_BEAM_SIZE
+    backend_name = WHISPER_BACKEND
     try:
-        print(f"Transcribing: {audio_file_path}")
-
-        if _backend_name == "faster-whisper":
-            transcription_text, detected_language = _transcribe_with_faster_whisper(audio_file_path)
-        else:
-            transcription_text, detected_language = _transcribe_with_openai_whisper(audio_file_path)
+        backend = get_backend(WHISPER_BACKEND)
+        backend_name = backend.name
+        model = load_transcription_model(model_name)
+        print(f"Transcribing: {audio_file_path} (model={model_name}, beam_size={beam_size})")
+
+        started_at = time.perf_counter()
+        cascade = None
+        # Decoded once; every pass below reads (slices of) the same buffer.
+        with load_audio(audio_file_path) as audio:
+            audio_source = audio.source
+            ingest_seconds = time.perf_counter() - started_at
+            if backend.supports_two_pass and WHISPER_TWO_PASS and beam_size > 1:
+                segments, detected_language, _, cascade = _transcribe_two_pass(
+                    backend, model, model_name, audio, beam_size,
+                )
+            else:
+                segments, detected_language, _ = backend.transcribe(model, audio.samples, beam_size, INITIAL_PROMPT)
+            duration = audio.duration_seconds
+        decode_seconds = time.perf_counter() - started_at
+        transcription_text = _join_segments(segments)
 
         print("=" * 50)
         print(f"SUCCESS! Transcribed: {transcription_text[:100]}...")
@@ -115,11 +204,17 @@ def transcribe_audio(audio_file_path: str) -> dict:
         return {
             "success": True,
             "text": transcription_text,
+            "segments": segments,
+            "two_pass": cascade,
             "language": detected_language,
-            "duration": None,
+            "duration": duration,
+            "decode_seconds": decode_seconds,
+            "audio_source": audio_source,
+            "ingest_seconds": round(ingest_seconds, 3),
             "error": None,
-            "backend": _backend_name,
-            "model": WHISPER_MODEL,
+            "backend": backend_name,
+            "model": model_name,
+            "beam_size": beam_size,
         }
 
     except Exception as e:
@@ -134,19 +229,23 @@ def transcribe_audio(audio_file_path: str) -> dict:
         return {
             "success": False,
             "text": None,
+            "segments": [],
+            "two_pass": None,
             "language": None,
             "duration": None,
+            "decode_seconds": None,
             "error": str(e),
-            "backend": _backend_name,
-            "model": WHISPER_MODEL,
+            "backend": backend_name,
+            "model": model_name,
+            "beam_size": beam_size,
         }
 
 
-def transcribe_audio_realtime(audio_file_path: str) -> str:
+def transcribe_audio_realtime(audio_file_path: str, model_name: str | None = None, beam_size: int | None = None) -> str:
     """
     Simplified version that returns just the text.
     """
-    result = transcribe_audio(audio_file_path)
+    result = transcribe_audio(audio_file_path, model_name=model_name, beam_size=beam_size)
 
     if result["success"]:
         return result["text"]
@@ -0,0 +1,102 @@
+# user_cache.py
+# In-process TTL cache of authenticated user profiles, keyed by user id.
+#
+# Why?
+# get_current_user ran SELECT ... FROM users WHERE id = ? on every protected
+# request. A history view that opens a few transcriptions pays that query on
+# each call, for a row that almost never changes.
+#
+# The cache holds plain column snapshots, never ORM objects: a session-bound
+# User must not be shared across requests and threads. auth.py turns a
+# snapshot back into a User attached to the request's session without a
+# query (see auth.get_current_user).
+#
+# Entries live USER_CACHE_TTL_SECONDS (default 30) and are dropped at once
+# when the profile changes or the account is deleted (main.update_me,
+# main.delete_my_account). Invalidation is per process: with several
+# workers, another worker can serve a stale profile for up to the TTL. That
+# includes a deactivated account, so keep the TTL short. 0 disables caching.
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import inspect
+
+import models
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+
+_COLUMNS = [attribute.key for attribute in inspect(models.User).column_attrs]
+
+
+class UserCache:
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0 and self._max_entries > 0
+
+    def get(self, user_id: int) -> dict[str, Any] | None:
+        """The cached column values for `user_id`, or None on a miss."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._hits += 1
+            return dict(entry[1])
+
+    def put(self, user: models.User) -> None:
+        if not self.enabled:
+            return
+        snapshot = {key: getattr(user, key) for key in _COLUMNS}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self._ttl_seconds, snapshot)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counts and hit rate, for GET /metrics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+
+cache = UserCache()
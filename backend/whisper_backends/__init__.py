@@ -0,0 +1,150 @@
+# whisper_backends
+# Transcription backends as plugins, imported only when selected.
+#
+# Why?
+# transcription.py used to import torch and openai-whisper at module level,
+# even with WHISPER_BACKEND=faster-whisper, only to call
+# torch.set_num_threads(). That cost seconds of startup and hundreds of MB of
+# RSS in every process that imports transcription.py: the API process (for
+# settings and cache keys) as well as each CPU stage worker.
+#
+# BACKENDS maps a WHISPER_BACKEND value to a "module:Class" string, like the
+# CPU stage targets in stage_executor.py. get_backend() imports that module
+# and nothing else. If the selected backend's package is missing, it falls
+# back to the other backend, as the old module-level try/except did.
+#
+# Each backend records how long its imports and model loads took and how much
+# RSS they added (stats()). benchmarks/backend_startup_benchmark.py compares
+# the backends in fresh processes.
+
+from __future__ import annotations
+
+import importlib
+import os
+from abc import ABC, abstractmethod
+import resource
+import threading
+import time
+
+BACKENDS = {
+    "faster-whisper": "whisper_backends.faster_whisper_backend:FasterWhisperBackend",
+    "openai-whisper": "whisper_backends.openai_whisper_backend:OpenAIWhisperBackend",
+}
+
+_backends: dict[str, "WhisperBackend"] = {}
+_lock = threading.Lock()
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No /proc (macOS): peak RSS is the closest thing available.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def segment_metadata(start, end, text, avg_logprob, no_speech_prob, compression_ratio) -> dict:
+    """The per-segment dict every backend returns."""
+    return {
+        "start": round(float(start), 2),
+        "end": round(float(end), 2),
+        "text": (text or "").strip(),
+        "avg_logprob": round(float(avg_logprob), 4),
+        "no_speech_prob": round(float(no_speech_prob), 4),
+        "compression_ratio": round(float(compression_ratio), 3),
+        "pass": 1,
+    }
+
+
+class WhisperBackend(ABC):
+    """
+    Base class for a backend. Subclasses import their dependencies in
+    _import() and implement _load() and transcribe().
+    """
+
+    name = ""
+    # Whether transcribe() can decode short slices, which the two-pass cascade
+    # needs for re-decoding low-confidence segments.
+    supports_two_pass = False
+
+    def __init__(self):
+        self._models: dict[str, object] = {}
+        self._model_lock = threading.Lock()
+        self._stats = {"backend": self.name, "models": {}}
+        rss_before, started_at = rss_bytes(), time.perf_counter()
+        self._import()
+        self._stats["import_seconds"] = round(time.perf_counter() - started_at, 3)
+        self._stats["import_rss_mb"] = round((rss_bytes() - rss_before) / 2**20, 1)
+        print(
+            f"Whisper backend {self.name}: imported in {self._stats['import_seconds']}s "
+            f"(+{self._stats['import_rss_mb']} MB RSS)"
+        )
+
+    @abstractmethod
+    def _import(self) -> None:
+        """Import the backend's packages. Raises ImportError if they are missing."""
+
+    @abstractmethod
+    def _load(self, model_name: str, threads: int, compute_type: str):
+        """Load and return a model."""
+
+    @abstractmethod
+    def transcribe(self, model, samples, beam_size: int, initial_prompt: str, condition_on_previous_text: bool = True):
+        """Decode 16 kHz mono float32 samples. Returns (segments, language, duration)."""
+
+    def load_model(self, model_name: str, threads: int, compute_type: str):
+        """Load `model_name` once per process and return it."""
+        with self._model_lock:
+            model = self._models.get(model_name)
+            if model is not None:
+                return model
+            print(f"Loading transcription model {model_name}...")
+            rss_before, started_at = rss_bytes(), time.perf_counter()
+            model = self._load(model_name, threads, compute_type)
+            self._models[model_name] = model
+            self._stats["models"][model_name] = {
+                "load_seconds": round(time.perf_counter() - started_at, 3),
+                "rss_mb": round((rss_bytes() - rss_before) / 2**20, 1),
+            }
+            print(
+                f"Transcription model loaded successfully! backend={self.name}, model={model_name} "
+                f"({self._stats['models'][model_name]['load_seconds']}s, "
+                f"+{self._stats['models'][model_name]['rss_mb']} MB RSS)"
+            )
+            return model
+
+    def stats(self) -> dict:
+        """Import and per-model load time / RSS, plus the process's current RSS."""
+        return {**self._stats, "process_rss_mb": round(rss_bytes() / 2**20, 1)}
+
+
+def _instantiate(name: str) -> WhisperBackend:
+    module_name, _, class_name = BACKENDS[name].partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def get_backend(name: str) -> WhisperBackend:
+    """
+    The backend for `name`, imported on first use. Falls back to the other
+    registered backend when the selected one's package is not installed.
+    """
+    with _lock:
+        backend = _backends.get(name)
+        if backend is not None:
+            return backend
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown WHISPER_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+        errors = []
+        for candidate in (name, *(other for other in BACKENDS if other != name)):
+            try:
+                backend = _instantiate(candidate)
+            except ImportError as exc:
+                errors.append(f"{candidate}: {exc}")
+                continue
+            if candidate != name:
+                print(f"Whisper backend {name} unavailable ({errors[0]}); using {candidate}")
+            _backends[name] = backend
+            return backend
+        raise RuntimeError("No Whisper backend is installed: " + "; ".join(errors))
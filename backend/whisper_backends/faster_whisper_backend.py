@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from whisper_backends import WhisperBackend, segment_metadata
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """CTranslate2 Whisper on CPU. Needs no torch."""
+
+    name = "faster-whisper"
+    supports_two_pass = True
+
+    def _import(self) -> None:
+        from faster_whisper import WhisperModel  # type: ignore
+
+        self._model_class = WhisperModel
+
+    def _load(self, model_name: str, threads: int, compute_type: str):
+        return self._model_class(
+            model_name,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=threads,
+        )
+
+    def transcribe(self, model, samples, beam_size: int, initial_prompt: str, condition_on_previous_text: bool = True):
+        segments, info = model.transcribe(
+            samples,
+            task="transcribe",
+            language="en",
+            beam_size=beam_size,
+            best_of=1,
+            condition_on_previous_text=condition_on_previous_text,
+            vad_filter=False,
+            initial_prompt=initial_prompt,
+            word_timestamps=False,
+        )
+        metadata = [
+            segment_metadata(
+                segment.start, segment.end, segment.text,
+                segment.avg_logprob, segment.no_speech_prob, segment.compression_ratio,
+            )
+            for segment in segments
+        ]
+        return metadata, (info.language or "en"), info.duration
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from whisper_backends import WhisperBackend, segment_metadata
+
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """
+    The reference PyTorch implementation. Slower on CPU; kept as a fallback
+    for hosts where CTranslate2 is unavailable. Imports torch.
+    """
+
+    name = "openai-whisper"
+
+    def _import(self) -> None:
+        import torch  # type: ignore
+        import whisper  # type: ignore
+
+        self._torch = torch
+        self._whisper = whisper
+
+    def _load(self, model_name: str, threads: int, compute_type: str):
+        # compute_type is a CTranslate2 setting; this backend runs fp32 on CPU.
+        self._torch.set_num_threads(threads)
+        return self._whisper.load_model(model_name)
+
+    def transcribe(self, model, samples, beam_size: int, initial_prompt: str, condition_on_previous_text: bool = True):
+        result = model.transcribe(
+            samples,
+            task="transcribe",
+            language="en",
+            temperature=0.0,
+            best_of=1,
+            beam_size=beam_size if beam_size > 1 else None,
+            condition_on_previous_text=condition_on_previous_text,
+            fp16=False,
+            initial_prompt=initial_prompt,
+        )
+        segments = [
+            segment_metadata(
+                segment["start"], segment["end"], segment["text"],
+                segment["avg_logprob"], segment["no_speech_prob"], segment["compression_ratio"],
+            )
+            for segment in result.get("segments") or []
+        ]
+        return segments, result.get("language", "en"), (segments[-1]["end"] if segments else None)
@@ -0,0 +1,219 @@
+# whisper_tiers.py
+# Per-job Whisper model / beam size selection under load.
+#
+# Why?
+# WHISPER_MODEL and WHISPER_BEAM_SIZE used to be fixed for the process, so a
+# burst of uploads simply queued behind the CPU stage workers and every job's
+# latency grew with the backlog. The tier manager keeps a ladder of
+# (model, beam size) tiers, best first, and picks one per job:
+#
+#   predicted = queued decode work / inference slots + audio seconds * RTF(tier)
+#
+# The best tier whose predicted completion fits the job's latency target wins;
+# if none fits, the cheapest tier is used. Quality therefore degrades one step
+# at a time as the queue grows instead of the backlog growing.
+#
+# Only load degrades a job, never audio length alone. A recording that takes
+# longer than the target to decode on an idle server would take that long
+# anyway, so the target is widened to the best tier's own decode time: with an
+# empty queue the best tier always fits, however long the consult.
+#
+# RTF (decode seconds per audio second) starts from rough CPU defaults and is
+# learned online from each completed decode (EWMA), so the ladder calibrates
+# itself to the host. Every distinct model in the ladder, and the two-pass
+# first-pass model of each beam-search tier, is loaded by the CPU stage
+# workers at startup.
+#
+# WHISPER_TIERS is a comma-separated "model:beam" list, best first, e.g.
+# "small.en:5,base.en:3,base.en:1,tiny.en:1". The default ladder tops out at
+# WHISPER_MODEL / WHISPER_BEAM_SIZE so idle behaviour is unchanged.
+
+from __future__ import annotations
+
+import os
+import threading
+
+import metrics
+from cpu_budget import CPU_INFERENCE_SLOTS
+from transcription import (
+    WHISPER_BEAM_SIZE,
+    WHISPER_FAST_MODEL,
+    WHISPER_MODEL,
+    WHISPER_TWO_PASS,
+    first_pass_model,
+    load_transcription_model,
+)
+
+WHISPER_TIERS = os.getenv(
+    "WHISPER_TIERS",
+    f"{WHISPER_MODEL}:{WHISPER_BEAM_SIZE},{WHISPER_MODEL}:1,{WHISPER_FAST_MODEL}:1",
+)
+WHISPER_LATENCY_TARGET_SECONDS = float(os.getenv("WHISPER_LATENCY_TARGET_SECONDS", "60"))
+WHISPER_ADAPTIVE = os.getenv("WHISPER_ADAPTIVE", "1") not in {"0", "false", "False"}
+
+# Starting RTF guesses for int8 faster-whisper on a few CPU cores; beam search
+# costs roughly 0.35x extra per additional beam. Replaced by measurements.
+_DEFAULT_MODEL_RTF = {
+    "tiny.en": 0.04,
+    "tiny": 0.04,
+    "base.en": 0.08,
+    "base": 0.08,
+    "small.en": 0.22,
+    "small": 0.22,
+    "medium.en": 0.6,
+    "medium": 0.6,
+}
+_RTF_SMOOTHING = 0.3
+
+
+def parse_tiers(spec: str) -> list[dict]:
+    tiers = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, beam = item.partition(":")
+        tier = {"model": model.strip(), "beam_size": max(1, int(beam or 1))}
+        if tier not in tiers:
+            tiers.append(tier)
+    if not tiers:
+        raise ValueError("WHISPER_TIERS must list at least one model:beam tier")
+    return tiers
+
+
+def _tier_key(tier: dict) -> str:
+    return f"{tier['model']}:{tier['beam_size']}"
+
+
+def _default_rtf(tier: dict) -> float:
+    base = _DEFAULT_MODEL_RTF.get(tier["model"], 0.3)
+    return base * (1 + 0.35 * (tier["beam_size"] - 1))
+
+
+def load_tier_models() -> None:
+    """CPU worker warm-up: load every distinct model in the ladder, plus the
+    two-pass first-pass model of each beam-search tier."""
+    models = []
+    for tier in parse_tiers(WHISPER_TIERS):
+        models.append(tier["model"])
+        if WHISPER_TWO_PASS and tier["beam_size"] > 1:
+            models.append(first_pass_model(tier["model"]))
+    for model in dict.fromkeys(models):
+        load_transcription_model(model)
+
+
+class WhisperTierManager:
+    def __init__(self, tiers: list[dict], workers: int = CPU_INFERENCE_SLOTS):
+        self.tiers = tiers
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._rtf = {_tier_key(tier): _default_rtf(tier) for tier in tiers}
+        self._queued_work: dict[int, float] = {}
+        self._next_ticket = 0
+        self._selections: dict[str, int] = {}
+        self._audio_seconds: dict[str, float] = {}
+        self._decode_seconds: dict[str, float] = {}
+
+    def select(self, audio_seconds: float, latency_target: float | None = None, max_beam_size: int | None = None) -> dict:
+        """
+        Pick a tier for one job and reserve its predicted decode time in the
+        queue. The caller must pass the returned selection to finish().
+        """
+        target = latency_target or WHISPER_LATENCY_TARGET_SECONDS
+        candidates = [
+            tier for tier in self.tiers
+            if max_beam_size is None or tier["beam_size"] <= max_beam_size
+        ] or self.tiers[-1:]
+
+        with self._lock:
+            queue_depth = len(self._queued_work)
+            queue_wait = sum(self._queued_work.values()) / self._workers
+            budget = max(target, audio_seconds * self._rtf[_tier_key(candidates[0])])
+            chosen, predicted, reason = None, 0.0, "within_target"
+            for tier in candidates:
+                decode = audio_seconds * self._rtf[_tier_key(tier)]
+                if queue_wait + decode <= budget:
+                    chosen, predicted = tier, queue_wait + decode
+                    break
+            if chosen is None:
+                chosen = candidates[-1]
+                predicted = queue_wait + audio_seconds * self._rtf[_tier_key(chosen)]
+                reason = "over_target"
+            if chosen is not candidates[0] and reason == "within_target":
+                reason = "degraded_for_load"
+
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._queued_work[ticket] = audio_seconds * self._rtf[_tier_key(chosen)]
+            key = _tier_key(chosen)
+            self._selections[key] = self._selections.get(key, 0) + 1
+
+        selection = {
+            "model": chosen["model"],
+            "beam_size": chosen["beam_size"],
+            "reason": reason,
+            "queue_depth": queue_depth,
+            "audio_seconds": round(audio_seconds, 1),
+            "latency_target_seconds": target,
+            "predicted_seconds": round(predicted, 2),
+            "ticket": ticket,
+        }
+        metrics.increment(
+            "whisper_tier_selections_total", model=chosen["model"], beam_size=chosen["beam_size"], reason=reason,
+        )
+        print(
+            f"Whisper tier: {key} ({reason}); queue_depth={queue_depth}, "
+            f"audio={audio_seconds:.0f}s, predicted={predicted:.1f}s, target={target:.0f}s"
+        )
+        return selection
+
+    def finish(self, selection: dict, decode_seconds: float | None = None, audio_seconds: float | None = None) -> None:
+        """
+        Release the job's queue reservation. With `decode_seconds` (a real
+        decode, not a cache hit) also update the tier's RTF estimate, using
+        the decoder's own `audio_seconds` when it reported one.
+        """
+        key = f"{selection['model']}:{selection['beam_size']}"
+        audio_seconds = audio_seconds or selection["audio_seconds"]
+        with self._lock:
+            self._queued_work.pop(selection["ticket"], None)
+            if decode_seconds is None or audio_seconds <= 0:
+                return
+            observed = decode_seconds / audio_seconds
+            self._rtf[key] = (1 - _RTF_SMOOTHING) * self._rtf.get(key, observed) + _RTF_SMOOTHING * observed
+            self._audio_seconds[key] = self._audio_seconds.get(key, 0.0) + audio_seconds
+            self._decode_seconds[key] = self._decode_seconds.get(key, 0.0) + decode_seconds
+
+        metrics.observe("whisper_realtime_factor", observed, model=selection["model"], beam_size=selection["beam_size"])
+        metrics.increment("whisper_audio_seconds_total", audio_seconds, model=selection["model"], beam_size=selection["beam_size"])
+        metrics.increment("whisper_decode_seconds_total", decode_seconds, model=selection["model"], beam_size=selection["beam_size"])
+        print(f"Whisper tier {key}: decoded {audio_seconds:.0f}s of audio in {decode_seconds:.1f}s (RTF {observed:.3f})")
+
+    def snapshot(self) -> dict:
+        """Ladder, learned RTFs and per-tier throughput, for GET /metrics."""
+        with self._lock:
+            tiers = []
+            for tier in self.tiers:
+                key = _tier_key(tier)
+                decode = self._decode_seconds.get(key, 0.0)
+                audio = self._audio_seconds.get(key, 0.0)
+                tiers.append({
+                    **tier,
+                    "realtime_factor": round(self._rtf[key], 4),
+                    "selections": self._selections.get(key, 0),
+                    "audio_seconds": round(audio, 1),
+                    "decode_seconds": round(decode, 1),
+                    # Audio seconds transcribed per second of CPU worker time.
+                    "throughput": round(audio / decode, 2) if decode else None,
+                })
+            return {
+                "adaptive": WHISPER_ADAPTIVE,
+                "workers": self._workers,
+                "queue_depth": len(self._queued_work),
+                "queued_decode_seconds": round(sum(self._queued_work.values()), 1),
+                "latency_target_seconds": WHISPER_LATENCY_TARGET_SECONDS,
+                "tiers": tiers,
+            }
+
+
+manager = WhisperTierManager(parse_tiers(WHISPER_TIERS))
@@ -40,10 +40,10 @@ export default function App() {
         setPage('dashboard')
 
         try {
-          const history = await fetchHistory()
+          const page = await fetchHistory()
           if (cancelled) return
 
-          setHistory(history.map(mapHistoryEntryFromApi))
+          setHistory(page.items.map(mapHistoryEntryFromApi), page.next_cursor)
         } catch {
           if (!cancelled) setHistory([])
         }
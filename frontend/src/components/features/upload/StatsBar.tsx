@@ -1,6 +1,8 @@
+import { useEffect, useState } from 'react'
 import { useAppStore } from '../../../store/appStore'
 import { FileText, Activity, Clock } from 'lucide-react'
 import { cn } from '../../../lib/utils'
+import { fetchHistoryStats, type HistoryStatsAPI } from '../../../services/api'
 
 function toConfidencePercent(score: number): number {
   const base = score <= 1 ? score * 100 : score
@@ -12,28 +14,39 @@ export default function StatsBar() {
   const { history, preferences } = useAppStore()
   const dark = preferences.darkMode
 
-  const avgConfidence = history.length > 0
-    ? Math.round(
-      history.reduce((sum, h) => sum + toConfidencePercent(h.confidenceScore), 0) / history.length
-    )
+  // Totals come from GET /api/history/stats; the store only holds the pages
+  // of history loaded so far. Refetched whenever entries are added or removed.
+  const [serverStats, setServerStats] = useState<HistoryStatsAPI | null>(null)
+  const historyKey = `${history.length}:${history[0]?.id ?? ''}`
+  useEffect(() => {
+    let cancelled = false
+    fetchHistoryStats()
+      .then((result) => { if (!cancelled) setServerStats(result) })
+      .catch(() => { if (!cancelled) setServerStats(null) })
+    return () => { cancelled = true }
+  }, [historyKey])
+
+  const total = serverStats?.transcription_count ?? 0
+  const avgConfidence = serverStats?.average_confidence != null
+    ? toConfidencePercent(serverStats.average_confidence)
     : 0
 
-  const timeSaved = history.length * 5
+  const timeSaved = total * 5
 
   const stats = [
     {
       icon: <FileText size={18} />,
-      value: history.length.toString(),
+      value: total.toString(),
       label: 'Total Transcriptions',
-      delta: history.length > 0 ? `${history.length} session${history.length !== 1 ? 's' : ''} total` : 'No sessions yet',
+      delta: total > 0 ? `${total} session${total !== 1 ? 's' : ''} total` : 'No sessions yet',
       iconBg:    dark ? 'bg-[#1E3A5F]' : 'bg-[#EBF3FF]',
       iconColor: 'text-[#1A56DB]',
     },
     {
       icon: <Activity size={18} />,
-      value: history.length > 0 ? `${avgConfidence}%` : '—',
+      value: total > 0 ? `${avgConfidence}%` : '—',
       label: 'Avg. Confidence',
-      delta: history.length > 0 ? 'Across all sessions' : 'No data yet',
+      delta: total > 0 ? 'Across all sessions' : 'No data yet',
       iconBg:    dark ? 'bg-[#0D3327]' : 'bg-[#E6F7F2]',
       iconColor: 'text-[#0BA871]',
     },
@@ -1,17 +1,28 @@
 import { useEffect, useRef, useState } from 'react'
 import { useAppStore } from '../../../store/appStore'
-import { fetchHistory, mapHistoryEntryFromApi, transcribeAudio } from '../../../services/api'
+import {
+  createJobId,
+  fetchHistory,
+  mapHistoryEntryFromApi,
+  subscribeToJobEvents,
+  transcribeAudio,
+} from '../../../services/api'
+import type { JobEvent, PipelineStage, SOAPNote } from '../../../types'
 import { Mic, Loader2 } from 'lucide-react'
 import { toast } from 'sonner'
 
-const PROCESSING_STAGES = [
-  { progressAt: 0.08, pct: 10, msg: 'Uploading audio file...'                      },
-  { progressAt: 0.18, pct: 22, msg: 'Preparing audio for transcription...'         },
-  { progressAt: 0.48, pct: 58, msg: 'Running Whisper transcription...'             },
-  { progressAt: 0.72, pct: 78, msg: 'Extracting medical entities with scispaCy...' },
-  { progressAt: 0.88, pct: 92, msg: 'Generating SOAP note...'                      },
-  { progressAt: 0.96, pct: 97, msg: 'Finalising output...'                         },
-]
+// Progress and the status line are driven by real stage events from
+// GET /api/jobs/{id}/events. Each entry describes the work that starts once
+// the named stage has finished.
+const STAGE_PROGRESS: Record<PipelineStage, { pct: number; msg: string }> = {
+  transcription:           { pct: 45, msg: 'Normalising transcript...'                     },
+  normalization:           { pct: 50, msg: 'Validating clinical content...'                },
+  validation:              { pct: 55, msg: 'Extracting medical entities with scispaCy...'  },
+  entities:                { pct: 65, msg: 'Structuring the clinical encounter...'         },
+  clinical_representation: { pct: 75, msg: 'Generating SOAP note...'                       },
+  soap:                    { pct: 95, msg: 'Saving to history...'                          },
+  persistence:             { pct: 98, msg: 'Finalising output...'                          },
+}
 
 const MIN_AUDIO_DURATION_SECONDS = 45
 const SHORT_AUDIO_MESSAGE = 'Recording is too short to process. Please upload a longer clinical audio clip.'
@@ -91,32 +102,67 @@ export default function TranscribeButton() {
   } = useAppStore()
 
   const progressRef = useRef<HTMLDivElement>(null)
-  const stageRef    = useRef<Array<ReturnType<typeof setTimeout>>>([])
+  const streamRef   = useRef<AbortController | null>(null)
   const timerRef    = useRef<ReturnType<typeof setInterval> | null>(null)
   const [remainingSeconds, setRemainingSeconds] = useState<number | null>(null)
   const [elapsedSeconds, setElapsedSeconds] = useState(0)
+  // Partial results shown while the LLM stages are still running
+  const [previewTranscript, setPreviewTranscript] = useState<string | null>(null)
+  const [previewEntityCount, setPreviewEntityCount] = useState<number | null>(null)
+  const [previewSoap, setPreviewSoap] = useState<Partial<SOAPNote>>({})
 
   const isSelected   = uploadState === 'selected'
   const isProcessing = uploadState === 'processing'
   const canTranscribe = Boolean(selectedFile && selectedEncounterType && !isProcessing)
 
-  // Animate the progress bar through fake stages while API call runs
-  const startFakeProgress = (estimatedTotalSeconds: number) => {
-    stageRef.current.forEach(clearTimeout)
-    stageRef.current = []
-    PROCESSING_STAGES.forEach(({ progressAt, pct, msg }) => {
-      const t = setTimeout(() => {
-        setProcessingStatus(msg)
-        if (progressRef.current) {
-          progressRef.current.style.width = `${pct}%`
-        }
-      }, Math.round(progressAt * estimatedTotalSeconds * 1000))
-      stageRef.current.push(t)
-    })
+  const setProgress = (pct: number) => {
+    if (progressRef.current) progressRef.current.style.width = `${pct}%`
+  }
+
+  const handleJobEvent = (event: JobEvent) => {
+    if (event.event === 'soap_section') {
+      const { section, text } = event.data
+      setPreviewSoap((prev) => ({ ...prev, [section]: text }))
+      setProcessingStatus(`Drafting SOAP note... ${section} ready`)
+      return
+    }
+    if (event.event !== 'stage') return
+    const { stage, payload } = event.data
+    const progress = STAGE_PROGRESS[stage]
+    if (progress) {
+      setProcessingStatus(progress.msg)
+      setProgress(progress.pct)
+    }
+    if (typeof payload.transcription === 'string') {
+      setPreviewTranscript(payload.transcription)
+    }
+    const entities = payload.entities as { total?: unknown } | undefined
+    if (typeof entities?.total === 'number') {
+      setPreviewEntityCount(entities.total)
+    }
+  }
+
+  // Follow the backend's stage events while the upload request is in flight.
+  // If the stream cannot be opened the request still completes normally; the
+  // bar just stays at the upload stage until the response arrives.
+  const startProgressStream = (jobId: string) => {
+    streamRef.current?.abort()
+    const controller = new AbortController()
+    streamRef.current = controller
+    setPreviewTranscript(null)
+    setPreviewEntityCount(null)
+    setPreviewSoap({})
+    setProgress(8)
+    subscribeToJobEvents(jobId, handleJobEvent, controller.signal).catch(() => {})
+  }
+
+  const stopProgressStream = () => {
+    streamRef.current?.abort()
+    streamRef.current = null
   }
 
   const finishProgress = () => {
-    stageRef.current.forEach(clearTimeout)
+    stopProgressStream()
     if (timerRef.current) {
       clearInterval(timerRef.current)
       timerRef.current = null
@@ -142,7 +188,7 @@ export default function TranscribeButton() {
 
   // Cleanup on unmount
   useEffect(() => () => {
-    stageRef.current.forEach(clearTimeout)
+    streamRef.current?.abort()
     if (timerRef.current) clearInterval(timerRef.current)
   }, [])
 
@@ -160,12 +206,14 @@ export default function TranscribeButton() {
     const estimatedTotalSeconds = estimateProcessingSeconds(selectedFile, audioDurationSeconds)
 
     setUploadState('processing')
-    setProcessingStatus(`Uploading audio file... Estimated time: ${formatDuration(estimatedTotalSeconds)}`)
+    setProcessingStatus(`Uploading and transcribing audio... Estimated time: ${formatDuration(estimatedTotalSeconds)}`)
     startTimer(estimatedTotalSeconds)
-    startFakeProgress(estimatedTotalSeconds)
+    const jobId = createJobId()
+    startProgressStream(jobId)
 
     try {
       const result = await transcribeAudio(selectedFile, {
+        jobId,
         audioDurationSeconds,
         encounterType: selectedEncounterType!,
         styleOverrides: styleOverridePreset
@@ -188,7 +236,7 @@ export default function TranscribeButton() {
 
         setResult(result)
         void fetchHistory()
-          .then((history) => setHistory(history.map(mapHistoryEntryFromApi)))
+          .then((page) => setHistory(page.items.map(mapHistoryEntryFromApi), page.next_cursor))
           .catch(() => addToHistory(result, selectedFile))
         const { notifications } = useAppStore.getState()
         if (notifications.transcriptDone) {
@@ -198,7 +246,7 @@ export default function TranscribeButton() {
         }
       }, 400)
     } catch (err) {
-      stageRef.current.forEach(clearTimeout)
+      stopProgressStream()
       if (timerRef.current) {
         clearInterval(timerRef.current)
         timerRef.current = null
@@ -226,6 +274,38 @@ export default function TranscribeButton() {
               style={{ width: '0%', transition: 'width 600ms ease-in-out' }}
             />
           </div>
+          {previewTranscript && (
+            <div className="mt-3 rounded-[10px] border border-[#E2E8F0] bg-[#F8FAFC] px-3 py-2">
+              <div className="flex justify-between items-center mb-1">
+                <span className="text-[11.5px] font-semibold text-[#4A5568] uppercase tracking-wide">
+                  Transcript preview
+                </span>
+                {previewEntityCount !== null && (
+                  <span className="text-[11.5px] text-[#64748B]">
+                    {previewEntityCount} medical entities found
+                  </span>
+                )}
+              </div>
+              <p className="text-[12.5px] text-[#4A5568] leading-relaxed max-h-[120px] overflow-y-auto whitespace-pre-wrap">
+                {previewTranscript}
+              </p>
+            </div>
+          )}
+          {Object.keys(previewSoap).length > 0 && (
+            <div className="mt-3 rounded-[10px] border border-[#E2E8F0] bg-[#F8FAFC] px-3 py-2">
+              <span className="text-[11.5px] font-semibold text-[#4A5568] uppercase tracking-wide">
+                SOAP draft
+              </span>
+              {(['subjective', 'objective', 'assessment', 'plan'] as const)
+                .filter((section) => previewSoap[section])
+                .map((section) => (
+                  <p key={section} className="mt-1 text-[12.5px] text-[#4A5568] leading-relaxed whitespace-pre-wrap">
+                    <span className="font-semibold capitalize">{section}: </span>
+                    {previewSoap[section]}
+                  </p>
+                ))}
+            </div>
+          )}
         </div>
       )}
 
@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { useAppStore } from '../store/appStore'
 import { formatConfidence } from '../lib/utils'
 import { cn } from '../lib/utils'
@@ -11,10 +11,20 @@ import type { HistoryEntry } from '../types'
 import {
   deleteAllHistory as deleteAllHistoryAPI,
   deleteHistoryItem as deleteHistoryItemAPI,
+  fetchHistory,
   fetchTranscription,
   mapHistoryDetailToResult,
+  mapHistoryEntryFromApi,
+  mapHistorySearchResultFromApi,
+  searchHistory,
 } from '../services/api'
 
+// Queries this long or longer are searched on the server (transcripts, SOAP
+// notes and patient IDs across the whole history); shorter ones only filter
+// the loaded rows by patient ID or date.
+const SERVER_SEARCH_MIN_LENGTH = 3
+const SEARCH_DEBOUNCE_MS = 300
+
 function toPlainText(value: unknown): string {
   if (typeof value === 'string') return value
   if (Array.isArray(value)) return value.map(toPlainText).join('\n')
@@ -24,9 +34,19 @@ function toPlainText(value: unknown): string {
   return String(value ?? '')
 }
 
+// Snippets mark matches with <mark>...</mark>. Split on the tags and render
+// the pieces as text so transcript content is never interpreted as HTML.
+function renderSnippet(snippet: string, dark: boolean) {
+  return snippet.split(/<\/?mark>/).map((part, index) =>
+    index % 2 === 1
+      ? <mark key={index} className={cn('rounded-[3px] px-[1px]', dark ? 'bg-[#451A03] text-[#FCD34D]' : 'bg-[#FEF3C7] text-[#92400E]')}>{part}</mark>
+      : <span key={index}>{part}</span>
+  )
+}
+
 export default function HistoryPage() {
   const {
-    history, deleteHistoryItem, clearHistory,
+    history, historyCursor, appendHistory, deleteHistoryItem, clearHistory,
     setPage, setResult, setUploadState, preferences,
   } = useAppStore()
 
@@ -35,10 +55,36 @@ export default function HistoryPage() {
   const [search,        setSearch]        = useState('')
   const [filterConf,    setFilterConf]    = useState('all')
   const [showDeleteAll, setShowDeleteAll] = useState(false)
+  const [loadingMore,   setLoadingMore]   = useState(false)
+  const [searchResults, setSearchResults] = useState<HistoryEntry[] | null>(null)
+  const [searchCursor,  setSearchCursor]  = useState<string | null>(null)
+
+  // ── Server-side search (debounced) ─────────────────────
+  useEffect(() => {
+    const query = search.trim()
+    if (query.length < SERVER_SEARCH_MIN_LENGTH) {
+      setSearchResults(null)
+      setSearchCursor(null)
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const page = await searchHistory(query)
+        if (cancelled) return
+        setSearchResults(page.items.map(mapHistorySearchResultFromApi))
+        setSearchCursor(page.next_cursor)
+      } catch {
+        if (!cancelled) toast.error('Search failed')
+      }
+    }, SEARCH_DEBOUNCE_MS)
+    return () => { cancelled = true; clearTimeout(timer) }
+  }, [search])
 
   // ── Filtering ──────────────────────────────────────────
-  const filtered = history.filter(entry => {
-    const matchSearch =
+  const source = searchResults ?? history
+  const filtered = source.filter(entry => {
+    const matchSearch = searchResults !== null ||
       entry.patientId.toLowerCase().includes(search.toLowerCase()) ||
       entry.date.toLowerCase().includes(search.toLowerCase())
 
@@ -53,6 +99,27 @@ export default function HistoryPage() {
     return matchSearch && matchConf
   })
 
+  // ── Load the next (older) page ─────────────────────────
+  const handleLoadMore = async () => {
+    const cursor = searchResults ? searchCursor : historyCursor
+    if (!cursor) return
+    setLoadingMore(true)
+    try {
+      if (searchResults) {
+        const page = await searchHistory(search.trim(), cursor)
+        setSearchResults([...searchResults, ...page.items.map(mapHistorySearchResultFromApi)])
+        setSearchCursor(page.next_cursor)
+      } else {
+        const page = await fetchHistory(cursor)
+        appendHistory(page.items.map(mapHistoryEntryFromApi), page.next_cursor)
+      }
+    } catch {
+      toast.error('Failed to load older transcriptions')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   // ── View a past result on dashboard ───────────────────
   const handleView = async (entry: HistoryEntry) => {
     try {
@@ -107,6 +174,7 @@ export default function HistoryPage() {
     try {
       await deleteHistoryItemAPI(Number(entryId))
       deleteHistoryItem(entryId)
+      setSearchResults(results => results && results.filter(entry => entry.id !== entryId))
       toast.success('Entry deleted')
     } catch {
       toast.error('Failed to delete entry')
@@ -117,6 +185,7 @@ export default function HistoryPage() {
     try {
       await deleteAllHistoryAPI()
       clearHistory()
+      setSearchResults(null)
       setShowDeleteAll(false)
       toast.success('All history deleted')
     } catch {
@@ -175,7 +244,7 @@ export default function HistoryPage() {
           <Search size={14} className="absolute left-3 top-1/2 -translate-y-1/2 text-[#94A3B8]" />
           <input
             type="text"
-            placeholder="Search by patient ID or date..."
+            placeholder="Search notes, transcripts or patient ID..."
             value={search}
             onChange={e => setSearch(e.target.value)}
             className={cn(inputClass, 'w-full pl-9 pr-4 py-[8px]')}
@@ -300,6 +369,14 @@ export default function HistoryPage() {
                       <span className="font-mono text-[12px] text-[#94A3B8]">
                         {entry.patientId}
                       </span>
+                      {entry.snippet && (
+                        <p className={cn(
+                          'mt-1 max-w-[360px] text-[12px] leading-[1.5]',
+                          dark ? 'text-[#94A3B8]' : 'text-[#4A5568]'
+                        )}>
+                          {renderSnippet(entry.snippet, dark)}
+                        </p>
+                      )}
                     </td>
                     <td className="px-5 py-4">
                       <span className={cn(
@@ -360,12 +437,23 @@ export default function HistoryPage() {
 
           {/* Row count footer */}
           <div className={cn(
-            'px-5 py-3 border-t',
+            'px-5 py-3 border-t flex items-center justify-between',
             dark ? 'bg-[#0F172A] border-[#334155]' : 'bg-[#F7FAFC] border-[#E2E8F0]'
           )}>
             <span className="text-[12px] text-[#94A3B8]">
-              Showing {filtered.length} of {history.length} transcription{history.length !== 1 ? 's' : ''}
+              {searchResults
+                ? `Showing ${filtered.length}${searchCursor ? '+' : ''} match${filtered.length !== 1 ? 'es' : ''}`
+                : `Showing ${filtered.length} of ${history.length}${historyCursor ? '+' : ''} transcription${history.length !== 1 ? 's' : ''}`}
             </span>
+            {(searchResults ? searchCursor : historyCursor) && (
+              <button
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="text-[12px] text-[#1A56DB] underline disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading…' : searchResults ? 'More matches' : 'Load older'}
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -76,8 +76,8 @@ export default function LoginPage() {
       // This replaces whatever was in the local cache with server data for
       // this specific user — fixing the cross-user data bleed.
       try {
-        const apiHistory = await fetchHistory()
-        setHistory(apiHistory.map(mapHistoryEntryFromApi))
+        const page = await fetchHistory()
+        setHistory(page.items.map(mapHistoryEntryFromApi), page.next_cursor)
       } catch {
         // Non-fatal — user lands on dashboard with empty history
         // which is better than showing another user's data
@@ -7,7 +7,16 @@
 // the interceptor handles it transparently.
 
 import axios from 'axios'
-import type { EncounterType, HistoryEntry, NoteStyleProfile, TranscriptionResult } from '../types'
+import type {
+  ClinicalRepresentation,
+  EncounterType,
+  HistoryEntry,
+  JobEvent,
+  NoteStyleProfile,
+  PipelineMode,
+  SOAPQualityReport,
+  TranscriptionResult,
+} from '../types'
 
 const TOKEN_KEY = 'mediscribe_token'
 
@@ -171,16 +180,86 @@ export interface HistoryEntryAPI {
   duration:         string | null
   status:           string
   created_at:       string
+  encounter_type:   EncounterType | null
+  clinical_representation: ClinicalRepresentation | null
   entities:         Array<{
-    text: string; label: string; confidence: number; start: number; end: number
+    text: string; label: string; confidence: number; start: number; end: number; category: string | null
   }>
   soap_note: {
     subjective: string; objective: string; assessment: string; plan: string; source: string
+    quality_report: SOAPQualityReport | null
+    quality_score: number | null
+    style_profile: NoteStyleProfile | null
   } | null
 }
 
-export async function fetchHistory(): Promise<HistoryEntryAPI[]> {
-  const response = await api.get<HistoryEntryAPI[]>('/api/history')
+// Row of the paginated history list: no transcript text or entities.
+export interface HistorySummaryAPI {
+  id:               number
+  patient_id:       string
+  filename:         string
+  confidence_score: number
+  duration:         string | null
+  status:           string
+  created_at:       string
+  encounter_type:   EncounterType | null
+  entity_count:     number
+  soap_source:      string | null
+  quality_score:    number | null
+}
+
+export interface HistoryPageAPI {
+  items:       HistorySummaryAPI[]
+  next_cursor: string | null
+}
+
+export const HISTORY_PAGE_SIZE = 50
+
+// One page of history, newest first. Pass the previous page's next_cursor to
+// load older entries; full detail comes from fetchTranscription().
+export async function fetchHistory(cursor: string | null = null): Promise<HistoryPageAPI> {
+  const response = await api.get<HistoryPageAPI>('/api/history/summary', {
+    params: { limit: HISTORY_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+  })
+  return response.data
+}
+
+// Search hit: a summary row plus its rank and matching fragments, with the
+// matched words wrapped in <mark>...</mark> (render as text, never as HTML).
+export interface HistorySearchResultAPI extends HistorySummaryAPI {
+  rank:               number
+  transcript_snippet: string | null
+  soap_snippet:       string | null
+}
+
+export interface HistorySearchPageAPI {
+  items:       HistorySearchResultAPI[]
+  next_cursor: string | null
+}
+
+export const HISTORY_SEARCH_PAGE_SIZE = 20
+
+// Full-text search over transcripts, SOAP notes and patient IDs, best match
+// first. Runs on the server, so it covers history that has not been loaded.
+export async function searchHistory(q: string, cursor: string | null = null): Promise<HistorySearchPageAPI> {
+  const response = await api.get<HistorySearchPageAPI>('/api/history/search', {
+    params: { q, limit: HISTORY_SEARCH_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+  })
+  return response.data
+}
+
+export interface HistoryStatsAPI {
+  transcription_count:    number
+  average_confidence:     number | null
+  total_duration_seconds: number
+  entity_count:           number
+  entities_by_category:   Record<string, number>
+  daily_activity:         Array<{ day: string; transcriptions: number }>
+}
+
+// Totals over the whole history, computed on the server.
+export async function fetchHistoryStats(days = 30): Promise<HistoryStatsAPI> {
+  const response = await api.get<HistoryStatsAPI>('/api/history/stats', { params: { days } })
   return response.data
 }
 
@@ -189,6 +268,16 @@ export async function fetchTranscription(id: number): Promise<HistoryEntryAPI> {
   return response.data
 }
 
+// Re-runs only the SOAP stage for a saved transcription. Omitted fields keep
+// the encounter type and style the note was last generated with.
+export async function regenerateSoapNote(
+  id: number,
+  overrides: Partial<NoteStyleProfile> & { encounter_type?: EncounterType } = {},
+): Promise<TranscriptionResult> {
+  const response = await api.post(`/api/history/${id}/regenerate`, overrides, { params: { compact: true } })
+  return normalizeTranscriptionResult(response.data)
+}
+
 export async function deleteHistoryItem(id: number): Promise<void> {
   await api.delete(`/api/history/${id}`)
 }
@@ -197,19 +286,26 @@ export async function deleteAllHistory(): Promise<void> {
   await api.delete('/api/history')
 }
 
-export function mapHistoryEntryFromApi(entry: HistoryEntryAPI): HistoryEntry {
+export function mapHistoryEntryFromApi(entry: HistorySummaryAPI): HistoryEntry {
   return {
     id:              String(entry.id),
     date:            new Date(entry.created_at).toLocaleString(),
     patientId:       entry.patient_id,
     duration:        entry.duration ?? '0:00',
-    entityCount:     entry.entities.length,
+    entityCount:     entry.entity_count,
     confidenceScore: entry.confidence_score,
     status:          mapHistoryStatus(entry.status),
     result:          undefined,
   }
 }
 
+export function mapHistorySearchResultFromApi(entry: HistorySearchResultAPI): HistoryEntry {
+  return {
+    ...mapHistoryEntryFromApi(entry),
+    snippet: entry.transcript_snippet ?? entry.soap_snippet ?? undefined,
+  }
+}
+
 export function mapHistoryDetailToResult(entry: HistoryEntryAPI): TranscriptionResult {
   return {
     transcription: entry.transcription,
@@ -227,6 +323,11 @@ export function mapHistoryDetailToResult(entry: HistoryEntryAPI): TranscriptionR
       plan:       entry.soap_note?.plan ?? '',
     },
     confidence_score: entry.confidence_score,
+    resolved_encounter_type: entry.encounter_type ?? undefined,
+    resolved_style_profile: entry.soap_note?.style_profile ?? undefined,
+    clinical_representation: entry.clinical_representation ?? undefined,
+    quality_report: entry.soap_note?.quality_report ?? undefined,
+    quality_score: entry.soap_note?.quality_score ?? undefined,
   }
 }
 
@@ -253,6 +354,21 @@ function mapHistoryStatus(status: string): HistoryEntry['status'] {
 
 // ── Transcription ─────────────────────────────────────────────────────────────
 
+// Compact responses (?compact=true) list each entity only under its category.
+// Rebuild the flat list in transcript order.
+function flattenCategorizedEntities(categorized: unknown): unknown[] {
+  if (!categorized || typeof categorized !== 'object') {
+    return []
+  }
+  return Object.values(categorized as Record<string, unknown>)
+    .flatMap((group) => (Array.isArray(group) ? group : []))
+    .sort((a, b) => {
+      const startA = (a as { start?: unknown })?.start
+      const startB = (b as { start?: unknown })?.start
+      return (typeof startA === 'number' ? startA : 0) - (typeof startB === 'number' ? startB : 0)
+    })
+}
+
 function normalizeTranscriptionResult(payload: unknown): TranscriptionResult {
   const data = (payload ?? {}) as Record<string, unknown>
 
@@ -261,7 +377,7 @@ function normalizeTranscriptionResult(payload: unknown): TranscriptionResult {
     ? rawEntities
     : Array.isArray((rawEntities as { all_entities?: unknown[] } | null)?.all_entities)
       ? (rawEntities as { all_entities: unknown[] }).all_entities
-      : []
+      : flattenCategorizedEntities((rawEntities as { categorized?: unknown } | null)?.categorized)
 
   const entities = rawList.map((e) => {
     const ent = (e ?? {}) as Record<string, unknown>
@@ -322,11 +438,19 @@ export async function transcribeAudio(
     audioDurationSeconds?: number | null
     encounterType: EncounterType
     styleOverrides?: Partial<NoteStyleProfile>
+    jobId?: string
+    pipelineMode?: PipelineMode
   }
 ): Promise<TranscriptionResult> {
   const formData = new FormData()
   formData.append('file', file)
   formData.append('encounter_type', options.encounterType)
+  if (options.jobId) {
+    formData.append('job_id', options.jobId)
+  }
+  if (options.pipelineMode) {
+    formData.append('pipeline_mode', options.pipelineMode)
+  }
   if (options.styleOverrides?.note_style_preset) {
     formData.append('note_style_preset', options.styleOverrides.note_style_preset)
   }
@@ -340,6 +464,7 @@ export async function transcribeAudio(
     formData.append('include_patient_friendly_language', String(options.styleOverrides.include_patient_friendly_language))
   }
   const response = await api.post<TranscriptionResult>('/api/transcribe', formData, {
+    params: { compact: true },
     headers: {
       'Content-Type': 'multipart/form-data',
       ...(typeof options.audioDurationSeconds === 'number' && Number.isFinite(options.audioDurationSeconds)
@@ -351,4 +476,70 @@ export async function transcribeAudio(
   return normalizeTranscriptionResult(response.data)
 }
 
+
+// ── Job progress (Server-Sent Events) ────────────────────────────────────────
+// EventSource cannot send an Authorization header, so the stream is read with
+// fetch() and parsed here. The backend replays events published before we
+// connected, so it is safe to subscribe just before the upload starts.
+
+export function createJobId(): string {
+  return crypto.randomUUID().replace(/-/g, '')
+}
+
+function parseSseBlock(block: string): JobEvent | null {
+  let id = 0
+  let event = 'message'
+  const data: string[] = []
+  for (const line of block.split('\n')) {
+    if (!line || line.startsWith(':')) continue
+    const sep = line.indexOf(':')
+    const field = sep === -1 ? line : line.slice(0, sep)
+    const value = sep === -1 ? '' : line.slice(sep + 1).replace(/^ /, '')
+    if (field === 'id') id = Number(value)
+    else if (field === 'event') event = value
+    else if (field === 'data') data.push(value)
+  }
+  if (data.length === 0) return null
+  return { id, event, data: JSON.parse(data.join('\n')) } as JobEvent
+}
+
+export async function subscribeToJobEvents(
+  jobId: string,
+  onEvent: (event: JobEvent) => void,
+  signal?: AbortSignal,
+): Promise<void> {
+  const token = getStoredToken()
+  const response = await fetch(`${apiBaseUrl}/api/jobs/${encodeURIComponent(jobId)}/events`, {
+    headers: {
+      Accept: 'text/event-stream',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    signal,
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Progress stream unavailable (${response.status})`)
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) return
+    buffer += value.replace(/\r\n/g, '\n')
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const parsed = parseSseBlock(buffer.slice(0, boundary))
+      buffer = buffer.slice(boundary + 2)
+      if (parsed) {
+        onEvent(parsed)
+        if (parsed.event === 'complete' || parsed.event === 'failed') {
+          await reader.cancel()
+          return
+        }
+      }
+      boundary = buffer.indexOf('\n\n')
+    }
+  }
+}
+
 export default api
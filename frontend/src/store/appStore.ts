@@ -113,8 +113,10 @@ interface AppState {
 
   // History — loaded from API on login, cached in Zustand for UI
   history:           HistoryEntry[]
+  historyCursor:     string | null   // next_cursor of the last page loaded; null when all are loaded
   addToHistory:      (result: TranscriptionResult, file: File) => void
-  setHistory:        (entries: HistoryEntry[]) => void
+  setHistory:        (entries: HistoryEntry[], nextCursor?: string | null) => void
+  appendHistory:     (entries: HistoryEntry[], nextCursor: string | null) => void
   deleteHistoryItem: (id: string) => void
   clearHistory:      () => void
 
@@ -152,6 +154,7 @@ export const useAppStore = create<AppState>()(
           isAuthenticated: true,
           authUser: user,
           history: [],          // clear previous user's history before loading new user's
+          historyCursor: null,
           profile: {
             firstName: user.first_name,
             lastName:  user.last_name,
@@ -174,6 +177,7 @@ export const useAppStore = create<AppState>()(
           authUser:        null,
           currentPage:     'login',
           history:         [],
+          historyCursor:   null,
           profile:         { ...DEFAULT_PROFILE },
         })
       },
@@ -215,9 +219,14 @@ export const useAppStore = create<AppState>()(
         }
         set((s) => ({ history: [entry, ...s.history] }))
       },
-      setHistory: (entries) => set({ history: entries }),
+      historyCursor: null,
+      setHistory: (entries, nextCursor = null) => set({ history: entries, historyCursor: nextCursor }),
+      appendHistory: (entries, nextCursor) => set((s) => ({
+        history: [...s.history, ...entries.filter(e => !s.history.some(h => h.id === e.id))],
+        historyCursor: nextCursor,
+      })),
       deleteHistoryItem: (id) => set((s) => ({ history: s.history.filter(h => h.id !== id) })),
-      clearHistory: () => set({ history: [] }),
+      clearHistory: () => set({ history: [], historyCursor: null }),
 
       // Settings
       profile:       { ...DEFAULT_PROFILE },
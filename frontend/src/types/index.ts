@@ -19,6 +19,8 @@ export type NoteStylePreset = 'balanced' | 'concise' | 'detailed'
 export type PreferredFocus = 'general' | 'symptom_driven' | 'assessment_driven' | 'plan_driven'
 export type EncounterType = 'acute_visit' | 'follow_up' | 'counselling_education' | 'medication_review'
 
+export type PipelineMode = 'fast' | 'balanced' | 'thorough'
+
 export interface NoteStyleProfile {
   note_style_preset: NoteStylePreset
   preferred_focus: PreferredFocus
@@ -36,6 +38,7 @@ export interface ClinicalRepresentation {
   history_gaps?: string[]
   source_entities?: Record<string, unknown>
   structured_at?: string
+  extraction_source?: 'groq' | 'rules'
 }
 
 export interface SOAPQualityReport {
@@ -57,8 +60,35 @@ export interface TranscriptionResult {
   quality_report?: SOAPQualityReport
   quality_score?: number
   processing_time?: number
+  pipeline_mode?: PipelineMode
+  stage_timings?: Partial<Record<PipelineStage, number>>
+}
+
+// ── Job Progress Events (GET /api/jobs/{id}/events) ───────
+
+export type PipelineStage =
+  | 'transcription'
+  | 'normalization'
+  | 'validation'
+  | 'entities'
+  | 'clinical_representation'
+  | 'soap'
+  | 'persistence'
+
+export interface JobStageEventData {
+  stage: PipelineStage
+  stage_index: number
+  stage_count: number
+  elapsed_seconds: number
+  payload: Record<string, unknown>
 }
 
+export type JobEvent =
+  | { id: number; event: 'stage'; data: JobStageEventData }
+  | { id: number; event: 'soap_section'; data: { section: keyof SOAPNote; text: string } }
+  | { id: number; event: 'complete'; data: { db_id: number; processing_time: number } }
+  | { id: number; event: 'failed'; data: { message: string; processing_time?: number } }
+
 // ── Entity Category Types ─────────────────────────────────
 
 export type EntityCategory =
@@ -89,6 +119,7 @@ export interface HistoryEntry {
   confidenceScore: number
   status:          'complete' | 'processing' | 'failed'
   result?:         TranscriptionResult
+  snippet?:        string   // search hit fragment, matches wrapped in <mark>...</mark>
 }
 
 // ── UI State Types ────────────────────────────────────────